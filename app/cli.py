@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import os
+import sys
+
+from PySide6.QtWidgets import QApplication
+
+from app.config import load_rules, RULES_FILE
+from app.processing.backends import BACKENDS
+from app.processing.profiler import RunProfile
+from app.processing.reader import process_files
+from app.processing.streaming import stream_files
+from app.processing.transformer import model_calls, MODEL_NAME
+from app.processing.vectors import export_vectors
+from app.processing.writer import write_result
+from app.processing.sqlite_sink import is_sqlite
+from app.processing.watch import WatchService
+from app.processing.batch import load_manifest, run_batch
+from app.processing import prompts
+from app.processing.decisions import DecisionStore, DEFAULT_PATH as DECISIONS_PATH, KINDS as DECISION_KINDS
+
+_app = None
+
+def _has_display() -> bool:
+    if os.environ.get("QT_QPA_PLATFORM") in ("offscreen", "minimal"):
+        return False
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+def _init_prompts():
+    # Диалоги подтверждения правил требуют QApplication; без экрана
+    # вопросы отклоняются, а не обрывают запуск
+    if prompts.get_policy() != "ask":
+        return
+    if not _has_display():
+        prompts.set_policy("reject")
+        print("Нет экрана для диалогов: предложенные правила будут отклонены", file=sys.stderr)
+        return
+    global _app
+    _app = QApplication.instance() or QApplication(sys.argv[:1])
+
+def _merge(args) -> int:
+    _init_prompts()
+    rules = load_rules(args.rules)
+    if args.reader:
+        rules["reader"]["backend"] = args.reader
+    if args.streaming:
+        rules["streaming"]["enabled"] = True
+    if args.workers is not None:
+        rules["parallel"].update(enabled=args.workers != 1, workers=args.workers)
+    if args.dedup is not None:
+        rules["dedup"].update(enabled=True, key_columns=args.dedup or rules["dedup"]["key_columns"])
+    if args.index:
+        rules["writer"]["sqlite_index_columns"] = args.index
+
+    profile = RunProfile.from_rules(rules, model_calls=model_calls)
+    out = os.path.abspath(args.output)
+    if rules["streaming"].get("enabled", False):
+        if is_sqlite(out):
+            print("Потоковый режим записывает только .xlsx", file=sys.stderr)
+            return 2
+        stream_files(args.inputs, rules, out, profile).close()
+    else:
+        result, log = process_files(args.inputs, rules, profile, log_path=os.path.splitext(out)[0] + ".log")
+        with log:
+            write_result(out, result, log, profile, rules["writer"])
+    print(f"Сохранено: {out}")
+    return 0
+
+def _watch(args) -> int:
+    rules = load_rules(args.rules)
+    if args.interval is not None:
+        rules["watch"]["interval_s"] = args.interval
+    service = WatchService(args.directory, args.output, rules)
+    try:
+        asyncio.run(service.run(once=args.once))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def _batch(args) -> int:
+    jobs = load_manifest(args.manifest)
+    summary_path = args.summary or os.path.splitext(os.path.abspath(args.manifest))[0] + ".summary.json"
+    summary = run_batch(jobs, args.workers, summary_path)
+    print(f"Успешно: {summary['ok']}, с ошибками: {summary['failed']}. Сводка: {summary_path}")
+    return 1 if summary["failed"] else 0
+
+def _vectors(args) -> int:
+    import spacy
+    nlp = spacy.load(args.model)
+    n = export_vectors(nlp, args.output)
+    print(f"Выгружено векторов: {n} → {os.path.abspath(args.output)}")
+    print('Укажите этот путь в rules.json: "vectors": {"path": "..."}')
+    return 0
+
+def _decisions(args) -> int:
+    rules = load_rules(args.rules)
+    store = DecisionStore(rules["decisions"].get("path") or DECISIONS_PATH)
+    if args.clear:
+        kind = None if args.clear == "all" else args.clear
+        before = len(store)
+        store.clear(kind)
+        store.save()
+        print(f"Удалено решений: {before - len(store)}")
+        return 0
+    for e in store.entries():
+        answer = ("да → " + e["value"] if e.get("value") else "да") if e["accepted"] else "нет"
+        rule = f" [{e['rule']}]" if e.get("rule") else ""
+        print(f"{DECISION_KINDS.get(e['kind'], e['kind'])}{rule}: '{e['pair'][0]}' / '{e['pair'][1]}' — {answer}")
+    print(f"Всего: {len(store)} ({store.path})")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description="Интегратор Excel")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    merge = sub.add_parser("merge", help="объединить файлы Excel")
+    merge.add_argument("inputs", nargs="+", help="входные файлы .xls/.xlsx/.csv/.tsv")
+    merge.add_argument("-o", "--output", required=True, help="файл результата .xlsx или база SQLite .sqlite/.db")
+    merge.add_argument("--rules", default=RULES_FILE, help="файл правил (по умолчанию rules.json)")
+    merge.add_argument("--reader", choices=["auto", *BACKENDS], help="бэкенд чтения")
+    merge.add_argument("--streaming", action="store_true", help="потоковый режим для больших листов")
+    merge.add_argument("--workers", type=int, help="число процессов для обработки листов (0 — по числу ядер)")
+    merge.add_argument("--dedup", nargs="*", metavar="СТОЛБЕЦ",
+                       help="удалять повторяющиеся строки и части листов; столбцы ключа (по умолчанию все)")
+    merge.add_argument("--index", nargs="+", metavar="СТОЛБЕЦ", help="индексы по столбцам в базе SQLite")
+    merge.set_defaults(func=_merge)
+
+    watch = sub.add_parser("watch", help="следить за папкой и дописывать новые файлы в результат")
+    watch.add_argument("directory", help="папка с входными файлами")
+    watch.add_argument("-o", "--output", required=True, help="файл результата .xlsx")
+    watch.add_argument("--rules", default=RULES_FILE, help="файл правил (по умолчанию rules.json)")
+    watch.add_argument("--interval", type=float, help="период опроса папки, с")
+    watch.add_argument("--once", action="store_true", help="обработать новые файлы и завершиться")
+    watch.set_defaults(func=_watch)
+
+    batch = sub.add_parser("batch", help="выполнить список заданий на объединение")
+    batch.add_argument("manifest", help="файл заданий .json/.yaml: [{inputs, rules, output}, ...]")
+    batch.add_argument("-j", "--workers", type=int, default=0, help="число процессов (0 — по числу ядер)")
+    batch.add_argument("--summary", help="файл сводки (по умолчанию <manifest>.summary.json)")
+    batch.set_defaults(func=_batch)
+
+    vectors = sub.add_parser("vectors", help="выгрузить векторы модели в общую таблицу для сходства заголовков")
+    vectors.add_argument("output", help="папка таблицы векторов")
+    vectors.add_argument("--model", default=MODEL_NAME, help=f"модель spaCy (по умолчанию {MODEL_NAME})")
+    vectors.set_defaults(func=_vectors)
+
+    dec = sub.add_parser("decisions", help="показать или очистить сохранённые ответы на вопросы")
+    dec.add_argument("--rules", default=RULES_FILE, help="файл правил (по умолчанию rules.json)")
+    dec.add_argument("--clear", nargs="?", const="all", choices=["all", *DECISION_KINDS],
+                     help="удалить все решения или решения одного вида")
+    dec.set_defaults(func=_decisions)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
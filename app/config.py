@@ -1,27 +1,57 @@
 import os
 import json
+import copy
 
 RULES_FILE = os.path.join(os.path.dirname(__file__), '..', 'rules.json')
 
-def load_rules():
-    if os.path.exists(RULES_FILE):
-        with open(RULES_FILE, 'r', encoding='utf-8') as f:
-            rules = json.load(f)
+SETTINGS_DEFAULTS = {
+    "profiling":  {"enabled":True,"trace_memory":False},
+    "logging":    {"max_examples":20},
+    "dtypes":     {"enabled":True,"category_ratio":0.5,"category_max":5000,
+                   "infer_numeric_text":False},
+    "streaming":  {"enabled":False,"chunk_rows":50000,"head_rows":50},
+    "reader":     {"backend":"auto","large_file_mb":20,
+                   "csv_encoding":"auto","csv_delimiter":"auto","csv_chunk_rows":100000},
+    "parallel":   {"enabled":False,"workers":0,"prompt_policy":"reject"},
+    "spill":      {"enabled":True,"threshold_mb":1024,"dir":""},
+    "vectors":    {"path":""},
+    "decisions":  {"enabled":True,"path":""},
+    "preview":    {"rows":200},
+    "dedup":      {"enabled":False,"parts":True,"rows":True,"key_columns":[]},
+    "writer":     {"engine":"openpyxl","workers":0,"compression":6,"min_rows":100000,
+                   "split":"sheets","max_rows":1048576,"max_columns":16384,
+                   "sqlite_mode":"append","sqlite_batch_rows":50000,"sqlite_index_columns":[]},
+    "watch":      {"interval_s":5,"settle_s":5,"patterns":["*.xlsx","*.xls","*.csv","*.tsv"],"prompt_policy":"reject"},
+}
+
+def apply_defaults(rules):
+    for section in (
+        "column_rules","unit_rules","sheet_rules",
+        "word_filter","word_replace","column_word_filter"
+    ):
+        sec = rules.get(section, {})
+        sec.setdefault("enabled", True)
+        sec.setdefault("rules", [])
+        rules[section] = sec
 
-        for section in (
-            "column_rules","unit_rules","sheet_rules",
-            "word_filter","word_replace","column_word_filter"
-        ):
-            sec = rules.get(section, {})
-            sec.setdefault("enabled", True)
-            rules[section] = sec
+    rules.setdefault("unit_rules", {})
+    rules["unit_rules"].setdefault("no_unit_to_header", False)
+    rules.setdefault("skip_rows_keywords", [])
 
-        rules.setdefault("unit_rules", {})
-        rules["unit_rules"].setdefault("no_unit_to_header", False)
+    for section, defaults in SETTINGS_DEFAULTS.items():
+        sec = rules.setdefault(section, {})
+        for key, value in defaults.items():
+            sec.setdefault(key, copy.deepcopy(value))
 
-        return rules
+    return rules
+
+def load_rules(path=RULES_FILE):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        return apply_defaults(rules)
 
-    return {
+    return apply_defaults({
         "column_rules":       {"rules":[],"threshold":80,"auto_merge":True,"enabled":True},
         "unit_rules":         {"rules":[],"threshold":80,"auto_merge":True,"enabled":True,"no_unit_to_header":False},
         "sheet_rules":        {"rules":[],"threshold":90,"auto_merge":True,"enabled":True},
@@ -29,8 +59,8 @@ def load_rules():
         "word_replace":       {"rules":[],"threshold":80,"auto_replace":True,"enabled":True},
         "column_word_filter": {"rules":[],"enabled":True},
         "skip_rows_keywords": []
-    }
+    })
 
-def save_rules(rules):
-    with open(RULES_FILE, 'w', encoding='utf-8') as f:
+def save_rules(rules, path=RULES_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
         json.dump(rules, f, ensure_ascii=False, indent=4)
\ No newline at end of file
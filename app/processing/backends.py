@@ -0,0 +1,498 @@
+import os
+import re
+import csv
+import codecs
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from itertools import islice
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.worksheet.cell_range import CellRange
+
+try:
+    import python_calamine
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+_NS = {
+    "m":   "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "r":   "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+
+def _sheet_part(zf: zipfile.ZipFile, sheet_name: str) -> Optional[str]:
+    wb = ET.fromstring(zf.read("xl/workbook.xml"))
+    rid = None
+    for sh in wb.iterfind("m:sheets/m:sheet", _NS):
+        if sh.get("name") == sheet_name:
+            rid = sh.get(f"{{{_NS['r']}}}id")
+            break
+    if rid is None:
+        return None
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iterfind("rel:Relationship", _NS):
+        if rel.get("Id") == rid:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    return None
+
+_MERGE_START_RE = re.compile(rb"<(?:[\w.-]+:)?mergeCells[\s/>]")
+_MERGE_END_RE = re.compile(rb"</(?:[\w.-]+:)?mergeCells\s*>")
+_MERGE_REF_RE = re.compile(rb"<(?:[\w.-]+:)?mergeCell\s[^>]*?\bref\s*=\s*[\"']([^\"']+)[\"']")
+
+def _merge_cells_xml(f, chunk: int = 1 << 20) -> bytes:
+    # Блок mergeCells идёт после sheetData: строки листа не разбираются,
+    # а просматриваются как байты до начала блока; чтение кончается на его
+    # закрывающем теге. Текст ячеек экранирован, «<» в нём не встречается.
+    buf = b""
+    while True:
+        data = f.read(chunk)
+        if not data:
+            return b""
+        buf += data
+        m = _MERGE_START_RE.search(buf)
+        if m:
+            break
+        buf = buf[-64:]
+    buf = buf[m.start():]
+    pos = 0
+    while True:
+        end = _MERGE_END_RE.search(buf, pos)
+        if end:
+            return buf[:end.end()]
+        pos = max(0, len(buf) - 64)
+        data = f.read(chunk)
+        if not data:
+            return buf
+        buf += data
+
+def read_merged_ranges(path: str, sheet_name: str, max_row: Optional[int] = None) -> List[CellRange]:
+    ranges: List[CellRange] = []
+    with zipfile.ZipFile(path) as zf:
+        part = _sheet_part(zf, sheet_name)
+        if part is None:
+            return ranges
+        with zf.open(part) as f:
+            block = _merge_cells_xml(f)
+    for ref in _MERGE_REF_RE.findall(block):
+        rng = CellRange(ref.decode("ascii"))
+        if max_row is None or rng.min_row <= max_row:
+            ranges.append(rng)
+    return ranges
+
+class _Cell:
+    def __init__(self, value):
+        self.value = value
+
+class _MergedCells:
+    def __init__(self, ranges):
+        self.ranges = ranges
+
+class SheetHead:
+    # Минимальная замена листа openpyxl для _detect_and_fix_header:
+    # значения берутся из прочитанной таблицы, объединения — из бэкенда.
+    def __init__(self, raw: pd.DataFrame, ranges: List[CellRange]):
+        self._raw = raw
+        self.merged_cells = _MergedCells(ranges)
+
+    def cell(self, row: int, column: int) -> _Cell:
+        if row - 1 < self._raw.shape[0] and column - 1 < self._raw.shape[1]:
+            v = self._raw.iat[row - 1, column - 1]
+            return _Cell(None if pd.isna(v) else v)
+        return _Cell(None)
+
+@dataclass
+class TrimStats:
+    rows: int = 0
+    cols: int = 0
+    kept_rows: int = 0
+    kept_cols: int = 0
+
+    def describe(self) -> Optional[str]:
+        if self.rows == self.kept_rows and self.cols == self.kept_cols:
+            return None
+        return (
+            f"отброшены пустые строки: {self.rows - self.kept_rows}, "
+            f"пустые столбцы: {self.cols - self.kept_cols} "
+            f"(данные: {self.kept_rows}×{self.kept_cols})"
+        )
+
+def trim_rows(rows: Iterable[tuple], stats: TrimStats) -> Iterator[tuple]:
+    # Форматирование расширяет размер листа пустыми строками и столбцами.
+    # Строки обрезаются по последней непустой ячейке, пустые строки
+    # выдаются только если за ними есть данные — хвост не создаётся вовсе.
+    pending = 0
+    for row in rows:
+        stats.rows += 1
+        n = len(row)
+        if n > stats.cols:
+            stats.cols = n
+        last = n
+        while last and row[last - 1] is None:
+            last -= 1
+        if not last:
+            pending += 1
+            continue
+        for _ in range(pending):
+            yield ()
+        stats.kept_rows += pending + 1
+        pending = 0
+        if last > stats.kept_cols:
+            stats.kept_cols = last
+        yield tuple(row[:last])
+
+def _frame(rows: list) -> pd.DataFrame:
+    if not rows:
+        return pd.DataFrame()
+    width = max(map(len, rows))
+    pad = (None,) * width
+    return pd.DataFrame.from_records([r + pad[len(r):] if len(r) < width else r for r in rows])
+
+class ReaderBackend:
+    name = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.trim: Dict[str, TrimStats] = {}
+
+    def sheet_names(self) -> List[str]:
+        raise NotImplementedError
+
+    def iter_rows(self, sheet: str) -> Iterator[tuple]:
+        raise NotImplementedError
+
+    def merged_ranges(self, sheet: str, max_row: Optional[int] = None) -> List[CellRange]:
+        return []
+
+    def data_rows(self, sheet: str, nrows: Optional[int] = None) -> Iterator[tuple]:
+        stats = self.trim[sheet] = TrimStats()
+        return trim_rows(islice(self.iter_rows(sheet), nrows), stats)
+
+    def read_sheet(self, sheet: str, nrows: Optional[int] = None) -> pd.DataFrame:
+        return _frame(list(self.data_rows(sheet, nrows)))
+
+    def header_view(self, sheet: str, raw: pd.DataFrame, max_row: Optional[int] = None) -> SheetHead:
+        return SheetHead(raw, self.merged_ranges(sheet, max_row))
+
+    def close(self):
+        pass
+
+class OpenpyxlBackend(ReaderBackend):
+    name = "openpyxl"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._wb = load_workbook(path, read_only=True, data_only=True)
+
+    def sheet_names(self) -> List[str]:
+        return self._wb.sheetnames
+
+    def iter_rows(self, sheet: str) -> Iterator[tuple]:
+        ws = self._wb[sheet]
+        # Без сброса строки дополняются до размера из <dimension>,
+        # который у отформатированных листов бывает огромным
+        ws.reset_dimensions()
+        return ws.iter_rows(values_only=True)
+
+    def merged_ranges(self, sheet: str, max_row: Optional[int] = None) -> List[CellRange]:
+        return read_merged_ranges(self.path, sheet, max_row)
+
+    def close(self):
+        self._wb.close()
+
+class XlrdBackend(ReaderBackend):
+    name = "xlrd"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        import xlrd
+        self._xlrd = xlrd
+        self._book = xlrd.open_workbook(path, formatting_info=True, on_demand=True)
+
+    def sheet_names(self) -> List[str]:
+        return self._book.sheet_names()
+
+    def _value(self, cell):
+        xlrd = self._xlrd
+        if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+            return None
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            try:
+                return xlrd.xldate.xldate_as_datetime(cell.value, self._book.datemode)
+            except (ValueError, OverflowError):
+                return cell.value
+        if cell.ctype == xlrd.XL_CELL_NUMBER and float(cell.value).is_integer():
+            return int(cell.value)
+        if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+            return bool(cell.value)
+        if cell.ctype == xlrd.XL_CELL_ERROR:
+            return None
+        return cell.value
+
+    def iter_rows(self, sheet: str) -> Iterator[tuple]:
+        sh = self._book.sheet_by_name(sheet)
+        for r in range(sh.nrows):
+            yield tuple(self._value(c) for c in sh.row(r))
+
+    def merged_ranges(self, sheet: str, max_row: Optional[int] = None) -> List[CellRange]:
+        sh = self._book.sheet_by_name(sheet)
+        return [
+            CellRange(min_col=clo + 1, min_row=rlo + 1, max_col=chi, max_row=rhi)
+            for rlo, rhi, clo, chi in sh.merged_cells
+            if max_row is None or rlo + 1 <= max_row
+        ]
+
+    def close(self):
+        self._book.release_resources()
+
+class CalamineBackend(ReaderBackend):
+    name = "calamine"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._wb = python_calamine.CalamineWorkbook.from_path(path)
+
+    def sheet_names(self) -> List[str]:
+        return list(self._wb.sheet_names)
+
+    @staticmethod
+    def _value(v):
+        if v == "":
+            return None
+        if isinstance(v, float) and v.is_integer():
+            return int(v)
+        return v
+
+    def _rows(self, sheet: str, nrows: Optional[int] = None) -> list:
+        sh = self._wb.get_sheet_by_name(sheet)
+        if nrows is None:
+            return sh.to_python(skip_empty_area=False)
+        return sh.to_python(skip_empty_area=False, nrows=nrows)
+
+    def iter_rows(self, sheet: str) -> Iterator[tuple]:
+        sh = self._wb.get_sheet_by_name(sheet)
+        rows = sh.iter_rows() if hasattr(sh, "iter_rows") else iter(sh.to_python(skip_empty_area=False))
+        for row in rows:
+            yield tuple(self._value(v) for v in row)
+
+    def data_rows(self, sheet: str, nrows: Optional[int] = None) -> Iterator[tuple]:
+        stats = self.trim[sheet] = TrimStats()
+        return trim_rows((tuple(self._value(v) for v in row) for row in self._rows(sheet, nrows)), stats)
+
+    def merged_ranges(self, sheet: str, max_row: Optional[int] = None) -> List[CellRange]:
+        sh = self._wb.get_sheet_by_name(sheet)
+        native = getattr(sh, "merged_cell_ranges", None)
+        if native is not None:
+            return [
+                CellRange(min_col=c0 + 1, min_row=r0 + 1, max_col=c1 + 1, max_row=r1 + 1)
+                for (r0, c0), (r1, c1) in native
+                if max_row is None or r0 + 1 <= max_row
+            ]
+        if self.path.lower().endswith('.xls'):
+            return XlrdBackend(self.path).merged_ranges(sheet, max_row)
+        return read_merged_ranges(self.path, sheet, max_row)
+
+    def close(self):
+        close = getattr(self._wb, "close", None)
+        if close:
+            close()
+
+CSV_EXTENSIONS = (".csv", ".tsv")
+_CSV_DELIMITERS = ";,\t|"
+_SNIFF_BYTES = 1 << 20
+_FIELDS_RE = re.compile(r"saw (\d+)")
+
+def is_csv(path: str) -> bool:
+    return path.lower().endswith(CSV_EXTENSIONS)
+
+def detect_encoding(head: bytes) -> str:
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # final=False: последний символ образца может быть обрезан
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1251"
+
+def detect_delimiter(text: str) -> str:
+    # Разделитель, дающий одинаковое (и большее) число полей в строках образца
+    lines = text.splitlines()[:-1] or text.splitlines()
+    lines = [l for l in lines if l.strip()][:200]
+    best, best_score = ",", (0, 0)
+    for d in _CSV_DELIMITERS:
+        counts = [len(r) for r in csv.reader(lines, delimiter=d)]
+        if not counts:
+            continue
+        width, freq = Counter(counts).most_common(1)[0]
+        if width < 2:
+            continue
+        score = (freq, width)
+        if score > best_score:
+            best, best_score = d, score
+    return best
+
+class CsvBackend(ReaderBackend):
+    # Текстовая выгрузка — один лист с именем файла. Значения читаются как
+    # текст C-парсером pandas (в потоковом режиме — фрагментами); числа из текста получаются
+    # на этапе compact_dtypes, как и для текстовых ячеек Excel.
+    name = "csv"
+
+    def __init__(self, path: str, cfg: Optional[dict] = None):
+        super().__init__(path)
+        cfg = cfg or {}
+        self.chunk_rows = max(1, cfg.get("csv_chunk_rows", 100000))
+        with open(path, 'rb') as f:
+            head = f.read(_SNIFF_BYTES)
+        encoding = cfg.get("csv_encoding", "auto")
+        self.encoding = detect_encoding(head) if encoding == "auto" else encoding
+        text = head.decode(self.encoding, errors="ignore")
+        delimiter = cfg.get("csv_delimiter", "auto")
+        if delimiter == "auto":
+            delimiter = "\t" if path.lower().endswith(".tsv") else detect_delimiter(text)
+        self.delimiter = delimiter
+        # Число столбцов по образцу в начале файла — только начальная оценка:
+        # более широкие строки дальше в файле расширяют таблицу (см. _widen)
+        sample = text.splitlines()[:-1] or text.splitlines()
+        self.width = max((len(r) for r in csv.reader(sample, delimiter=delimiter)), default=1)
+        self.sheet = os.path.splitext(os.path.basename(path))[0]
+        shown = "табуляция" if delimiter == "\t" else f"«{delimiter}»"
+        self.name = f"csv, {self.encoding}, разделитель {shown}"
+
+    def sheet_names(self) -> List[str]:
+        return [self.sheet]
+
+    def _read(self, nrows: Optional[int] = None, chunksize: Optional[int] = None):
+        # chunksize=None — весь файл одним кадром, иначе итератор фрагментов.
+        # Кодировка определена по образцу: байты, не подходящие к ней дальше
+        # в файле, заменяются, а не прерывают чтение
+        return pd.read_csv(
+            self.path,
+            sep=self.delimiter,
+            encoding=self.encoding,
+            encoding_errors="replace",
+            header=None,
+            # Запасной столбец: строку шире образца в начале фрагмента C-парсер
+            # не отвергает, а обрезает по числу имён — заполненный запасной
+            # столбец показывает, что таблицу нужно расширить
+            names=range(self.width + 1),
+            dtype=object,
+            keep_default_na=False,
+            na_values=[""],
+            skip_blank_lines=False,
+            engine="c",
+            chunksize=chunksize,
+            nrows=nrows,
+        )
+
+    def _widen(self, error: Optional[Exception] = None):
+        # Строка шире, чем известно: парсер сообщает число её полей
+        # («saw N») или она обрезана по запасному столбцу. Чтение начинается
+        # заново с расширенной таблицей
+        m = _FIELDS_RE.search(str(error)) if error is not None else None
+        if error is not None and m is None:
+            raise ValueError(f"Файл {os.path.basename(self.path)}: ошибка разбора CSV: {error}") from error
+        self.width = max(int(m.group(1)) if m else 0, self.width * 2)
+
+    def _values(self, nrows: Optional[int] = None) -> Iterator:
+        done = 0
+        while True:
+            # После расширения уже выданные строки пропускаются
+            skip, widened = done, False
+            try:
+                with self._read(nrows, self.chunk_rows) as reader:
+                    for chunk in reader:
+                        values = chunk.to_numpy(dtype=object)
+                        if pd.notna(values[:, -1]).any():
+                            self._widen()
+                            widened = True
+                            break
+                        values = values[skip:, :-1]
+                        skip = max(0, skip - len(chunk))
+                        if not len(values):
+                            continue
+                        values[pd.isna(values)] = None
+                        done += len(values)
+                        yield values
+            except pd.errors.ParserError as e:
+                self._widen(e)
+                widened = True
+            if not widened:
+                return
+
+    def iter_rows(self, sheet: str, nrows: Optional[int] = None) -> Iterator[tuple]:
+        for values in self._values(nrows):
+            yield from map(tuple, values.tolist())
+
+    def data_rows(self, sheet: str, nrows: Optional[int] = None) -> Iterator[tuple]:
+        stats = self.trim[sheet] = TrimStats()
+        return trim_rows(self.iter_rows(sheet, nrows), stats)
+
+    def read_sheet(self, sheet: str, nrows: Optional[int] = None) -> pd.DataFrame:
+        # Лист целиком — одним вызовом парсера, без фрагментов и построчных
+        # кортежей; обрезка как в trim_rows, пропуски заменяются на None
+        # по столбцу, чтобы в памяти не было второй копии всей таблицы
+        stats = self.trim[sheet] = TrimStats()
+        while True:
+            try:
+                df = self._read(nrows)
+            except pd.errors.ParserError as e:
+                self._widen(e)
+                continue
+            if not df.iloc[:, -1].notna().any():
+                break
+            self._widen()
+        # Запасной столбец пуст и отсекается обрезкой ниже
+        filled = df.notna().to_numpy()
+        rows = np.flatnonzero(filled.any(axis=1))
+        cols = np.flatnonzero(filled.any(axis=0))
+        stats.rows, stats.cols = len(df), self.width
+        if not len(rows):
+            stats.cols = 0
+            return pd.DataFrame()
+        stats.kept_rows, stats.kept_cols = rows[-1] + 1, cols[-1] + 1
+        df = df.iloc[:stats.kept_rows, :stats.kept_cols]
+        for j in range(df.shape[1]):
+            col = df.iloc[:, j]
+            if not filled[:stats.kept_rows, j].all():
+                df.isetitem(j, col.where(col.notna(), None))
+        return df
+
+BACKENDS = {
+    "openpyxl": OpenpyxlBackend,
+    "xlrd":     XlrdBackend,
+    "calamine": CalamineBackend,
+}
+
+def choose_backend(path: str, cfg: dict) -> str:
+    name = cfg.get("backend", "auto")
+    if name != "auto":
+        if name == "calamine" and not HAS_CALAMINE:
+            raise ValueError("Бэкенд calamine не установлен: pip install python-calamine")
+        if name not in BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд чтения: {name}")
+        return name
+
+    size_mb = os.path.getsize(path) / 2**20
+    if HAS_CALAMINE and size_mb >= cfg.get("large_file_mb", 20):
+        return "calamine"
+    if path.lower().endswith('.xls'):
+        return "xlrd"
+    return "openpyxl"
+
+def open_backend(path: str, cfg: dict) -> ReaderBackend:
+    # Настройка backend относится к книгам Excel; CSV читается всегда одинаково
+    if is_csv(path):
+        return CsvBackend(path, cfg)
+    return BACKENDS[choose_backend(path, cfg)](path)
@@ -0,0 +1,143 @@
+import os
+import copy
+import json
+import time
+import multiprocessing
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import List, Optional
+
+from app.config import load_rules, RULES_FILE
+from app.processing import prompts, transformer
+from app.processing.profiler import RunProfile
+from app.processing.reader import process_files
+from app.processing.streaming import stream_files
+from app.processing.writer import write_result
+
+# Разобранные правила кешируются в процессе, модель spaCy и таблица
+# векторов загружаются при первом обращении и остаются в памяти для
+# следующих заданий этого процесса
+_rules_cache: dict = {}
+
+def load_manifest(path: str) -> List[dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.lower().endswith(('.yml', '.yaml')):
+            import yaml
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("jobs", [])
+
+    root = os.path.dirname(os.path.abspath(path))
+
+    def resolve(p):
+        return p if os.path.isabs(p) else os.path.join(root, p)
+
+    jobs = []
+    for i, job in enumerate(data, start=1):
+        if not job.get("inputs") or not job.get("output"):
+            raise ValueError(f"Задание {i}: нужны поля inputs и output")
+        name = job.get("name") or f"job_{i}"
+        # Без файла правил load_rules вернул бы пустые правила, и задание
+        # с опечаткой в пути выполнилось бы «успешно» без правил
+        rules = resolve(job["rules"]) if job.get("rules") else RULES_FILE
+        if job.get("rules") and not os.path.isfile(rules):
+            raise ValueError(f"Задание {i} («{name}»): нет файла правил {rules}")
+        jobs.append({
+            "name": name,
+            "inputs": [resolve(p) for p in job["inputs"]],
+            "rules": rules,
+            "output": resolve(job["output"]),
+        })
+
+    # Одинаковые имена путают сводку, а общий файл результата или лога
+    # (он рядом с результатом, с расширением .log) перезаписали бы
+    # параллельные задания
+    names, outputs = {}, {}
+    for i, job in enumerate(jobs, start=1):
+        if job["name"] in names:
+            raise ValueError(f"Задание {i}: имя «{job['name']}» уже у задания {names[job['name']]}")
+        names[job["name"]] = i
+        stem = os.path.normcase(os.path.splitext(os.path.abspath(job["output"]))[0])
+        if stem in outputs:
+            raise ValueError(
+                f"Задание {i}: результат {job['output']} совпадает с результатом "
+                f"или логом задания {outputs[stem]}"
+            )
+        outputs[stem] = i
+    return jobs
+
+def _job_rules(path: str) -> dict:
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    cached = _rules_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, load_rules(path))
+        _rules_cache[path] = cached
+    return copy.deepcopy(cached[1])
+
+def run_job(job: dict) -> dict:
+    t0 = time.perf_counter()
+    status = {"name": job["name"], "output": job["output"], "pid": os.getpid()}
+    try:
+        rules = _job_rules(job["rules"])
+        # Задания и так выполняются параллельно — вложенный пул не нужен
+        rules["parallel"]["enabled"] = False
+        rules["writer"]["workers"] = 1
+        prompts.set_policy(rules["parallel"].get("prompt_policy", "reject"))
+
+        profile = RunProfile.from_rules(rules, model_calls=transformer.model_calls)
+        if rules["streaming"].get("enabled", False):
+            stream_files(job["inputs"], rules, job["output"], profile).close()
+        else:
+            log_path = os.path.splitext(job["output"])[0] + ".log"
+            result, log = process_files(job["inputs"], rules, profile, log_path=log_path)
+            with log:
+                write_result(job["output"], result, log, profile, rules["writer"])
+        status["status"] = "ok"
+    except Exception as e:
+        status["status"] = "error"
+        status["error"] = f"{type(e).__name__}: {e}"
+        status["traceback"] = traceback.format_exc()
+    status["duration_s"] = round(time.perf_counter() - t0, 3)
+    return status
+
+def run_batch(jobs: List[dict], workers: int = 0, summary_path: Optional[str] = None, echo=print) -> dict:
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    started = datetime.now()
+    echo(f"Заданий: {len(jobs)}, процессов: {workers}")
+
+    statuses = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        futures = {pool.submit(run_job, job): job for job in jobs}
+        for fut in as_completed(futures):
+            job = futures[fut]
+            try:
+                st = fut.result()
+            except Exception as e:
+                st = {"name": job["name"], "output": job["output"], "status": "error",
+                      "error": f"{type(e).__name__}: {e}", "duration_s": None}
+            statuses[job["name"]] = st
+            line = f"{st['name']}: {'готово' if st['status'] == 'ok' else 'ошибка'}"
+            if st.get("duration_s") is not None:
+                line += f" за {st['duration_s']:.1f} с"
+            if st.get("error"):
+                line += f" — {st['error']}"
+            echo(line)
+
+    summary = {
+        "started": started.isoformat(timespec="seconds"),
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "ok": sum(st["status"] == "ok" for st in statuses.values()),
+        "failed": sum(st["status"] != "ok" for st in statuses.values()),
+        "jobs": [statuses[job["name"]] for job in jobs],
+    }
+    if summary_path:
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
@@ -0,0 +1,137 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+
+import pandas as pd
+
+# Шаблоны совпадают с шаблонами этапов, которые по ним пропускают столбцы
+UNIT_VALUE_RE = re.compile(r'''
+    ^\s*
+    (?:(?P<num>\d+\.?\d*)\s*(?P<unit1>[^\d\s]+)
+    |(?P<unit2>[^\d\s]+)\s*(?P<num2>\d+\.?\d*))
+    \s*$
+''', re.IGNORECASE | re.VERBOSE)
+CONVERT_VALUE_RE = re.compile(r"^\s*([\d\.]+)\s*([^\d\.\s]+)\s*$", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"^\s*[-+]?(\d+[.,]?\d*|[.,]\d+)\s*$")
+_LETTER_RE = re.compile(r"[^\W\d_]")
+
+@dataclass
+class ColumnProfile:
+    name: str
+    dtype: str
+    kind: str
+    rows: int
+    nulls: int
+    distinct: int
+    numeric_ratio: float = 0.0
+    has_letters: bool = False
+    units: Dict[str, int] = field(default_factory=dict)
+    convert_units: Set[str] = field(default_factory=set)
+    lower: Dict[str, str] = field(default_factory=dict)
+    _text: Optional[pd.Series] = None
+
+    @property
+    def null_ratio(self) -> float:
+        return self.nulls / self.rows if self.rows else 1.0
+
+    @property
+    def is_text(self) -> bool:
+        return self.kind == "text"
+
+def _distinct_values(s: pd.Series) -> list:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = pd.unique(s.cat.codes.to_numpy())
+        cats = s.cat.categories
+        return [cats[c] for c in codes if c >= 0]
+    return s.dropna().unique().tolist()
+
+def profile_column(s: pd.Series, name: str) -> ColumnProfile:
+    dt = s.dtype
+    rows = len(s)
+    nulls = int(s.isna().sum())
+    is_text = dt == object or isinstance(dt, (pd.StringDtype, pd.CategoricalDtype))
+    if not is_text:
+        if nulls == rows:
+            kind = "empty"
+        elif pd.api.types.is_numeric_dtype(dt):
+            kind = "numeric"
+        elif pd.api.types.is_datetime64_any_dtype(dt):
+            kind = "datetime"
+        else:
+            kind = "other"
+        return ColumnProfile(name, str(dt), kind, rows, nulls, int(s.nunique()),
+                             numeric_ratio=1.0 if kind == "numeric" else 0.0)
+
+    values = _distinct_values(s)
+    prof = ColumnProfile(name, str(dt), "text" if values else "empty", rows, nulls, len(values))
+    numeric = 0
+    for v in values:
+        if isinstance(v, str):
+            text = v
+            prof.lower[v] = v.lower()
+            numeric += bool(_NUMBER_RE.match(v))
+        else:
+            # Смешанные столбцы: числа и даты среди строк
+            text = str(v)
+            numeric += isinstance(v, (int, float)) and not isinstance(v, bool)
+        if not prof.has_letters and _LETTER_RE.search(text):
+            prof.has_letters = True
+        m = UNIT_VALUE_RE.match(text)
+        if m:
+            unit = (m.group('unit1') or m.group('unit2')).lower()
+            prof.units[unit] = prof.units.get(unit, 0) + 1
+        m = CONVERT_VALUE_RE.match(text.strip())
+        if m:
+            prof.convert_units.add(m.group(2).lower().rstrip('.:'))
+    prof.numeric_ratio = numeric / len(values) if values else 0.0
+    return prof
+
+class SheetProfile:
+    # Свойства столбцов объединённого листа, общие для всех этапов.
+    # Профиль столбца считается при первом обращении этапа к нему:
+    # отключённые этапы и этапы без правил значения не просматривают.
+    # Этап, изменивший значения столбца, вызывает invalidate — профиль
+    # столбца пересчитывается при следующем обращении.
+    def __init__(self):
+        self._columns: Dict[str, ColumnProfile] = {}
+        self.computed = 0
+
+    def get(self, df: pd.DataFrame, col) -> ColumnProfile:
+        prof = self._columns.get(col)
+        if prof is None:
+            prof = profile_column(df[col], col)
+            self._columns[col] = prof
+            self.computed += 1
+        return prof
+
+    def text_columns(self, df: pd.DataFrame, letters: bool = False) -> list:
+        return [
+            col for col in df.columns
+            if self.get(df, col).is_text and (not letters or self.get(df, col).has_letters)
+        ]
+
+    def text_values(self, df: pd.DataFrame, col) -> pd.Series:
+        # Непустые значения столбца в виде строк — для выборок по содержимому
+        prof = self.get(df, col)
+        if prof._text is None:
+            prof._text = df[col].dropna().astype(str)
+        return prof._text
+
+    def rows_changed(self):
+        # После удаления строк множества единиц и букв остаются надмножеством,
+        # а построчные представления устаревают
+        for prof in self._columns.values():
+            prof._text = None
+
+    def invalidate(self, *cols):
+        for col in cols:
+            self._columns.pop(col, None)
+
+    def summary(self) -> str:
+        if not self.computed:
+            return "Профиль столбцов не понадобился"
+        kinds: Dict[str, int] = {}
+        for prof in self._columns.values():
+            kinds[prof.kind] = kinds.get(prof.kind, 0) + 1
+        parts = ", ".join(f"{k}: {n}" for k, n in sorted(kinds.items()))
+        return f"Профиль столбцов: рассчитано {self.computed}, в кэше {len(self._columns)} ({parts})"
@@ -0,0 +1,144 @@
+import os
+import json
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.config import RULES_FILE
+from app.processing import prompts
+
+# Ответы пользователя на вопросы о слиянии и замене. При следующем запуске
+# известная пара решается по сохранённому ответу — без диалога и без
+# подсчёта сходства.
+
+KINDS = {
+    "sheet_merge":  "Объединение листов",
+    "column_merge": "Объединение столбцов",
+    "word_replace": "Замена слова",
+    "word_filter":  "Фильтр слов",
+}
+# Для слияний порядок в паре не важен
+_SYMMETRIC = {"sheet_merge", "column_merge"}
+
+DEFAULT_PATH = os.path.join(os.path.dirname(RULES_FILE), "decisions.json")
+
+def normalize(text) -> str:
+    return " ".join(str(text).split()).lower()
+
+class DecisionStore:
+    # path=None — хранилище только в памяти (на время сеанса)
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[Tuple[str, str, str, str], dict] = {}
+        # Индекс по (вид, правило, первый элемент) для find: ответы по
+        # словам ищутся для каждой ячейки
+        self._by_first: Dict[Tuple[str, str, str], Dict[Tuple[str, str, str, str], dict]] = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for entry in data.get("decisions", []):
+                self._add(self._key(entry["kind"], *entry["pair"], entry.get("rule", "")), entry)
+
+    @classmethod
+    def from_rules(cls, rules: dict) -> Optional["DecisionStore"]:
+        cfg = rules.get("decisions", {})
+        if not cfg.get("enabled", True):
+            return None
+        return cls(cfg.get("path") or DEFAULT_PATH)
+
+    @staticmethod
+    def _key(kind: str, a, b, rule="") -> Tuple[str, str, str, str]:
+        a, b = normalize(a), normalize(b)
+        if kind in _SYMMETRIC and b < a:
+            a, b = b, a
+        return kind, normalize(rule), a, b
+
+    def _add(self, key: Tuple[str, str, str, str], entry: dict):
+        self._entries[key] = entry
+        self._by_first.setdefault(key[:3], {})[key] = entry
+
+    def _drop(self, key: Tuple[str, str, str, str]):
+        if self._entries.pop(key, None) is None:
+            return
+        group = self._by_first[key[:3]]
+        del group[key]
+        if not group:
+            del self._by_first[key[:3]]
+
+    def get(self, kind: str, a, b, rule="") -> Optional[dict]:
+        return self._entries.get(self._key(kind, a, b, rule))
+
+    def find(self, kind: str, a, rule="") -> List[dict]:
+        # Все ответы для первого элемента пары — например, для слова,
+        # когда кандидат на замену ещё не выбран
+        return list(self._by_first.get((kind, normalize(rule), normalize(a)), {}).values())
+
+    def put(self, kind: str, a, b, accepted: bool, value: Optional[str] = None, rule=""):
+        self._add(self._key(kind, a, b, rule), {
+            "kind": kind,
+            "pair": [str(a), str(b)],
+            "rule": str(rule),
+            "accepted": bool(accepted),
+            "value": value,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def entries(self) -> List[dict]:
+        return sorted(self._entries.values(), key=lambda e: (e["kind"], normalize(e["pair"][0])))
+
+    def remove(self, entries: List[dict]):
+        for e in entries:
+            self._drop(self._key(e["kind"], *e["pair"], e.get("rule", "")))
+
+    def clear(self, kind: Optional[str] = None):
+        if kind is None:
+            self._entries.clear()
+            self._by_first.clear()
+        else:
+            for key in [k for k in self._entries if k[0] == kind]:
+                self._drop(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"decisions": self.entries()}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+_store: Optional[DecisionStore] = None
+
+def configure(rules: dict, session: Optional[DecisionStore] = None) -> Optional[DecisionStore]:
+    # session — ответы, данные при предпросмотре, если сохранение
+    # решений в файл отключено
+    global _store
+    # Пустое хранилище — тоже хранилище: в него пишутся первые ответы
+    store = DecisionStore.from_rules(rules)
+    _store = store if store is not None else session
+    return _store
+
+def activate(store: Optional[DecisionStore]):
+    global _store
+    _store = store
+
+def current() -> Optional[DecisionStore]:
+    return _store
+
+def lookup(kind: str, a, b, rule="") -> Optional[dict]:
+    return _store.get(kind, a, b, rule) if _store is not None else None
+
+def find(kind: str, a, rule="") -> List[dict]:
+    return _store.find(kind, a, rule) if _store is not None else []
+
+def record(kind: str, a, b, accepted: bool, value: Optional[str] = None, rule=""):
+    # Запоминаются только ответы из диалогов: решения по политике
+    # accept/reject не должны переживать смену политики
+    if _store is None or prompts.get_policy() != "ask":
+        return
+    _store.put(kind, a, b, accepted, value, rule)
+    _store.save()
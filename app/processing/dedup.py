@@ -0,0 +1,109 @@
+import re
+import hashlib
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Повторы из пересекающихся источников отбрасываются до этапов правил:
+# одинаковые части листа — по хешу исходных значений всей части,
+# повторяющиеся строки — по хешу нормализованных значений ключевых
+# столбцов (все столбцы, если ключ не задан).
+
+_SPACE_RE = re.compile(r"\s+")
+
+def _normalized(s: pd.Series) -> pd.Series:
+    # Текст без различий в регистре и пробелах, числа — как float
+    # (1 и 1.0 из частей с разными типами совпадают)
+    dt = s.dtype
+    if isinstance(dt, pd.CategoricalDtype):
+        cats = _normalized(pd.Series(s.cat.categories, dtype=object)).to_numpy(dtype=object)
+        codes = s.cat.codes.to_numpy()
+        return pd.Series(np.where(codes >= 0, cats[codes], None), index=s.index, dtype=object)
+    if pd.api.types.is_bool_dtype(dt) or pd.api.types.is_datetime64_any_dtype(dt):
+        return s
+    if pd.api.types.is_numeric_dtype(dt):
+        return s.astype("float64")
+    mask = s.notna().to_numpy()
+    out = np.full(len(s), None, dtype=object)
+    text = s[mask].astype(str).str.replace(_SPACE_RE, " ", regex=True).str.strip().str.lower()
+    out[mask] = text.to_numpy(dtype=object)
+    return pd.Series(out, index=s.index, dtype=object)
+
+def row_hashes(df: pd.DataFrame, columns: Optional[list] = None) -> np.ndarray:
+    # Порядок столбцов не влияет на хеш
+    columns = sorted(df.columns if columns is None else columns, key=str)
+    if not columns:
+        return np.zeros(len(df), dtype=np.uint64)
+    frame = pd.DataFrame({str(c): _normalized(df[c]) for c in columns})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+def part_hash(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    columns = sorted(df.columns, key=str)
+    h.update(repr([str(c) for c in columns]).encode("utf-8"))
+    if columns:
+        # Значения без нормализации: части, различающиеся хотя бы
+        # регистром или пробелами, не считаются одинаковыми
+        frame = pd.DataFrame({str(c): df[c] for c in columns})
+        h.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    h.update(str(len(df)).encode("ascii"))
+    return h.hexdigest()
+
+class Deduplicator:
+    def __init__(self, parts: bool = True, rows: bool = True, key_columns: Optional[list] = None):
+        self.parts = parts
+        self.rows = rows
+        self.key_columns = list(key_columns or [])
+
+    @classmethod
+    def from_rules(cls, rules: dict) -> Optional["Deduplicator"]:
+        cfg = rules.get("dedup", {})
+        if not cfg.get("enabled", False):
+            return None
+        return cls(cfg.get("parts", True), cfg.get("rows", True), cfg.get("key_columns"))
+
+    def keys(self, df: pd.DataFrame) -> list:
+        if not self.key_columns:
+            return list(df.columns)
+        return [c for c in self.key_columns if c in df.columns]
+
+    def unique_parts(self, dfs: List[pd.DataFrame]) -> Tuple[List[pd.DataFrame], int]:
+        if not self.parts or len(dfs) < 2:
+            return dfs, 0
+        seen: Set[str] = set()
+        out = []
+        for df in dfs:
+            h = part_hash(df)
+            if h not in seen:
+                seen.add(h)
+                out.append(df)
+        return out, len(dfs) - len(out)
+
+    def duplicated(self, df: pd.DataFrame, seen: Optional[Set[int]] = None) -> np.ndarray:
+        # seen — хеши строк из предыдущих фрагментов (потоковый режим),
+        # пополняется хешами новых строк
+        keys = self.keys(df)
+        if not self.rows or not keys or df.empty:
+            return np.zeros(len(df), dtype=bool)
+        hashes = row_hashes(df, keys)
+        # Строки без значений в ключе не считаются повторами друг друга
+        blank = df[keys].isna().all(axis=1).to_numpy()
+        dup = pd.Series(hashes).duplicated().to_numpy() & ~blank
+        if seen is not None:
+            dup |= np.fromiter((h in seen for h in hashes.tolist()), dtype=bool, count=len(hashes)) & ~blank
+            seen.update(hashes[~blank].tolist())
+        return dup
+
+    def drop_rows(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+        dup = self.duplicated(df)
+        n = int(dup.sum())
+        if n:
+            df = df[~dup].reset_index(drop=True)
+        return df, n
+
+    def describe_keys(self, columns) -> str:
+        if not self.key_columns:
+            return "все столбцы"
+        keys = [c for c in self.key_columns if c in columns]
+        return ", ".join(f"'{c}'" for c in keys) if keys else "нет ключевых столбцов на листе"
@@ -0,0 +1,121 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Экспонента («12E3») и ведущие нули («007») — признак кода, а не числа
+_NUMERIC_RE = re.compile(r"^\s*[-+]?(\d+\.?\d*|\.\d+)\s*$")
+_LEADING_ZERO_RE = re.compile(r"^\s*[-+]?0\d")
+# Excel хранит не больше 15 значащих цифр; длинные номера остаются текстом
+_MAX_DIGITS = 15
+_INT64_MIN, _INT64_MAX = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+
+def _string_dtype():
+    if not HAS_PYARROW:
+        return None
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        return pd.StringDtype("pyarrow")
+
+def _looks_numeric(values: pd.Series) -> bool:
+    sample = values.head(50).tolist()
+    if not all(_NUMERIC_RE.match(v) and not _LEADING_ZERO_RE.match(v) for v in sample):
+        return False
+    text = values.astype(str)
+    if not text.str.match(_NUMERIC_RE.pattern).all() or text.str.match(_LEADING_ZERO_RE.pattern).any():
+        return False
+    digits = text.str.replace(r"\D", "", regex=True).str.lstrip("0").str.len()
+    return bool(digits.max() <= _MAX_DIGITS)
+
+def _to_numeric(s: pd.Series) -> pd.Series:
+    if pd.api.types.infer_dtype(s, skipna=True) == "integer":
+        # Целые вне int64 pandas превращает в uint64 или float с потерей цифр
+        ints = s.dropna()
+        if not ints.empty and (ints.min() < _INT64_MIN or ints.max() > _INT64_MAX):
+            return s
+    out = pd.to_numeric(s)
+    if (
+        out.notna().all() and pd.api.types.is_float_dtype(out) and (out % 1 == 0).all()
+        and out.min() >= _INT64_MIN and out.max() <= _INT64_MAX
+    ):
+        out = out.astype("int64")
+    if pd.api.types.is_integer_dtype(out):
+        out = pd.to_numeric(out, downcast="integer")
+    return out
+
+def compact_column(s: pd.Series, cfg: dict) -> pd.Series:
+    if not (s.dtype == object or isinstance(s.dtype, pd.StringDtype)):
+        return s
+    nonnull = s.dropna()
+    if nonnull.empty:
+        return s
+
+    kind = pd.api.types.infer_dtype(nonnull, skipna=True)
+    if kind in ("integer", "floating", "mixed-integer-float", "decimal"):
+        return _to_numeric(s)
+    if kind in ("datetime", "datetime64", "date"):
+        # Даты вне диапазона datetime64 (например, 9999-12-31) стали бы NaT —
+        # такой столбец остаётся как есть
+        out = pd.to_datetime(s, errors="coerce")
+        return out if out.isna().sum() == s.isna().sum() else s
+    if kind != "string":
+        return s
+
+    if cfg.get("infer_numeric_text", False) and _looks_numeric(nonnull):
+        return _to_numeric(s)
+
+    distinct = nonnull.nunique()
+    if (
+        distinct <= cfg.get("category_max", 5000)
+        and distinct / len(nonnull) <= cfg.get("category_ratio", 0.5)
+    ):
+        return s.astype("category")
+
+    dtype = _string_dtype()
+    if dtype is not None and s.dtype != dtype:
+        return s.astype(dtype)
+    return s
+
+def compact_dtypes(df: pd.DataFrame, cfg: dict, log, name: Optional[str] = None) -> pd.DataFrame:
+    if not cfg.get("enabled", True) or df.empty:
+        return df
+    before = df.memory_usage(deep=True).sum()
+    for pos in range(df.shape[1]):
+        col = df.iloc[:, pos]
+        new = compact_column(col, cfg)
+        if new is not col:
+            df.isetitem(pos, new)
+    after = df.memory_usage(deep=True).sum()
+    label = f" «{name}»" if name else ""
+    log.append(
+        f"Типы данных{label}: {before / 2**20:.2f} МБ → {after / 2**20:.2f} МБ"
+    )
+    return df
+
+def align_categories(dfs: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    if len(dfs) < 2:
+        return dfs
+    cats = {}
+    for df in dfs:
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                cats.setdefault(col, []).append(df[col].cat.categories)
+    for col, parts in cats.items():
+        present = sum(col in df.columns for df in dfs)
+        if len(parts) != present or len(parts) < 2:
+            continue
+        union = parts[0]
+        for other in parts[1:]:
+            union = union.union(other, sort=False)
+        dtype = pd.CategoricalDtype(union)
+        for df in dfs:
+            if col in df.columns:
+                df[col] = df[col].astype(dtype)
+    return dfs
@@ -0,0 +1,103 @@
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MASK32 = np.uint64(0xFFFFFFFF)
+_EMPTY = np.uint64(0xFFFFFFFF + 1)
+_BLOCK = 4096
+
+def _permutations(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    # a, b < 2^31 и x < 2^32: a * x + b не переполняет uint64
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+    return a, b
+
+def _value_hashes(s: pd.Series) -> np.ndarray:
+    s = s.dropna()
+    if s.empty:
+        return np.empty(0, dtype=np.uint64)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype(s.cat.categories.dtype)
+    if pd.api.types.is_bool_dtype(s.dtype) or pd.api.types.is_numeric_dtype(s.dtype):
+        # 5 и 5.0 должны совпадать
+        values = pd.unique(s.astype("float64").to_numpy())
+    elif pd.api.types.is_datetime64_any_dtype(s.dtype):
+        values = pd.unique(s.to_numpy())
+    else:
+        values = pd.unique(s.astype(str).str.strip().str.lower().to_numpy(dtype=object))
+    return pd.util.hash_array(np.asarray(values)) & _MASK32
+
+def signature(s: pd.Series, num_perm: int = 128, seed: int = 1) -> np.ndarray:
+    a, b = _permutations(num_perm, seed)
+    hashes = _value_hashes(s)
+    sig = np.full(num_perm, _EMPTY, dtype=np.uint64)
+    for start in range(0, len(hashes), _BLOCK):
+        x = hashes[start:start + _BLOCK]
+        h = ((np.outer(a, x) + b[:, None]) % _PRIME) & _MASK32
+        np.minimum(sig, h.min(axis=1), out=sig)
+    return sig
+
+def is_empty(sig: np.ndarray) -> bool:
+    return bool(sig[0] == _EMPTY)
+
+def jaccard(sig1: np.ndarray, sig2: np.ndarray) -> Optional[float]:
+    if is_empty(sig1) or is_empty(sig2):
+        return None
+    return float(np.count_nonzero(sig1 == sig2)) / len(sig1)
+
+def union(sig1: np.ndarray, sig2: np.ndarray) -> np.ndarray:
+    # Сигнатура объединения множеств — поэлементный минимум
+    return np.minimum(sig1, sig2)
+
+def lsh_candidates(signatures: Dict[str, np.ndarray], bands: int) -> Set[frozenset]:
+    pairs: Set[frozenset] = set()
+    items = [(k, sig) for k, sig in signatures.items() if not is_empty(sig)]
+    if not items:
+        return pairs
+    num_perm = len(items[0][1])
+    rows = max(1, num_perm // bands)
+    for band in range(0, rows * bands, rows):
+        buckets: Dict[bytes, list] = {}
+        for key, sig in items:
+            buckets.setdefault(sig[band:band + rows].tobytes(), []).append(key)
+        for keys in buckets.values():
+            for i in range(len(keys)):
+                for j in range(i + 1, len(keys)):
+                    pairs.add(frozenset((keys[i], keys[j])))
+    return pairs
+
+class ColumnContent:
+    # Сходство содержимого столбцов по MinHash-сигнатурам всех различных
+    # значений. При включённом LSH пары, не попавшие ни в одну общую корзину,
+    # считаются непохожими без сравнения сигнатур.
+    def __init__(self, df: pd.DataFrame, columns: Iterable[str], cfg: dict):
+        self.num_perm = cfg.get("minhash_perm", 128)
+        self.signatures = {c: signature(df[c], self.num_perm) for c in columns}
+        self.candidates = None
+        if cfg.get("lsh", False):
+            self.candidates = lsh_candidates(self.signatures, cfg.get("lsh_bands", 32))
+
+    def similarity(self, a: str, b: str) -> Optional[float]:
+        if self.candidates is not None and frozenset((a, b)) not in self.candidates:
+            if is_empty(self.signatures[a]) or is_empty(self.signatures[b]):
+                return None
+            return 0.0
+        return jaccard(self.signatures[a], self.signatures[b])
+
+    def merge(self, a: str, b: str, name: str):
+        sig = union(self.signatures.pop(a), self.signatures.pop(b))
+        self.signatures[name] = sig
+        if self.candidates is not None:
+            # Слитый столбец наследует кандидатов обоих исходных
+            renamed = set()
+            for pair in self.candidates:
+                if a in pair or b in pair:
+                    rest = set(pair) - {a, b}
+                    if rest:
+                        renamed.add(frozenset((name, *rest)))
+                else:
+                    renamed.add(pair)
+            self.candidates = renamed
@@ -0,0 +1,74 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.processing import prompts, transformer, decisions
+from app.processing.profiler import RunProfile
+from app.processing.runlog import RunLog
+from app.processing.spill import Part, load_part
+
+_worker: dict = {}
+
+def _init_worker(rules: dict, policy: str, profiling: bool, store: Optional[decisions.DecisionStore]):
+    # Правила и модель загружаются один раз на процесс, а не на каждый лист
+    _worker["rules"] = rules
+    _worker["profiling"] = profiling
+    prompts.set_policy(policy)
+    decisions.activate(store)
+    # Модель нужна только сходству spaCy без таблицы векторов и анализу
+    # содержимого по выборке; tfidf и fuzz обходятся без неё
+    col_cfg = rules["column_rules"]
+    sampled_content = col_cfg.get("use_content", False) and col_cfg.get("content_method", "sample") == "sample"
+    spacy_headers = col_cfg.get("similarity", "spacy") == "spacy" and not transformer.configure(rules)
+    if spacy_headers or sampled_content:
+        transformer.load_model()
+
+def _run_sheet(name: str, merged: Part, col_source: dict):
+    from app.processing.reader import transform_sheet
+
+    rules = _worker["rules"]
+    log = RunLog.from_rules(rules)
+    profile = RunProfile(
+        enabled=_worker["profiling"],
+        trace_memory=False,
+        model_calls=transformer.model_calls
+    )
+    with transformer.copy_on_write():
+        df = transform_sheet(name, load_part(merged), col_source, rules, log, profile)
+    state = log.export()
+    log.close()
+    return df, state, profile.records
+
+def transform_sheets_parallel(
+    jobs: List[Tuple[str, Part, dict]],
+    rules: dict,
+    log: RunLog,
+    profile: RunProfile
+) -> Dict[str, pd.DataFrame]:
+    cfg = rules["parallel"]
+    workers = cfg.get("workers", 0) or os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+    policy = cfg.get("prompt_policy", "reject")
+    log.append(
+        f"Параллельная обработка {len(jobs)} листов, процессов: {workers}, "
+        f"подтверждения: {policy}"
+    )
+
+    result: Dict[str, pd.DataFrame] = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(rules, policy, profile.enabled, decisions.current()),
+    ) as pool:
+        futures = [pool.submit(_run_sheet, name, merged, col_source) for name, merged, col_source in jobs]
+        # Журналы собираются в порядке листов, а не в порядке завершения
+        for (name, _, _), fut in zip(jobs, futures):
+            df, state, records = fut.result()
+            log.merge(state)
+            profile.merge_records(records)
+            result[name] = df
+    return result
@@ -0,0 +1,75 @@
+import copy
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.processing import decisions
+from app.processing.reader import process_files
+from app.processing.runlog import KIND_TITLES
+
+HOW_TITLES = {
+    "auto":       "автоматически",
+    "user":       "подтверждено",
+    "stored":     "сохранённое решение",
+    "dictionary": "по словарю",
+}
+
+@dataclass
+class PreviewReport:
+    rows: int
+    duration_s: float
+    sheets: List[dict] = field(default_factory=list)
+    sheet_merges: List[dict] = field(default_factory=list)
+    column_merges: List[dict] = field(default_factory=list)
+    hits: List[Tuple[str, str, int]] = field(default_factory=list)
+    shapes: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+
+    def lines(self) -> List[str]:
+        out = [f"Предпросмотр по первым {self.rows} строкам листов ({self.duration_s:.1f} с)"]
+        for s in self.sheets:
+            out.append(f"Лист «{s['source']}» ({s['file']}) → «{s['target']}»")
+        for m in self.sheet_merges:
+            out.append(f"Листы '{m['source']}' → '{m['target']}' ({_describe(m)})")
+        for m in self.column_merges:
+            out.append(f"«{m['sheet']}»: {' + '.join(map(str, m['columns']))} → '{m['target']}' ({_describe(m)})")
+        for title, rule, n in self.hits:
+            out.append(f"{title}: {rule} — {n}")
+        return out
+
+def _describe(step: dict) -> str:
+    text = HOW_TITLES.get(step["how"], step["how"])
+    if step.get("score") is not None:
+        text += f", {round(step['score'])}%"
+    return text
+
+def preview_files(
+    paths: List[str],
+    rules: dict,
+    sample_rows: Optional[int] = None,
+    session: Optional[decisions.DecisionStore] = None
+) -> PreviewReport:
+    # Весь конвейер правил на первых строках листов. Ответы на вопросы
+    # попадают в хранилище решений (или в session, если оно отключено)
+    # и используются при полном объединении.
+    rules = copy.deepcopy(rules)
+    rules["parallel"]["enabled"] = False
+    rules["spill"]["enabled"] = False
+    rows = sample_rows or rules["preview"].get("rows", 200)
+
+    t0 = time.perf_counter()
+    result, log = process_files(paths, rules, sample_rows=rows, session=session)
+    report = PreviewReport(rows=rows, duration_s=time.perf_counter() - t0)
+    for step in log.plan:
+        if step["kind"] == "sheet":
+            report.sheets.append(step)
+        elif step["kind"] == "sheet_merge":
+            report.sheet_merges.append(step)
+        elif step["kind"] == "column_merge":
+            report.column_merges.append(step)
+    report.hits = [
+        (KIND_TITLES.get(kind, kind), rule, n)
+        for (kind, rule), n in sorted(log.counters.items())
+    ]
+    report.shapes = {name: df.shape for name, df in result.items()}
+    log.close()
+    return report
@@ -0,0 +1,144 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+def _shape(df) -> dict:
+    if not isinstance(df, pd.DataFrame):
+        return {"rows": None, "cols": None, "cells": None}
+    rows, cols = df.shape
+    return {"rows": rows, "cols": cols, "cells": rows * cols}
+
+class _Stage:
+    def __init__(self, record: dict):
+        self.record = record
+
+    def output(self, df):
+        shape = _shape(df)
+        self.record["rows_out"] = shape["rows"]
+        self.record["cols_out"] = shape["cols"]
+        self.record["cells_out"] = shape["cells"]
+
+class RunProfile:
+    def __init__(
+        self,
+        enabled: bool = True,
+        trace_memory: bool = False,
+        model_calls: Optional[Callable[[], int]] = None
+    ):
+        self.enabled = enabled
+        self.trace_memory = trace_memory and hasattr(tracemalloc, "reset_peak")
+        self.model_calls = model_calls or (lambda: 0)
+        self.records: List[dict] = []
+        self._stack: List[dict] = []
+        self._own_tracing = False
+
+    @classmethod
+    def from_rules(cls, rules: dict, model_calls: Optional[Callable[[], int]] = None):
+        cfg = rules.get("profiling", {})
+        return cls(
+            enabled=cfg.get("enabled", True),
+            trace_memory=cfg.get("trace_memory", False),
+            model_calls=model_calls
+        )
+
+    def start(self):
+        if self.enabled and self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+
+    def stop(self):
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+
+    def _update_peaks(self, record: Optional[dict] = None):
+        if not self.trace_memory or not tracemalloc.is_tracing():
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        targets = self._stack + ([record] if record is not None else [])
+        for rec in targets:
+            rec["peak_mem_bytes"] = max(rec["peak_mem_bytes"] or 0, peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name: str, df_in=None, file: Optional[str] = None, sheet: Optional[str] = None):
+        if not self.enabled:
+            yield _Stage({})
+            return
+
+        shape = _shape(df_in)
+        record = {
+            "stage": name,
+            "file": file,
+            "sheet": sheet,
+            "depth": len(self._stack),
+            "wall_s": 0.0,
+            "cpu_s": 0.0,
+            "rows_in": shape["rows"],
+            "cols_in": shape["cols"],
+            "cells_in": shape["cells"],
+            "rows_out": None,
+            "cols_out": None,
+            "cells_out": None,
+            "peak_mem_bytes": None,
+            "model_calls": 0,
+        }
+        self.records.append(record)
+        self._update_peaks()
+        self._stack.append(record)
+
+        t0, c0, m0 = time.perf_counter(), time.process_time(), self.model_calls()
+        try:
+            yield _Stage(record)
+        finally:
+            record["wall_s"] = round(time.perf_counter() - t0, 6)
+            record["cpu_s"] = round(time.process_time() - c0, 6)
+            record["model_calls"] = self.model_calls() - m0
+            self._stack.pop()
+            self._update_peaks(record)
+
+    def run(self, name: str, fn, df, *args, file: Optional[str] = None, sheet: Optional[str] = None, **kwargs):
+        with self.stage(name, df, file=file, sheet=sheet) as st:
+            out = fn(df, *args, **kwargs)
+            st.output(out)
+        return out
+
+    def merge_records(self, records: List[dict]):
+        # Записи этапов из дочернего процесса вкладываются в текущий этап
+        depth = len(self._stack)
+        for rec in records:
+            self.records.append(dict(rec, depth=rec["depth"] + depth))
+
+    def summary_lines(self) -> List[str]:
+        if not self.records:
+            return []
+        header = (
+            f"{'Этап':<32} {'Файл / лист':<30} {'Время, с':>9} {'CPU, с':>9} "
+            f"{'Строк вх→вых':>19} {'Пик, МБ':>9} {'Модель':>7}"
+        )
+        lines = ["Профиль выполнения:", header, "-" * len(header)]
+        for rec in self.records:
+            where = " / ".join(str(x) for x in (rec["file"], rec["sheet"]) if x)
+            rows = f"{rec['rows_in'] if rec['rows_in'] is not None else '-'}→" \
+                   f"{rec['rows_out'] if rec['rows_out'] is not None else '-'}"
+            peak = "-" if rec["peak_mem_bytes"] is None else f"{rec['peak_mem_bytes'] / 2**20:.1f}"
+            stage = "  " * rec["depth"] + rec["stage"]
+            lines.append(
+                f"{stage[:32]:<32} {where[:30]:<30} {rec['wall_s']:>9.3f} {rec['cpu_s']:>9.3f} "
+                f"{rows:>19} {peak:>9} {rec['model_calls']:>7}"
+            )
+        return lines
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_memory": self.trace_memory,
+            "records": self.records,
+        }
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
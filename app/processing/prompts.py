@@ -0,0 +1,59 @@
+from typing import Optional
+from PySide6 import QtWidgets
+
+# ask    — показывать диалоги (обычный режим);
+# accept — принимать предложенный вариант без вопроса;
+# reject — отклонять предложенный вариант без вопроса.
+POLICIES = ("ask", "accept", "reject")
+
+_policy = "ask"
+
+def set_policy(policy: str):
+    global _policy
+    if policy not in POLICIES:
+        raise ValueError(f"Неизвестная политика подтверждений: {policy}")
+    _policy = policy
+
+def get_policy() -> str:
+    return _policy
+
+def _auto(question: str, accepted: bool, log) -> bool:
+    if log is not None:
+        log.event("auto_decision", f"{question} — {'да' if accepted else 'нет'}")
+    return accepted
+
+def ask_yes_no(title: str, question: str, log=None) -> bool:
+    if _policy != "ask":
+        return _auto(question, _policy == "accept", log)
+    reply = QtWidgets.QMessageBox.question(
+        None, title, question,
+        QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+        QtWidgets.QMessageBox.Yes
+    )
+    return reply == QtWidgets.QMessageBox.Yes
+
+def ask_name(title: str, question: str, label: str, default: str, log=None) -> Optional[str]:
+    if _policy != "ask":
+        return default if _auto(question, _policy == "accept", log) else None
+
+    dlg = QtWidgets.QDialog()
+    dlg.setWindowTitle(title)
+    form = QtWidgets.QFormLayout(dlg)
+
+    chk = QtWidgets.QCheckBox(question)
+    chk.setChecked(True)
+    form.addRow(chk)
+
+    name_edit = QtWidgets.QLineEdit(default)
+    form.addRow(label, name_edit)
+
+    bb = QtWidgets.QDialogButtonBox(
+        QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
+    )
+    bb.accepted.connect(dlg.accept)
+    bb.rejected.connect(dlg.reject)
+    form.addRow(bb)
+
+    if dlg.exec() == QtWidgets.QDialog.Accepted and chk.isChecked():
+        return name_edit.text().strip() or default
+    return None
@@ -1,124 +1,287 @@
 import os
 import re
 import pandas as pd
-from openpyxl import load_workbook
 from rapidfuzz import fuzz
-from PySide6 import QtWidgets
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Optional
 from app.config import load_rules
+from app.processing import transformer
 from app.processing.transformer import (
     apply_word_replace,
     apply_word_filter,
     extract_units_to_headers,
     apply_column_rules,
     apply_unit_conversions,
+    apply_column_mapping,
+    dictionary_column_map,
+    copy_on_write,
 )
+from app.processing.profiler import RunProfile
+from app.processing.runlog import RunLog
+from app.processing.dtypes import compact_dtypes, align_categories
+from app.processing.backends import open_backend
+from app.processing import prompts, decisions
+from app.processing.parallel import transform_sheets_parallel
+from app.processing.spill import SpillStore, Part, load_part
+from app.processing.colprofile import SheetProfile
+from app.processing.dedup import Deduplicator
 
 def process_files(
     paths: List[str],
-    rules: dict
-) -> Tuple[Dict[str, pd.DataFrame], List[str]]:
-    log: List[str] = []
-    all_sheets: Dict[str, List[pd.DataFrame]] = {}
-    moved_sheets: Dict[str, List[pd.DataFrame]] = {}
-
-    for p in paths:
-        engine = 'xlrd' if p.lower().endswith('.xls') else None
-        log.append(f"Чтение файла {os.path.basename(p)}")
-        sheets = pd.read_excel(p, sheet_name=None, header=None, engine=engine)
-        wb = load_workbook(p, data_only=True)
-
-        for sh, raw in sheets.items():
-            ws = wb[sh]
-            df = _detect_and_fix_header(raw, ws, rules, log)
-            df = _remove_duplicate_header_rows(df)
-            new_name = _map_sheet_name(sh, rules, log)
-            log.append(f"Лист «{sh}» → «{new_name}»")
-
-            if rules["column_word_filter"].get("enabled", True):
-                core, tails = _split_rows_by_keywords(
-                    df,
-                    rules["column_word_filter"]["rules"],
-                    log
-                )
-            else:
-                core, tails = df, {}
-
-            all_sheets.setdefault(new_name, []).append(core)
-            for suffix, tail_df in tails.items():
-                key = f"{new_name}_{suffix}"
-                moved_sheets.setdefault(key, []).append(tail_df)
-
-    sheet_cfg = rules["sheet_rules"]
-    if sheet_cfg.get("enabled", True):
-        clustered: Dict[str, List[pd.DataFrame]] = {}
-        used = set()
-        threshold = sheet_cfg.get("threshold", 90)
-        auto_merge = sheet_cfg.get("auto_merge", True)
-
-        for name, dfs in list(all_sheets.items()):
-            if name in used:
-                continue
-            used.add(name)
-            group = dfs[:]
-            for other, other_dfs in list(all_sheets.items()):
-                if other in used:
-                    continue
-                score = fuzz.token_set_ratio(name.lower(), other.lower())
-                if score >= threshold:
-                    if auto_merge:
-                        log.append(f"FuzzyWuzzy: объединение '{other}' → '{name}' ({round(score)}%)")
-                        group.extend(other_dfs)
-                        used.add(other)
-                    else:
-                        ans = QtWidgets.QMessageBox.question(
-                            None,
-                            "Объединить листы?",
-                            f"Объединить листы '{other}' → '{name}' ({score}%)?",
-                            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
-                            QtWidgets.QMessageBox.Yes
-                        )
-                        if ans == QtWidgets.QMessageBox.Yes:
-                            log.append(f"Пользователь подтвердил слияние '{other}' → '{name}'")
-                            group.extend(other_dfs)
-                            used.add(other)
-            clustered[name] = group
-        all_sheets = clustered
-
-    result: Dict[str, pd.DataFrame] = {}
-    for name, dfs in all_sheets.items():
-        if len(dfs) > 1:
-            log.append(f"Объединение {len(dfs)} частей листа «{name}»")
-        dfs = [__ensure_unique_columns(df) for df in dfs]
-        merged = pd.concat(dfs, ignore_index=True, sort=False)
-
-        col_source = {}
-        for idx, df in enumerate(dfs):
-            for col in df.columns:
-                col_source.setdefault(col, idx)
+    rules: dict,
+    profile: Optional[RunProfile] = None,
+    sample_rows: Optional[int] = None,
+    session: Optional[decisions.DecisionStore] = None,
+    log_path: Optional[str] = None
+) -> Tuple[Dict[str, pd.DataFrame], RunLog]:
+    # sample_rows — предпросмотр: читаются только первые строки каждого листа;
+    # log_path — файл, в который лог пишется по ходу обработки
+    log = RunLog.from_rules(rules, log_path)
+    spill = SpillStore.from_rules(rules, log)
+    try:
+        try:
+            with copy_on_write():
+                result = _process_files(paths, rules, log, spill, profile, sample_rows, session)
+        finally:
+            # Ошибка удаления временной папки попадает в лог до его закрытия
+            spill.close()
+    except BaseException:
+        log.close()
+        raise
+    return result, log
+
+def _process_files(
+    paths: List[str],
+    rules: dict,
+    log: RunLog,
+    spill: SpillStore,
+    profile: Optional[RunProfile],
+    sample_rows: Optional[int],
+    session: Optional[decisions.DecisionStore]
+) -> Dict[str, pd.DataFrame]:
+    if transformer.configure(rules):
+        log.append(f"Сходство заголовков: таблица векторов {rules['vectors']['path']}")
+    store = decisions.configure(rules, session)
+    if store is not None:
+        log.append(f"Сохранённых решений: {len(store)} ({store.path or 'в памяти'})")
+    if sample_rows:
+        log.append(f"Предпросмотр: первые {sample_rows} строк каждого листа")
+    dedup = Deduplicator.from_rules(rules)
+    all_sheets: Dict[str, List[Part]] = {}
+    moved_sheets: Dict[str, List[Part]] = {}
+    if profile is None:
+        profile = RunProfile(enabled=False)
+    profile.start()
+
+    with profile.stage("process_files"):
+        for p in paths:
+            fname = os.path.basename(p)
+            with profile.stage("file", file=fname):
+                backend = open_backend(p, rules["reader"])
+                log.append(f"Чтение файла {fname} ({backend.name})")
+
+                for sh in backend.sheet_names():
+                    with profile.stage("sheet", file=fname, sheet=sh) as sheet_st:
+                        with profile.stage("read", file=fname, sheet=sh) as st:
+                            raw = backend.read_sheet(sh, sample_rows)
+                            ws = backend.header_view(sh, raw, sample_rows)
+                            st.output(raw)
+                        trimmed = backend.trim[sh].describe()
+                        if trimmed:
+                            log.append(f"Лист «{sh}» ({fname}): {trimmed}")
+                        df = profile.run("detect_header", _detect_and_fix_header, raw, ws, rules, log,
+                                         file=fname, sheet=sh)
+                        df = profile.run("remove_duplicate_headers", _remove_duplicate_header_rows, df,
+                                         file=fname, sheet=sh)
+                        df = profile.run("compact_dtypes", compact_dtypes, df, rules["dtypes"], log,
+                                         f"{fname} / {sh}", file=fname, sheet=sh)
+                        new_name = _map_sheet_name(sh, rules, log)
+                        log.append(f"Лист «{sh}» → «{new_name}»")
+                        log.plan_step("sheet", file=fname, source=sh, target=new_name)
+
+                        if rules["column_word_filter"].get("enabled", True):
+                            with profile.stage("split_rows_by_keywords", df, file=fname, sheet=sh) as st:
+                                core, tails = _split_rows_by_keywords(
+                                    df,
+                                    rules["column_word_filter"]["rules"],
+                                    log
+                                )
+                                st.output(core)
+                        else:
+                            core, tails = df, {}
+                        sheet_st.output(core)
+
+                    all_sheets.setdefault(new_name, []).append(spill.put(core))
+                    for suffix, tail_df in tails.items():
+                        key = f"{new_name}_{suffix}"
+                        moved_sheets.setdefault(key, []).append(spill.put(tail_df))
+                backend.close()
+
+        sheet_cfg = rules["sheet_rules"]
+        if sheet_cfg.get("enabled", True):
+            with profile.stage("sheet_clustering"):
+                all_sheets = _cluster_sheets(all_sheets, sheet_cfg, log)
+
+        jobs = []
+        for name in list(all_sheets):
+            parts = all_sheets.pop(name)
+            log.sheet = name
+            if len(parts) > 1:
+                log.append(f"Объединение {len(parts)} частей листа «{name}»")
+            dfs = [__ensure_unique_columns(load_part(part)) for part in parts]
+            if rules["column_rules"].get("enabled", True):
+                with profile.stage("column_mapping", sheet=name):
+                    dfs = _map_part_columns(dfs, rules["column_rules"], log)
+            if dedup:
+                with profile.stage("dedup_parts", sheet=name):
+                    dfs, skipped = dedup.unique_parts(dfs)
+                if skipped:
+                    log.append(f"Лист «{name}»: пропущено одинаковых частей: {skipped}")
+            dfs = align_categories(dfs)
+
+            # Итоговая схема известна до concat: первое вхождение столбца
+            # задаёт и его позицию, и часть-источник для apply_column_rules
+            col_source = {}
+            for idx, df in enumerate(dfs):
+                for col in df.columns:
+                    col_source.setdefault(col, idx)
+            with profile.stage("concat", sheet=name) as st:
+                merged = pd.concat(dfs, ignore_index=True, sort=False)
+                st.output(merged)
+            if dedup:
+                with profile.stage("dedup_rows", merged, sheet=name) as st:
+                    merged, dropped = dedup.drop_rows(merged)
+                    st.output(merged)
+                if dropped:
+                    log.append(
+                        f"Лист «{name}»: удалено повторяющихся строк: {dropped} "
+                        f"(ключ: {dedup.describe_keys(merged.columns)})"
+                    )
+            for part in parts:
+                spill.release(part)
+            del parts, dfs
+            jobs.append((name, spill.put(merged), col_source))
+            del merged
+
+        par_cfg = rules["parallel"]
+        if par_cfg.get("enabled", False) and len(jobs) > 1 and not sample_rows:
+            with profile.stage("parallel_sheets"):
+                result = transform_sheets_parallel(jobs, rules, log, profile)
+        else:
+            result: Dict[str, pd.DataFrame] = {}
+            for name, merged, col_source in jobs:
+                spill.release(merged)
+                result[name] = transform_sheet(name, load_part(merged), col_source, rules, log, profile)
+
+        log.sheet = None
+        for sheet_name, tails in moved_sheets.items():
+            log.append(f"Перенесены строки в лист «{sheet_name}»")
+            result[sheet_name] = pd.concat([load_part(t) for t in tails], ignore_index=True, sort=False)
+
+    spill_line = spill.summary_line()
+    if spill_line:
+        log.append(spill_line)
+    profile.stop()
+    log.extend(profile.summary_lines())
+    return result
+
+def _map_part_columns(dfs: List[pd.DataFrame], cfg: dict, log: RunLog) -> List[pd.DataFrame]:
+    columns = list(dict.fromkeys(c for df in dfs for c in df.columns))
+    mapping = dictionary_column_map(columns, cfg)
+    merged_names: Dict[str, list] = {}
+    for src, target in mapping.items():
+        merged_names.setdefault(target, []).append(src)
+    for target, names in merged_names.items():
+        log.append(f"Словарно объединены {names} → '{target}'")
+        log.plan_step("column_merge", columns=names, target=target, score=None, how="dictionary")
+    return [__ensure_unique_columns(apply_column_mapping(df, mapping)) for df in dfs]
+
+def transform_sheet(
+    name: str,
+    merged: pd.DataFrame,
+    col_source: dict,
+    rules: dict,
+    log: RunLog,
+    profile: RunProfile
+) -> pd.DataFrame:
+    log.sheet = name
+    with profile.stage("merged_sheet", merged, sheet=name) as sheet_st:
+        # Этапы берут из общего профиля типы столбцов, найденные единицы
+        # и строковые выборки; столбец просматривается при первом запросе
+        sp = SheetProfile()
 
         if rules["word_replace"].get("enabled", True):
-            merged = apply_word_replace(merged, rules["word_replace"], log)
+            merged = profile.run("word_replace", apply_word_replace, merged,
+                                 rules["word_replace"], log, sheet=name, sheet_profile=sp, inplace=True)
 
         if rules["word_filter"].get("enabled", True):
-            merged = apply_word_filter(merged, rules["word_filter"], log)
+            merged = profile.run("word_filter", apply_word_filter, merged,
+                                 rules["word_filter"], log, sheet=name, sheet_profile=sp, inplace=True)
 
-        merged = extract_units_to_headers(merged, rules, log)
+        merged = profile.run("extract_units", extract_units_to_headers, merged,
+                             rules, log, sheet=name, sheet_profile=sp, inplace=True)
 
         if rules["column_rules"].get("enabled", True):
-            merged = apply_column_rules(merged, rules["column_rules"], log, col_source)
+            merged = profile.run("column_rules", apply_column_rules, merged,
+                                 rules["column_rules"], log, col_source, sheet=name, sheet_profile=sp,
+                                 inplace=True)
 
         if rules["unit_rules"].get("enabled", True):
-            merged = apply_unit_conversions(merged, rules["unit_rules"], log)
+            merged = profile.run("unit_conversions", apply_unit_conversions, merged,
+                                 rules["unit_rules"], log, sheet=name, sheet_profile=sp, inplace=True)
 
         merged = merged.dropna(how="all").reset_index(drop=True)
-        result[name] = merged
-
-    for sheet_name, tails in moved_sheets.items():
-        log.append(f"Перенесены строки в лист «{sheet_name}»")
-        result[sheet_name] = pd.concat(tails, ignore_index=True, sort=False)
-
-    return result, log
+        sheet_st.output(merged)
+    log.append(f"Лист «{name}»: {sp.summary()}")
+    log.sheet = None
+    return merged
+
+def _cluster_sheets(
+    all_sheets: Dict[str, List[pd.DataFrame]],
+    sheet_cfg: dict,
+    log: RunLog
+) -> Dict[str, List[pd.DataFrame]]:
+    clustered: Dict[str, List[pd.DataFrame]] = {}
+    used = set()
+    threshold = sheet_cfg.get("threshold", 90)
+    auto_merge = sheet_cfg.get("auto_merge", True)
+
+    for name, dfs in list(all_sheets.items()):
+        if name in used:
+            continue
+        used.add(name)
+        group = dfs[:]
+        for other, other_dfs in list(all_sheets.items()):
+            if other in used:
+                continue
+            known = None if auto_merge else decisions.lookup("sheet_merge", name, other)
+            if known is not None:
+                if known["accepted"]:
+                    log.event("stored_decision", f"листы '{other}' → '{name}'")
+                    log.plan_step("sheet_merge", source=other, target=name, score=None, how="stored")
+                    group.extend(other_dfs)
+                    used.add(other)
+                continue
+            score = fuzz.token_set_ratio(name.lower(), other.lower())
+            if score >= threshold:
+                if auto_merge:
+                    log.append(f"FuzzyWuzzy: объединение '{other}' → '{name}' ({round(score)}%)")
+                    log.plan_step("sheet_merge", source=other, target=name, score=score, how="auto")
+                    group.extend(other_dfs)
+                    used.add(other)
+                else:
+                    accepted = prompts.ask_yes_no(
+                        "Объединить листы?",
+                        f"Объединить листы '{other}' → '{name}' ({score}%)?",
+                        log
+                    )
+                    decisions.record("sheet_merge", name, other, accepted)
+                    if accepted:
+                        log.append(f"Пользователь подтвердил слияние '{other}' → '{name}'")
+                        log.plan_step("sheet_merge", source=other, target=name, score=score, how="user")
+                        group.extend(other_dfs)
+                        used.add(other)
+        clustered[name] = group
+    return clustered
 
 def __ensure_unique_columns(df: pd.DataFrame) -> pd.DataFrame:
     cols = df.columns.tolist()
@@ -137,33 +300,32 @@ def __ensure_unique_columns(df: pd.DataFrame) -> pd.DataFrame:
 def _split_rows_by_keywords(
     df: pd.DataFrame,
     rules: List[dict],
-    log: List[str]
+    log: RunLog
 ) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
-    main_df = df.copy().reset_index(drop=True)
+    main_df = df
     moved: Dict[str, pd.DataFrame] = {}
 
     for rule in rules:
         word = rule["word"].strip()
         delete_row = bool(rule.get("delete_row", False))
-        mask = main_df.apply(
-            lambda row: row.astype(str)
-                .str.contains(rf"\b{re.escape(word)}\b", case=False, regex=True)
-                .any(),
-            axis=1
-        )
-        if not mask.any():
+        word_re = re.compile(rf"\b{re.escape(word)}\b", re.IGNORECASE)
+        first_idx = None
+        for col_pos in range(main_df.shape[1]):
+            values = main_df.iloc[:first_idx, col_pos].tolist()
+            for idx, v in enumerate(values):
+                if word_re.search(str(v)):
+                    first_idx = idx
+                    break
+        if first_idx is None:
             continue
 
-        first_idx = int(mask.idxmax())
-        if delete_row:
-            main_df = main_df.iloc[:first_idx].reset_index(drop=True)
-        else:
+        if not delete_row:
             moved[word] = main_df.iloc[first_idx:].reset_index(drop=True)
-            main_df = main_df.iloc[:first_idx].reset_index(drop=True)
+        main_df = main_df.iloc[:first_idx]
 
     return main_df, moved
 
-def _detect_and_fix_header(raw: pd.DataFrame, ws, rules: dict, log: List[str]) -> pd.DataFrame:
+def _detect_and_fix_header(raw: pd.DataFrame, ws, rules: dict, log: RunLog) -> pd.DataFrame:
     def get_merged_value(ws, row: int, col: int):
         cell = ws.cell(row=row, column=col)
         if cell.value is not None:
@@ -275,7 +437,7 @@ def _remove_duplicate_header_rows(df: pd.DataFrame) -> pd.DataFrame:
     )
     return df.loc[~mask].reset_index(drop=True)
 
-def _map_sheet_name(name: str, rules: dict, log: List[str]) -> str:
+def _map_sheet_name(name: str, rules: dict, log: RunLog) -> str:
     cfg = rules["sheet_rules"]
     lname = name.strip().lower()
 
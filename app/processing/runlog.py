@@ -0,0 +1,188 @@
+import os
+import tempfile
+from itertools import islice
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+KIND_TITLES = {
+    "word_replace":            "Замена слов",
+    "word_replace_fuzzy":      "Замена слов (fuzzy)",
+    "word_filter_cell":        "Фильтр слов: очищены ячейки",
+    "word_filter_row":         "Фильтр слов: удалены строки",
+    "word_filter_cell_fuzzy":  "Фильтр слов (fuzzy): очищены ячейки",
+    "word_filter_row_fuzzy":   "Фильтр слов (fuzzy): удалены строки",
+    "auto_decision":           "Решение без подтверждения",
+    "stored_decision":         "Сохранённое решение",
+}
+
+@dataclass
+class LogEvent:
+    kind: str
+    rule: str
+    sheet: Optional[str] = None
+    column: Optional[str] = None
+    row: Optional[int] = None
+    score: Optional[float] = None
+
+    def describe(self) -> str:
+        where = []
+        if self.row is not None:
+            where.append(str(self.row))
+        if self.column is not None:
+            where.append(f"'{self.column}'")
+        text = f"{KIND_TITLES.get(self.kind, self.kind)}: {self.rule}"
+        if where:
+            text += f" в [{','.join(where)}]"
+        if self.sheet:
+            text += f" (лист «{self.sheet}»)"
+        if self.score is not None:
+            text += f" ({round(self.score)}%)"
+        return text
+
+class RunLog:
+    def __init__(self, path: Optional[str] = None, max_examples: int = 20):
+        self.max_examples = max_examples
+        self.sheet: Optional[str] = None
+        self.counters: Dict[Tuple[str, str], int] = {}
+        # (лист, столбец, вид) — для просмотра результата по столбцам
+        self.column_counters: Dict[Tuple[Optional[str], Optional[str], str], int] = {}
+        self.examples: Dict[Tuple[str, str], List[LogEvent]] = {}
+        # Номера строк лога с примерами — merge применяет к ним общий лимит
+        self._example_lines: Dict[int, Tuple[str, str]] = {}
+        # Принятые решения о листах и столбцах — для предпросмотра
+        self.plan: List[dict] = []
+        self._lines = 0
+        # Позиция, с которой в файле записаны итоги (см. save)
+        self._summary_at: Optional[int] = None
+        if path:
+            # Строки попадают в файл лога по мере поступления
+            self._stream = open(path, 'w+', encoding='utf-8', buffering=1)
+            self.path = path
+        else:
+            # Путь результата ещё не известен (окно сохранения) — лог копится
+            # во временном файле и копируется в save
+            self._stream = tempfile.TemporaryFile('w+', encoding='utf-8')
+            self.path = None
+
+    @classmethod
+    def from_rules(cls, rules: dict, path: Optional[str] = None) -> "RunLog":
+        cfg = rules.get("logging", {})
+        return cls(path=path, max_examples=cfg.get("max_examples", 20))
+
+    def append(self, message: str):
+        if self._summary_at is not None:
+            # Итоги устарели — save запишет их заново в конец
+            self._stream.seek(self._summary_at)
+            self._stream.truncate()
+            self._summary_at = None
+        self._stream.write(message.replace("\n", " ") + "\n")
+        self._lines += 1
+
+    def extend(self, messages):
+        for m in messages:
+            self.append(m)
+
+    def event(
+        self,
+        kind: str,
+        rule: str,
+        column: Optional[str] = None,
+        row: Optional[int] = None,
+        score: Optional[float] = None,
+        count: int = 1
+    ):
+        key = (kind, rule)
+        self.counters[key] = self.counters.get(key, 0) + count
+        ckey = (self.sheet, column, kind)
+        self.column_counters[ckey] = self.column_counters.get(ckey, 0) + count
+
+        samples = self.examples.setdefault(key, [])
+        if len(samples) < self.max_examples:
+            ev = LogEvent(kind, rule, self.sheet, column, row, score)
+            samples.append(ev)
+            self._example_lines[self._lines] = key
+            self.append(ev.describe())
+
+    def plan_step(self, kind: str, **info):
+        self.plan.append({"kind": kind, "sheet": self.sheet, **info})
+
+    def export(self) -> dict:
+        return {
+            "lines": list(self),
+            "plan": self.plan,
+            "counters": self.counters,
+            "column_counters": self.column_counters,
+            "examples": self.examples,
+            "example_lines": self._example_lines,
+        }
+
+    def merge(self, state: dict):
+        # Добавляет журнал, собранный в другом процессе (см. export).
+        # Лимит примеров в процессе свой, поэтому строки примеров сверх
+        # общего лимита max_examples отбрасываются здесь
+        taken: Dict[Tuple[str, str], int] = {}
+        for i, line in enumerate(state["lines"]):
+            key = state["example_lines"].get(i)
+            if key is not None:
+                n = taken[key] = taken.get(key, 0) + 1
+                samples = self.examples.setdefault(key, [])
+                if len(samples) >= self.max_examples:
+                    continue
+                samples.append(state["examples"][key][n - 1])
+                self._example_lines[self._lines] = key
+            self.append(line)
+        self.plan.extend(state["plan"])
+        for key, n in state["counters"].items():
+            self.counters[key] = self.counters.get(key, 0) + n
+        for key, n in state["column_counters"].items():
+            self.column_counters[key] = self.column_counters.get(key, 0) + n
+
+    def summary_lines(self) -> List[str]:
+        if not self.counters:
+            return []
+        lines = ["Итоги по правилам:"]
+        for (kind, rule), n in sorted(self.counters.items()):
+            shown = len(self.examples.get((kind, rule), []))
+            line = f"  {KIND_TITLES.get(kind, kind)}: {rule} — {n}"
+            if n > shown:
+                line += f" (в логе показано примеров: {shown})"
+            lines.append(line)
+        return lines
+
+    def __iter__(self) -> Iterator[str]:
+        # Только строки лога, без записанных save итогов
+        self._stream.flush()
+        self._stream.seek(0)
+        for line in islice(self._stream, self._lines):
+            yield line.rstrip("\n")
+        self._stream.seek(0, os.SEEK_END)
+
+    def __len__(self) -> int:
+        return self._lines
+
+    def save(self, path: str):
+        # Повторный вызов не дублирует итоги
+        self._stream.flush()
+        if self.path and os.path.abspath(self.path) == os.path.abspath(path):
+            if self._summary_at is None:
+                self._stream.seek(0, os.SEEK_END)
+                self._summary_at = self._stream.tell()
+                for line in self.summary_lines():
+                    self._stream.write(line + "\n")
+                self._stream.flush()
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in self:
+                f.write(line + "\n")
+            for line in self.summary_lines():
+                f.write(line + "\n")
+
+    def close(self):
+        if not self._stream.closed:
+            self._stream.close()
+
+    def __enter__(self) -> "RunLog":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,104 @@
+import math
+from typing import Dict, Iterable
+
+from rapidfuzz import fuzz
+
+METHODS = {
+    "spacy": "Модель spaCy (векторы)",
+    "tfidf": "Символьные n-граммы (TF-IDF)",
+    "fuzz":  "RapidFuzz (ratio)",
+}
+
+def _ngrams(text: str, n_min: int = 2, n_max: int = 4) -> Dict[str, int]:
+    grams: Dict[str, int] = {}
+    for word in text.lower().split():
+        word = f" {word} "
+        for n in range(n_min, n_max + 1):
+            for i in range(len(word) - n + 1):
+                g = word[i:i + n]
+                grams[g] = grams.get(g, 0) + 1
+    return grams
+
+class TfidfScorer:
+    # Косинус TF-IDF по символьным n-граммам; idf считается по заголовкам
+    # текущего листа (prepare), неизвестные n-граммы получают максимальный вес
+    def __init__(self):
+        self._idf: Dict[str, float] = {}
+        self._default_idf = 1.0
+        self._cache: Dict[str, tuple] = {}
+
+    def prepare(self, headers: Iterable[str]):
+        docs = [_ngrams(str(h)) for h in headers]
+        n = len(docs)
+        df: Dict[str, int] = {}
+        for grams in docs:
+            for g in grams:
+                df[g] = df.get(g, 0) + 1
+        self._idf = {g: math.log((1 + n) / (1 + c)) + 1 for g, c in df.items()}
+        self._default_idf = math.log(1 + n) + 1
+        self._cache.clear()
+
+    def _vector(self, text: str) -> tuple:
+        if text not in self._cache:
+            vec = {g: tf * self._idf.get(g, self._default_idf) for g, tf in _ngrams(text).items()}
+            norm = math.sqrt(sum(w * w for w in vec.values()))
+            self._cache[text] = (vec, norm)
+        return self._cache[text]
+
+    def score(self, a: str, b: str) -> float:
+        va, na = self._vector(str(a))
+        vb, nb = self._vector(str(b))
+        if not na or not nb:
+            return 0.0
+        if len(va) > len(vb):
+            va, vb = vb, va
+        return sum(w * vb.get(g, 0.0) for g, w in va.items()) / (na * nb)
+
+class HeaderScorer:
+    def __init__(self, method: str = "spacy", cascade: bool = False, cascade_margin: int = 30, threshold: int = 80):
+        if method not in METHODS:
+            raise ValueError(f"Неизвестный метод сходства заголовков: {method}")
+        self.method = method
+        self.cascade = cascade and method == "spacy"
+        self.cascade_margin = cascade_margin
+        self.threshold = threshold
+        self.tfidf = TfidfScorer()
+        self.pairs = 0
+        self.model_pairs = 0
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> "HeaderScorer":
+        return cls(
+            method=cfg.get("similarity", "spacy"),
+            cascade=cfg.get("cascade", False),
+            cascade_margin=cfg.get("cascade_margin", 30),
+            threshold=cfg.get("threshold", 80)
+        )
+
+    def prepare(self, headers: Iterable[str]):
+        self.tfidf.prepare(headers)
+
+    def score(self, a: str, b: str) -> float:
+        self.pairs += 1
+        if self.method == "fuzz":
+            return fuzz.ratio(str(a).lower(), str(b).lower()) / 100
+        if self.method == "tfidf":
+            return self.tfidf.score(a, b)
+
+        if self.cascade:
+            lexical = self.tfidf.score(a, b)
+            # Пара заведомо ниже порога — модель не нужна
+            if lexical * 100 < self.threshold - self.cascade_margin:
+                return lexical
+        self.model_pairs += 1
+        from app.processing.transformer import header_similarity
+        return header_similarity(a, b)
+
+    def summary(self) -> str:
+        text = f"Сходство заголовков ({self.method}"
+        if self.cascade:
+            text += f", каскад −{self.cascade_margin}"
+        text += f"): пар {self.pairs}"
+        if self.method == "spacy":
+            text += f", через модель {self.model_pairs}"
+        return text
@@ -0,0 +1,153 @@
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Dict, Optional, Union
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+class SpilledPart:
+    # Ссылка на часть листа, выгруженную на диск. Передаётся в дочерние
+    # процессы вместо самого кадра.
+    __slots__ = ("path", "columns", "rows", "arrow")
+
+    def __init__(self, path: str, columns: list, rows: int, arrow: bool):
+        self.path = path
+        self.columns = columns
+        self.rows = rows
+        self.arrow = arrow
+
+    def __getstate__(self):
+        return (self.path, self.columns, self.rows, self.arrow)
+
+    def __setstate__(self, state):
+        self.path, self.columns, self.rows, self.arrow = state
+
+    def to_dict(self, root: str) -> dict:
+        return {
+            "file": os.path.relpath(self.path, root),
+            "columns": [str(c) for c in self.columns],
+            "rows": self.rows,
+            "arrow": self.arrow,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, root: str) -> "SpilledPart":
+        return cls(os.path.join(root, data["file"]), data["columns"], data["rows"], data["arrow"])
+
+Part = Union[pd.DataFrame, SpilledPart]
+
+def save_part(df: pd.DataFrame, base: str) -> SpilledPart:
+    columns = list(df.columns)
+    if HAS_PYARROW:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowException, TypeError, ValueError):
+            table = None
+        if table is not None:
+            path = base + ".arrow"
+            with pa.OSFile(path, 'wb') as f:
+                with ipc.new_file(f, table.schema) as writer:
+                    writer.write_table(table)
+            return SpilledPart(path, columns, len(df), arrow=True)
+
+    # Столбцы со смешанными типами Arrow не принимает
+    path = base + ".pkl"
+    with open(path, 'wb') as f:
+        pickle.dump(df.reset_index(drop=True), f, protocol=pickle.HIGHEST_PROTOCOL)
+    return SpilledPart(path, columns, len(df), arrow=False)
+
+def load_part(part: Part) -> pd.DataFrame:
+    if not isinstance(part, SpilledPart):
+        return part
+    if part.arrow:
+        # Файл читается в память, а не отображается: столбцы кадра
+        # ссылались бы на файл, и его нельзя было бы удалить
+        with pa.OSFile(part.path, 'rb') as f:
+            table = ipc.open_file(f).read_all()
+        df = table.to_pandas()
+    else:
+        with open(part.path, 'rb') as f:
+            df = pickle.load(f)
+    df.columns = part.columns
+    return df
+
+class SpillStore:
+    def __init__(
+        self,
+        enabled: bool = True,
+        threshold_mb: float = 1024,
+        directory: Optional[str] = None,
+        log=None
+    ):
+        self.enabled = enabled
+        self.threshold = threshold_mb * 2**20
+        self.directory = directory or None
+        self.log = log
+        self.held_bytes = 0
+        self.spilled_bytes = 0
+        self._sizes: Dict[int, int] = {}
+        self._tmp: Optional[str] = None
+        self._count = 0
+
+    @classmethod
+    def from_rules(cls, rules: dict, log=None) -> "SpillStore":
+        cfg = rules.get("spill", {})
+        return cls(
+            enabled=cfg.get("enabled", True),
+            threshold_mb=cfg.get("threshold_mb", 1024),
+            directory=cfg.get("dir"),
+            log=log
+        )
+
+    @property
+    def active(self) -> bool:
+        return self._tmp is not None
+
+    def put(self, df: pd.DataFrame) -> Part:
+        if not self.enabled:
+            return df
+        size = int(df.memory_usage(deep=True).sum())
+        if not self.active and self.held_bytes + size <= self.threshold:
+            self.held_bytes += size
+            self._sizes[id(df)] = size
+            return df
+        return self._spill(df, size)
+
+    def release(self, part: Part):
+        size = self._sizes.pop(id(part), None)
+        if size is not None:
+            self.held_bytes -= size
+
+    def _spill(self, df: pd.DataFrame, size: int) -> SpilledPart:
+        if self._tmp is None:
+            self._tmp = tempfile.mkdtemp(prefix="excel_integrator_", dir=self.directory)
+            if self.log is not None:
+                self.log.append(
+                    f"Превышен порог памяти {self.threshold / 2**20:.0f} МБ: "
+                    f"части листов выгружаются в {self._tmp}"
+                )
+        self._count += 1
+        self.spilled_bytes += size
+        return save_part(df, os.path.join(self._tmp, f"part_{self._count:05d}"))
+
+    def summary_line(self) -> Optional[str]:
+        if not self.active:
+            return None
+        return f"Выгружено на диск частей: {self._count} ({self.spilled_bytes / 2**20:.1f} МБ)"
+
+    def close(self):
+        if self._tmp is not None:
+            try:
+                shutil.rmtree(self._tmp)
+            except OSError as e:
+                if self.log is not None:
+                    self.log.append(f"Не удалось удалить временную папку {self._tmp}: {e}")
+            self._tmp = None
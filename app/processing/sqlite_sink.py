@@ -0,0 +1,217 @@
+import os
+import sqlite3
+from datetime import datetime, date, time, timedelta
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Результат в базе SQLite: лист — таблица, столбец _run связывает строки
+# с запуском в таблице _runs, лог запуска — в таблице _run_log. Повторный
+# запуск дописывает строки в существующие таблицы.
+
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+RUN_COLUMN = "_run"
+INT64_MIN, INT64_MAX = -2**63, 2**63 - 1
+# SQLite не различает регистр латиницы в именах, кириллицу — различает
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def is_sqlite(path: str) -> bool:
+    return path.lower().endswith(SQLITE_EXTENSIONS)
+
+def _quote(name) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _fold(name: str) -> str:
+    return name.translate(_ASCII_LOWER)
+
+def unique_columns(columns) -> List[str]:
+    # Имена, совпадающие для SQLite (в том числе с _run), получают суффикс _2, _3...
+    used = {_fold(RUN_COLUMN)}
+    out = []
+    for c in map(str, columns):
+        name, n = c, 1
+        while _fold(name) in used:
+            n += 1
+            name = f"{c}_{n}"
+        used.add(_fold(name))
+        out.append(name)
+    return out
+
+def _int_overflow(s: pd.Series) -> bool:
+    # Целые вне int64 sqlite3 не передаёт, а столбец INTEGER превратил бы
+    # их в REAL с потерей цифр — такие столбцы хранятся текстом
+    dt = s.dtype
+    if pd.api.types.is_unsigned_integer_dtype(dt):
+        return bool(len(s)) and int(s.max()) > INT64_MAX
+    if dt == object and pd.api.types.infer_dtype(s, skipna=True) == "integer":
+        ints = s.dropna()
+        return bool(len(ints)) and (int(ints.min()) < INT64_MIN or int(ints.max()) > INT64_MAX)
+    return False
+
+def column_type(s: pd.Series) -> str:
+    dt = s.dtype
+    if isinstance(dt, pd.CategoricalDtype):
+        return column_type(pd.Series(dt.categories))
+    if _int_overflow(s):
+        return "TEXT"
+    if pd.api.types.is_bool_dtype(dt) or pd.api.types.is_integer_dtype(dt):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dt):
+        return "REAL"
+    if dt == object:
+        kind = pd.api.types.infer_dtype(s, skipna=True)
+        if kind in ("integer", "boolean"):
+            return "INTEGER"
+        if kind in ("floating", "mixed-integer-float", "decimal"):
+            return "REAL"
+    # Даты — текст ISO 8601, его понимают функции даты SQLite
+    return "TEXT"
+
+def _value(v):
+    if v is None or v is pd.NA or v is pd.NaT:
+        return None
+    if isinstance(v, float):
+        return None if np.isnan(v) else v
+    if isinstance(v, (np.integer, np.bool_)):
+        v = int(v)
+    if isinstance(v, int) and not INT64_MIN <= v <= INT64_MAX:
+        return str(v)
+    if isinstance(v, (int, str, bytes)):
+        return v
+    if isinstance(v, np.floating):
+        return None if np.isnan(v) else float(v)
+    if isinstance(v, datetime):
+        return v.isoformat(sep=" ")
+    if isinstance(v, (date, time)):
+        return v.isoformat()
+    if isinstance(v, timedelta):
+        return v.total_seconds()
+    return str(v)
+
+def _column_values(s: pd.Series) -> list:
+    # Значения столбца в типах sqlite3; числовые столбцы — без обхода по ячейкам
+    dt = s.dtype
+    if pd.api.types.is_datetime64_any_dtype(dt):
+        values = s.dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy(dtype=object)
+    elif _int_overflow(s):
+        return [_value(v) for v in s.to_numpy(dtype=object).tolist()]
+    elif pd.api.types.is_numeric_dtype(dt) and not isinstance(dt, pd.CategoricalDtype):
+        values = s.to_numpy(dtype=object)
+    else:
+        return [_value(v) for v in s.to_numpy(dtype=object).tolist()]
+    values[s.isna().to_numpy()] = None
+    return values.tolist()
+
+def _rows(df: pd.DataFrame, run_id: int, batch_rows: int):
+    run = [run_id] * min(batch_rows, len(df))
+    for start in range(0, len(df), batch_rows):
+        block = df.iloc[start:start + batch_rows]
+        columns = [_column_values(block.iloc[:, j]) for j in range(block.shape[1])]
+        yield list(zip(*columns, run[:len(block)]))
+
+class SqliteSink:
+    def __init__(self, path: str, options: Optional[dict] = None):
+        # options — раздел writer правил (ключи sqlite_*)
+        options = options or {}
+        self.path = path
+        self.batch_rows = max(1, options.get("sqlite_batch_rows", 50000))
+        self.index_columns = list(options.get("sqlite_index_columns", []))
+        self.replace = options.get("sqlite_mode", "append") == "replace"
+        self.con = sqlite3.connect(path)
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        with self.con:
+            self.con.execute(
+                "CREATE TABLE IF NOT EXISTS _runs ("
+                "id INTEGER PRIMARY KEY, started TEXT, finished TEXT, sheets INTEGER, rows INTEGER)"
+            )
+            self.con.execute(
+                "CREATE TABLE IF NOT EXISTS _run_log (run INTEGER, line INTEGER, message TEXT)"
+            )
+            cur = self.con.execute(
+                "INSERT INTO _runs (started) VALUES (?)",
+                (datetime.now().isoformat(sep=" ", timespec="seconds"),)
+            )
+        self.run_id = cur.lastrowid
+        self.sheets = 0
+        self.rows = 0
+
+    def _columns(self, table: str) -> List[str]:
+        return [r[1] for r in self.con.execute(f"PRAGMA table_info({_quote(table)})")]
+
+    def write_table(self, name: str, df: pd.DataFrame) -> Tuple[str, Dict[str, str]]:
+        # Возвращает имя таблицы и переименованные столбцы
+        table = str(name)
+        columns = unique_columns(df.columns)
+        renamed = {str(c): n for c, n in zip(df.columns, columns) if str(c) != n}
+        types = {n: column_type(df.iloc[:, j]) for j, n in enumerate(columns)}
+        # Одна транзакция на лист: вставка пачками executemany
+        with self.con:
+            if self.replace:
+                self.con.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+            existing = {_fold(c): c for c in self._columns(table)}
+            if not existing:
+                defs = ", ".join(f"{_quote(c)} {types[c]}" for c in columns)
+                self.con.execute(
+                    f"CREATE TABLE {_quote(table)} ({defs}{', ' if defs else ''}{_quote(RUN_COLUMN)} INTEGER)"
+                )
+            else:
+                # Новые столбцы при дозаписи добавляются в конец таблицы;
+                # существующие сопоставляются без учёта регистра латиницы
+                for j, c in enumerate(columns):
+                    if _fold(c) in existing:
+                        columns[j] = existing[_fold(c)]
+                    else:
+                        self.con.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(c)} {types[c]}")
+            names = ", ".join(_quote(c) for c in columns + [RUN_COLUMN])
+            marks = ", ".join("?" * (len(columns) + 1))
+            sql = f"INSERT INTO {_quote(table)} ({names}) VALUES ({marks})"
+            for batch in _rows(df, self.run_id, self.batch_rows):
+                self.con.executemany(sql, batch)
+            for c in self.index_columns:
+                if c in columns:
+                    self.con.execute(
+                        f"CREATE INDEX IF NOT EXISTS {_quote(f'ix_{table}_{c}')} "
+                        f"ON {_quote(table)} ({_quote(c)})"
+                    )
+        self.sheets += 1
+        self.rows += len(df)
+        return table, renamed
+
+    def write_log(self, lines):
+        with self.con:
+            it = enumerate(lines, start=1)
+            while True:
+                batch = [(self.run_id, n, line) for n, line in islice(it, self.batch_rows)]
+                if not batch:
+                    break
+                self.con.executemany("INSERT INTO _run_log VALUES (?, ?, ?)", batch)
+
+    def close(self):
+        with self.con:
+            self.con.execute(
+                "UPDATE _runs SET finished = ?, sheets = ?, rows = ? WHERE id = ?",
+                (datetime.now().isoformat(sep=" ", timespec="seconds"), self.sheets, self.rows, self.run_id)
+            )
+        self.con.close()
+
+def write_sqlite(path: str, result: Dict[str, pd.DataFrame], log, options: Optional[dict] = None) -> List[str]:
+    # Возвращает строки о записи для лога; сам log не меняется, в таблицу
+    # _run_log попадают его строки, эти строки и итоги
+    lines = []
+    sink = SqliteSink(path, options)
+    try:
+        for name, df in result.items():
+            if df.shape[1] == 0:
+                continue
+            table, renamed = sink.write_table(name, df)
+            lines.append(f"SQLite: лист «{name}» → таблица {_quote(table)}, строк: {len(df)}")
+            for old, new in renamed.items():
+                lines.append(f"  столбец «{old}» записан как «{new}»: имя уже занято в таблице")
+        lines.append(f"SQLite: запуск {sink.run_id}, {os.path.basename(path)}")
+        summary = log.summary_lines() if hasattr(log, "summary_lines") else []
+        sink.write_log(list(log) + lines + summary)
+    finally:
+        sink.close()
+    return lines
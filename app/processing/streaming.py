@@ -0,0 +1,282 @@
+import os
+import re
+from datetime import datetime, date, time
+from itertools import islice
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+
+from app.processing.reader import (
+    _detect_and_fix_header,
+    _remove_duplicate_header_rows,
+    _map_sheet_name,
+    _cluster_sheets,
+    __ensure_unique_columns as _ensure_unique_columns,
+)
+from app.processing.transformer import (
+    apply_word_replace,
+    apply_word_filter,
+    extract_units_to_headers,
+    apply_unit_conversions,
+    apply_column_mapping,
+    dictionary_column_map,
+    copy_on_write,
+)
+from app.processing import decisions
+from app.processing.profiler import RunProfile
+from app.processing.runlog import RunLog
+from app.processing.backends import open_backend, ReaderBackend
+from app.processing.dedup import Deduplicator
+
+def _frame(rows: list, width: Optional[int] = None) -> pd.DataFrame:
+    if width is not None:
+        # Строки приходят обрезанными по последней непустой ячейке
+        pad = (None,) * width
+        rows = [r + pad[len(r):] if len(r) < width else r for r in rows]
+    df = pd.DataFrame.from_records(rows) if rows else pd.DataFrame()
+    if width is not None:
+        df = df.reindex(columns=range(width))
+    return df
+
+def _overflow(rows: list, width: int) -> int:
+    # Непустые ячейки правее заголовка: _frame их отбрасывает
+    return sum(
+        1 for r in rows if len(r) > width
+        for v in r[width:] if v is not None and v != ""
+    )
+
+def _read_head(backend: ReaderBackend, sheet: str, rules: dict, log: RunLog) -> dict:
+    head_rows = rules["streaming"].get("head_rows", 50)
+    raw = backend.read_sheet(sheet, nrows=head_rows)
+    ws = backend.header_view(sheet, raw, max_row=head_rows)
+    df = _ensure_unique_columns(_detect_and_fix_header(raw, ws, rules, log))
+    return {
+        "path": backend.path,
+        "sheet": sheet,
+        "columns": list(df.columns),
+        "offset": raw.shape[0] - df.shape[0],
+    }
+
+def _route_rows(df: pd.DataFrame, patterns: List[re.Pattern], state: dict) -> Dict[int, pd.DataFrame]:
+    # Повторяет _split_rows_by_keywords для потока фрагментов: строка уходит
+    # в «хвост» правила, встреченного раньше по порядку правил.
+    n = len(df)
+    current = state["sink"]
+    if not patterns or n == 0:
+        return {current: df}
+
+    hits = []
+    for word_re in patterns:
+        mask = np.zeros(n, dtype=bool)
+        for pos in range(df.shape[1]):
+            values = df.iloc[:, pos].tolist()
+            mask |= np.fromiter((bool(word_re.search(str(v))) for v in values), dtype=bool, count=n)
+        hits.append(mask)
+
+    sinks = np.full(n, current)
+    for j in np.flatnonzero(np.logical_or.reduce(hits)):
+        for i in range(current):
+            if hits[i][j]:
+                current = i
+                sinks[j:] = current
+                break
+    state["sink"] = current
+    return {int(s): df.iloc[sinks == s] for s in np.unique(sinks)}
+
+def _cell(ws, v):
+    if v is None:
+        return None
+    if isinstance(v, float) and np.isnan(v):
+        return None
+    if v is pd.NaT or v is pd.NA:
+        return None
+    if isinstance(v, (datetime, date)):
+        c = WriteOnlyCell(ws, value=v)
+        c.number_format = 'DD.MM.YYYY'
+        return c
+    if isinstance(v, time):
+        c = WriteOnlyCell(ws, value=v)
+        c.number_format = 'HH:MM:SS'
+        return c
+    return v
+
+def _write_frame(ws, df: pd.DataFrame, columns: list):
+    df = df.reindex(columns=columns)
+    for row in df.itertuples(index=False, name=None):
+        ws.append([_cell(ws, v) for v in row])
+
+def _create_sheet(wb: Workbook, name: str, columns: list):
+    ws = wb.create_sheet(str(name)[:31])
+    for i, col in enumerate(columns, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = len(str(col)) + 2
+    ws.append([str(c) for c in columns])
+    return ws
+
+def _transform_chunk(chunk: pd.DataFrame, rules: dict, mapping: dict, log: RunLog) -> pd.DataFrame:
+    if rules["word_replace"].get("enabled", True):
+        chunk = apply_word_replace(chunk, rules["word_replace"], log, inplace=True)
+    if rules["word_filter"].get("enabled", True):
+        chunk = apply_word_filter(chunk, rules["word_filter"], log, inplace=True)
+    chunk = extract_units_to_headers(chunk, rules, log, inplace=True)
+    chunk = apply_column_mapping(chunk, mapping)
+    if rules["unit_rules"].get("enabled", True):
+        chunk = apply_unit_conversions(chunk, rules["unit_rules"], log, inplace=True)
+    return chunk.dropna(how="all")
+
+def stream_files(
+    paths: List[str],
+    rules: dict,
+    out_path: str,
+    profile: Optional[RunProfile] = None,
+    session: Optional[decisions.DecisionStore] = None
+) -> RunLog:
+    # Лог пишется в файл рядом с результатом по ходу обработки
+    log = RunLog.from_rules(rules, os.path.splitext(out_path)[0] + ".log")
+    try:
+        with copy_on_write():
+            _stream_files(paths, rules, out_path, log, profile, session)
+    except BaseException:
+        log.close()
+        raise
+    return log
+
+def _stream_files(
+    paths: List[str],
+    rules: dict,
+    out_path: str,
+    log: RunLog,
+    profile: Optional[RunProfile],
+    session: Optional[decisions.DecisionStore]
+):
+    cfg = rules["streaming"]
+    chunk_rows = max(1, cfg.get("chunk_rows", 50000))
+    decisions.configure(rules, session)
+    dedup = Deduplicator.from_rules(rules)
+    if profile is None:
+        profile = RunProfile(enabled=False)
+    profile.start()
+
+    kw_rules = rules["column_word_filter"]["rules"] if rules["column_word_filter"].get("enabled", True) else []
+    patterns = [
+        re.compile(rf"\b{re.escape(r['word'].strip())}\b", re.IGNORECASE)
+        for r in kw_rules
+    ]
+
+    with profile.stage("stream_files"):
+        parts: Dict[str, List[dict]] = {}
+        with profile.stage("read_headers"):
+            for p in paths:
+                fname = os.path.basename(p)
+                backend = open_backend(p, rules["reader"])
+                log.append(f"Чтение заголовков файла {fname} ({backend.name}, потоковый режим)")
+                for sh in backend.sheet_names():
+                    part = _read_head(backend, sh, rules, log)
+                    new_name = _map_sheet_name(sh, rules, log)
+                    log.append(f"Лист «{sh}» → «{new_name}»")
+                    part["name"] = new_name
+                    parts.setdefault(new_name, []).append(part)
+                backend.close()
+
+        tail_columns: Dict[str, list] = {}
+        for name, group in parts.items():
+            for part in group:
+                cols = tail_columns.setdefault(name, [])
+                cols.extend(c for c in part["columns"] if c not in cols)
+
+        if rules["sheet_rules"].get("enabled", True):
+            parts = _cluster_sheets(parts, rules["sheet_rules"], log)
+
+        out = Workbook(write_only=True)
+        tail_sheets = {}
+        for name, group in parts.items():
+            union = []
+            mapping = dictionary_column_map(
+                list(dict.fromkeys(c for part in group for c in part["columns"])), rules["column_rules"]
+            )
+            for part in group:
+                part["mapping"] = {c: mapping[c] for c in part["columns"] if c in mapping}
+                for c in part["columns"]:
+                    target = part["mapping"].get(c, c)
+                    if target not in union:
+                        union.append(target)
+            if len(group) > 1:
+                log.append(f"Объединение {len(group)} частей листа «{name}»")
+            ws = _create_sheet(out, name, union)
+            log.sheet = name
+            # Хеши уже записанных строк листа — повторы ищутся по всем частям
+            seen = set()
+            dropped = 0
+
+            for part in group:
+                fname = os.path.basename(part["path"])
+                with profile.stage("stream_part", file=fname, sheet=part["sheet"]) as st:
+                    backend = open_backend(part["path"], rules["reader"])
+                    rows = backend.data_rows(part["sheet"])
+                    for _ in islice(rows, part["offset"]):
+                        pass
+
+                    state = {"sink": len(patterns)}
+                    n_rows = n_chunks = overflow = 0
+                    while True:
+                        block = list(islice(rows, chunk_rows))
+                        if not block:
+                            break
+                        n_chunks += 1
+                        n_rows += len(block)
+                        overflow += _overflow(block, len(part["columns"]))
+                        chunk = _frame(block, len(part["columns"]))
+                        chunk.columns = part["columns"]
+                        chunk = _remove_duplicate_header_rows(chunk)
+
+                        for sink, piece in _route_rows(chunk, patterns, state).items():
+                            if sink == len(patterns):
+                                if dedup:
+                                    view = piece.rename(columns=part["mapping"])
+                                    view = view.loc[:, ~view.columns.duplicated()].reindex(columns=union)
+                                    dup = dedup.duplicated(view, seen)
+                                    dropped += int(dup.sum())
+                                    piece = piece[~dup]
+                                piece = piece.reset_index(drop=True)
+                                _write_frame(ws, _transform_chunk(piece, rules, part["mapping"], log), union)
+                                continue
+                            if kw_rules[sink].get("delete_row", False):
+                                continue
+                            key = f"{part['name']}_{kw_rules[sink]['word'].strip()}"
+                            tail_cols = tail_columns[part["name"]]
+                            if key not in tail_sheets:
+                                tail_sheets[key] = _create_sheet(out, key, tail_cols)
+                                log.append(f"Перенесены строки в лист «{key}»")
+                            _write_frame(tail_sheets[key], piece, tail_cols)
+                    backend.close()
+                    st.record["rows_out"] = n_rows
+                    log.append(
+                        f"Потоковое чтение листа «{part['sheet']}» ({fname}): "
+                        f"{n_rows} строк, фрагментов: {n_chunks}"
+                    )
+                    if overflow:
+                        log.append(
+                            f"Лист «{part['sheet']}» ({fname}): отброшено непустых ячеек "
+                            f"правее заголовка ({len(part['columns'])} столбцов): {overflow}"
+                        )
+                    trimmed = backend.trim[part["sheet"]].describe()
+                    if trimmed:
+                        log.append(f"Лист «{part['sheet']}» ({fname}): {trimmed}")
+            if dropped:
+                log.append(
+                    f"Лист «{name}»: удалено повторяющихся строк: {dropped} "
+                    f"(ключ: {dedup.describe_keys(union)})"
+                )
+        log.sheet = None
+
+        with profile.stage("save"):
+            out.save(out_path)
+
+    profile.stop()
+    log.extend(profile.summary_lines())
+    log.save(os.path.splitext(out_path)[0] + ".log")
+    if profile.enabled:
+        profile.save(os.path.splitext(out_path)[0] + ".profile.json")
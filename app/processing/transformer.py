@@ -1,11 +1,110 @@
 import re
+import contextlib
+import numpy as np
 import pandas as pd
-import spacy
 from rapidfuzz import fuzz
 from datetime import datetime
-from PySide6 import QtWidgets
-
-_nlp = spacy.load("ru_core_news_lg")
+from app.processing import prompts
+from app.processing.vectors import VectorTable
+from app.processing.similarity import HeaderScorer
+from app.processing.minhash import ColumnContent
+from app.processing import decisions
+from app.processing.colprofile import SheetProfile, UNIT_VALUE_RE, CONVERT_VALUE_RE
+
+def copy_on_write():
+    # Этапы конвейера заменяют столбцы кадра, которым владеет конвейер.
+    # На pandas 2.x на время обработки включается copy-on-write, чтобы
+    # срезы и выборки не копировали данные (в pandas 3 он включён всегда).
+    if pd.__version__.startswith("2."):
+        return pd.option_context("mode.copy_on_write", True)
+    return contextlib.nullcontext()
+
+def _owned(df: pd.DataFrame, inplace: bool) -> pd.DataFrame:
+    # Этапы только заменяют и удаляют столбцы целиком, поэтому кадру
+    # вызывающего хватает поверхностной копии
+    return df if inplace else df.copy(deep=False)
+
+MODEL_NAME = "ru_core_news_lg"
+
+_nlp = None
+_vectors = None
+_model_calls = 0
+
+def load_model():
+    global _nlp
+    if _nlp is None:
+        import spacy
+        _nlp = spacy.load(MODEL_NAME)
+    return _nlp
+
+def configure(rules: dict) -> bool:
+    # Если выгружена таблица векторов, сходство заголовков считается по ней,
+    # а spaCy загружается только для анализа содержимого столбцов
+    global _vectors
+    path = rules.get("vectors", {}).get("path")
+    if not path or not VectorTable.exists(path):
+        _vectors = None
+    elif _vectors is None or _vectors.path != path:
+        _vectors = VectorTable(path)
+    return _vectors is not None
+
+def _doc(text: str):
+    global _model_calls
+    _model_calls += 1
+    return load_model()(text)
+
+def model_calls() -> int:
+    return _model_calls
+
+def header_similarity(a: str, b: str) -> float:
+    if _vectors is not None:
+        return _vectors.similarity(str(a).lower(), str(b).lower())
+    return _doc(str(a).lower()).similarity(_doc(str(b).lower()))
+
+_WORDS_RE = re.compile(r"[^\W\d_]+(?:\s+[^\W\d_]+)*")
+
+def _letters_only(words) -> bool:
+    # Правила только из букв не могут совпасть (ни точно, ни нечётко)
+    # со значением без букв — такие столбцы можно пропустить
+    return all(_WORDS_RE.fullmatch(w.strip()) for w in words)
+
+def _set_column(df: pd.DataFrame, col, values: list):
+    df[col] = pd.Series(values, index=df.index, dtype=df[col].dtype)
+
+def _map_column(df: pd.DataFrame, col, fn) -> bool:
+    s = df[col]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # Неиспользуемые категории не передаются в fn и остаются как есть
+        counts = s.value_counts(sort=False)
+        cats = s.cat.categories.tolist()
+        new = [fn(None, c, int(counts[c])) if counts.get(c, 0) else c for c in cats]
+        if all(n is c for n, c in zip(new, cats)):
+            return False
+        if len(set(new)) == len(new) and not any(pd.isna(n) for n in new):
+            df[col] = s.cat.rename_categories(new)
+        else:
+            mapping = dict(zip(cats, new))
+            df[col] = s.astype(object).map(mapping).astype("category")
+        return True
+
+    values = s.tolist()
+    new_values = [fn(idx, v, 1) for idx, v in enumerate(values)]
+    if any(n is not v for n, v in zip(new_values, values)):
+        _set_column(df, col, new_values)
+        return True
+    return False
+
+def _coalesce(df: pd.DataFrame, cols: list) -> pd.Series:
+    series = [df[c] for c in cols]
+    if len({s.dtype for s in series}) > 1:
+        series = [
+            s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s
+            for s in series
+        ]
+    out = series[0]
+    for s in series[1:]:
+        out = out.where(out.notna(), s)
+    return out
 
 def split_src(col: str):
     if col.startswith("__src"):
@@ -13,68 +112,88 @@ def split_src(col: str):
         return parts[1], parts[2]
     return None, col
 
-def apply_word_replace(df: pd.DataFrame, cfg: dict, log: list) -> pd.DataFrame:
+def apply_word_replace(
+    df: pd.DataFrame,
+    cfg: dict,
+    log: list,
+    sheet_profile: SheetProfile = None,
+    inplace: bool = False
+) -> pd.DataFrame:
     if not cfg.get("enabled", True):
         return df
     rules = cfg.get("rules", [])
     threshold = cfg.get("threshold", 80)
     auto = cfg.get("auto_replace", True)
+    if not rules:
+        return df
 
-    df2 = df.copy()
-
+    df = _owned(df, inplace)
     exact_map = {r["target"].lower(): r["target"] for r in rules}
-
-    def _replace_cell(val, idx, col):
+    synonym_map = {}
+    for r in rules:
+        for s in r["synonyms"]:
+            synonym_map.setdefault(s.lower(), r["target"])
+    candidates = [(cand.lower(), r["target"]) for r in rules for cand in (r["target"], *r["synonyms"])]
+
+    def _known_replacement(low):
+        # Сохранённый ответ действует, пока цель замены остаётся в правилах
+        for entry in decisions.find("word_replace", low):
+            if entry["pair"][1].lower() in exact_map:
+                return entry
+        return None
+
+    def _replace_cell(val, idx, col, lower, count=1):
         if pd.isna(val) or not isinstance(val, str):
             return val
         parts = re.split(r'(\W+)', val)
+        # Значение в нижнем регистре берётся из профиля столбца; если
+        # смена регистра сдвинула границы слов, слова приводятся по одному
+        low_parts = re.split(r'(\W+)', lower.get(val) or val.lower())
+        if len(low_parts) != len(parts):
+            low_parts = [token.lower() for token in parts]
         changed = False
         new_parts = []
 
-        for token in parts:
-            low = token.lower()
+        for token, low in zip(parts, low_parts):
             if low in exact_map:
                 new_parts.append(token)
                 continue
 
-            for r in rules:
-                if low in [s.lower() for s in r["synonyms"]]:
-                    new_parts.append(r["target"])
-                    log.append(f"Замена слов: '{token}' → '{r['target']}' в [{idx},'{col}']")
-                    changed = True
-                    break
+            target = synonym_map.get(low)
+            if target is not None:
+                new_parts.append(target)
+                log.event("word_replace", f"'{token}' → '{target}'", column=col, row=idx, count=count)
+                changed = True
             else:
+                known = None if auto else _known_replacement(low)
+                if known is not None:
+                    new_val = known["value"] if known["accepted"] else token
+                    if new_val != token:
+                        log.event("stored_decision", f"'{token}' → '{new_val}'", column=col, row=idx, count=count)
+                        changed = True
+                    new_parts.append(new_val)
+                    continue
+
                 best_score, best_target = 0, None
-                for r in rules:
-                    for cand in (r["target"], *r["synonyms"]):
-                        sc = fuzz.token_set_ratio(low, cand.lower())
-                        if sc > best_score:
-                            best_score, best_target = sc, r["target"]
+                for cand, cand_target in candidates:
+                    sc = fuzz.token_set_ratio(low, cand)
+                    if sc > best_score:
+                        best_score, best_target = sc, cand_target
                 if best_score >= threshold and best_target:
                     if auto:
                         new_val = best_target
                     else:
-                        dlg = QtWidgets.QDialog()
-                        dlg.setWindowTitle("Замена слова")
-                        form = QtWidgets.QFormLayout(dlg)
-                        chk = QtWidgets.QCheckBox(f"Заменить '{token}' → '{best_target}' ({round(best_score)}%)")
-                        chk.setChecked(True)
-                        form.addRow(chk)
-                        name_edit = QtWidgets.QLineEdit(best_target)
-                        form.addRow("Новое слово:", name_edit)
-                        bb = QtWidgets.QDialogButtonBox(
-                            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
+                        answer = prompts.ask_name(
+                            "Замена слова",
+                            f"Заменить '{token}' → '{best_target}' ({round(best_score)}%)",
+                            "Новое слово:", best_target, log
                         )
-                        bb.accepted.connect(dlg.accept)
-                        bb.rejected.connect(dlg.reject)
-                        form.addRow(bb)
-                        if dlg.exec() == QtWidgets.QDialog.Accepted and chk.isChecked():
-                            new_val = name_edit.text().strip() or best_target
-                        else:
-                            new_val = token
+                        decisions.record("word_replace", token, best_target, answer is not None, answer)
+                        new_val = answer or token
                     new_parts.append(new_val)
-                    log.append(
-                        f"Замена слов (fuzzy): '{token}' → '{new_val}' в [{idx},'{col}'] ({round(best_score)}%)"
+                    log.event(
+                        "word_replace_fuzzy", f"'{token}' → '{new_val}'",
+                        column=col, row=idx, score=best_score, count=count
                     )
                     changed = True
                 else:
@@ -82,82 +201,120 @@ def apply_word_replace(df: pd.DataFrame, cfg: dict, log: list) -> pd.DataFrame:
 
         return "".join(new_parts) if changed else val
 
-    for col in df2.select_dtypes(include=["object", "string"]):
-        df2[col] = df2[col].reset_index().apply(
-            lambda rec: _replace_cell(rec[col], rec.name, col), axis=1
-        )
-
-    return df2
-
-def apply_word_filter(df: pd.DataFrame, cfg: dict, log: list) -> pd.DataFrame:
+    sp = sheet_profile or SheetProfile()
+    words = [w for r in rules for w in (r["target"], *r["synonyms"])]
+    for col in sp.text_columns(df, letters=_letters_only(words)):
+        lower = sp.get(df, col).lower
+        if _map_column(df, col, lambda idx, v, count: _replace_cell(v, idx, col, lower, count)):
+            sp.invalidate(col)
+
+    return df
+
+def apply_word_filter(
+    df: pd.DataFrame,
+    cfg: dict,
+    log: list,
+    sheet_profile: SheetProfile = None,
+    inplace: bool = False
+) -> pd.DataFrame:
     if not cfg.get("enabled", True):
         return df
     rules = cfg.get("rules", [])
     threshold = cfg.get("threshold", 60)
-    df2 = df.copy()
+    if not rules:
+        return df
+    df = _owned(df, inplace)
     to_drop = set()
+    sp = sheet_profile or SheetProfile()
+    skip_letterless = threshold > 0 and _letters_only(r["word"] for r in rules)
 
     for rule in rules:
         bad = rule["word"].strip().lower()
         delete_row = rule.get("delete_row", False)
+        mode = "row" if delete_row else "cell"
         word_re = re.compile(rf"\b{re.escape(bad)}\b", re.IGNORECASE)
 
-        for col in df2.select_dtypes(include=["object", "string"]):
-            def _filter_cell(rec):
-                idx = rec.name
-                val = rec[col]
+        for col in sp.text_columns(df, letters=skip_letterless):
+            drop_values = set()
+            lower = sp.get(df, col).lower
+
+            def _drop(idx, val):
+                if idx is None:
+                    drop_values.add(val)
+                else:
+                    to_drop.add(idx)
+
+            def _filter_cell(idx, val, count):
                 if not isinstance(val, str) or not val.strip():
                     return val
 
                 if word_re.search(val):
                     if delete_row:
-                        to_drop.add(idx)
-                        log.append(f'Фильтр слов: удалена строка {idx}')
+                        _drop(idx, val)
+                        log.event("word_filter_row", f"«{bad}»", column=col, row=idx, count=count)
                         return val
                     else:
-                        log.append(f'Фильтр слов: очищена ячейка [{idx}, "{col}"]')
+                        log.event("word_filter_cell", f"«{bad}»", column=col, row=idx, count=count)
                         return ""
 
-                score = fuzz.token_set_ratio(val.lower(), bad)
+                known = decisions.lookup("word_filter", val, bad, mode)
+                if known is not None:
+                    if known["accepted"]:
+                        if delete_row:
+                            _drop(idx, val)
+                        action = "строка удалена" if delete_row else "ячейка очищена"
+                        log.event("stored_decision", f"«{bad}»: {action}", column=col, row=idx, count=count)
+                        return val if delete_row else ""
+                    return val
+
+                score = fuzz.token_set_ratio(lower.get(val) or val.lower(), bad)
                 if score >= threshold:
                     msg = f'{"Удалить строку" if delete_row else "Удалить слово"} «{bad}»?'
-                    reply = QtWidgets.QMessageBox.question(
-                        None, "Фильтр слов", msg,
-                        QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
-                        QtWidgets.QMessageBox.Yes
-                    )
-                    if reply == QtWidgets.QMessageBox.Yes:
+                    accepted = prompts.ask_yes_no("Фильтр слов", msg, log)
+                    decisions.record("word_filter", val, bad, accepted, rule=mode)
+                    if accepted:
                         if delete_row:
-                            to_drop.add(idx)
-                            log.append(f'Фильтр слов (fuzzy): удалена строка {idx} ({round(score)}%)')
+                            _drop(idx, val)
+                            log.event("word_filter_row_fuzzy", f"«{bad}»", column=col, row=idx,
+                                      score=score, count=count)
                             return val
                         else:
-                            log.append(f'Фильтр слов (fuzzy): очищена ячейка [{idx}, "{col}"] ({round(score)}%)')
+                            log.event("word_filter_cell_fuzzy", f"«{bad}»", column=col, row=idx,
+                                      score=score, count=count)
                             return ""
 
                 return val
 
-            df2[col] = df2[col].reset_index().apply(_filter_cell, axis=1)
+            if _map_column(df, col, _filter_cell):
+                sp.invalidate(col)
+            if drop_values:
+                to_drop.update(np.flatnonzero(df[col].isin(drop_values).to_numpy()).tolist())
 
     if to_drop:
-        df2 = df2.drop(index=sorted(to_drop)).reset_index(drop=True)
-
-    return df2
-
-def extract_units_to_headers(df: pd.DataFrame, rules: dict, log: list) -> pd.DataFrame:
+        df = df.drop(index=sorted(to_drop))
+        df.reset_index(drop=True, inplace=True)
+        sp.rows_changed()
+
+    return df
+
+def extract_units_to_headers(
+    df: pd.DataFrame,
+    rules: dict,
+    log: list,
+    sheet_profile: SheetProfile = None,
+    inplace: bool = False
+) -> pd.DataFrame:
     unit_cfg = rules.get("unit_rules", {})
     allowed_units = {
         u.lower()
         for rule in unit_cfg.get("rules", [])
         for u in rule.get("factors", {}).keys()
     }
+    if not allowed_units:
+        return df
+    df = _owned(df, inplace)
 
-    pat = re.compile(r'''
-        ^\s*
-        (?:(?P<num>\d+\.?\d*)\s*(?P<unit1>[^\d\s]+)
-        |(?P<unit2>[^\d\s]+)\s*(?P<num2>\d+\.?\d*))
-        \s*$
-    ''', re.IGNORECASE | re.VERBOSE)
+    pat = UNIT_VALUE_RE
 
     def normalize_cell(v):
         m = pat.match(str(v))
@@ -169,15 +326,58 @@ def extract_units_to_headers(df: pd.DataFrame, rules: dict, log: list) -> pd.Dat
         num = m.group('num') or m.group('num2')
         return f"{num} {unit}"
 
-    df2 = df.copy()
-    for col in df2.columns:
-        df2[col] = df2[col].map(normalize_cell)
-    return df2
+    sp = sheet_profile or SheetProfile()
+    for col in sp.text_columns(df):
+        if not any(u in allowed_units for u in sp.get(df, col).units):
+            continue
+        if _map_column(df, col, lambda idx, v, count: normalize_cell(v)):
+            sp.invalidate(col)
+    return df
+
+def dictionary_column_map(columns, cfg: dict) -> dict:
+    # columns — все столбцы объединяемого листа; как и в apply_column_rules,
+    # столбцы переименовываются, только если правилу соответствуют хотя бы два
+    mapping = {}
+    if not cfg.get("enabled", True):
+        return mapping
+    for rule in cfg.get("rules", []):
+        if rule.get("no_merge", False):
+            continue
+        keys = {rule["target"].lower(), *map(str.lower, rule.get("synonyms", []))}
+        found = [c for c in columns if c not in mapping and str(c).lower() in keys]
+        if len(found) > 1:
+            mapping.update(dict.fromkeys(found, rule["target"]))
+    return mapping
 
-def apply_column_rules(df: pd.DataFrame, cfg: dict, log: list, col_source: dict) -> pd.DataFrame:
+def apply_column_mapping(df: pd.DataFrame, mapping: dict) -> pd.DataFrame:
+    if not mapping:
+        return df
+    groups = {}
+    for c in df.columns:
+        groups.setdefault(mapping.get(c, c), []).append(c)
+    if all(len(cols) == 1 and cols[0] == target for target, cols in groups.items()):
+        return df
+    return pd.DataFrame(
+        {
+            target: df[cols[0]] if len(cols) == 1 else _coalesce(df, cols)
+            for target, cols in groups.items()
+        },
+        index=df.index,
+        copy=False
+    )
+
+def apply_column_rules(
+    df: pd.DataFrame,
+    cfg: dict,
+    log: list,
+    col_source: dict,
+    sheet_profile: SheetProfile = None,
+    inplace: bool = False
+) -> pd.DataFrame:
     if not cfg.get("enabled", True):
         return df
-    tbl = df.copy()
+    tbl = _owned(df, inplace)
+    sp = sheet_profile or SheetProfile()
 
     def split_src(col):
         if col.startswith("__src"):
@@ -197,7 +397,9 @@ def apply_column_rules(df: pd.DataFrame, cfg: dict, log: list, col_source: dict)
         found = [c for c in tbl.columns if c.lower() in keys]
         if len(found) > 1:
             log.append(f"Словарно объединены {found} → '{rule['target']}'")
-            tbl[rule["target"]] = tbl[found].bfill(axis=1).iloc[:, 0]
+            log.plan_step("column_merge", columns=found, target=rule["target"], score=None, how="dictionary")
+            tbl[rule["target"]] = _coalesce(tbl, found)
+            sp.invalidate(rule["target"], *found)
             for c in found:
                 if c != rule["target"]:
                     tbl.drop(columns=[c], inplace=True)
@@ -207,6 +409,62 @@ def apply_column_rules(df: pd.DataFrame, cfg: dict, log: list, col_source: dict)
     alpha = cfg.get("header_weight", 0.6)
 
     cols = list(tbl.columns)
+    scorer = HeaderScorer.from_config(cfg)
+    scorer.prepare(c.lower() for c in cols)
+    content = None
+    if use_content and cfg.get("content_method", "sample") == "minhash":
+        content = ColumnContent(tbl, cols, cfg)
+
+    def pair_score(base, other):
+        H = scorer.score(base.lower(), other.lower())
+        C = H
+        if content is not None:
+            J = content.similarity(base, other)
+            if J is not None:
+                C = J
+        elif use_content:
+            series1 = sp.text_values(tbl, base)
+            series2 = sp.text_values(tbl, other)
+
+            if len(series1) >= content_rows:
+                vals1 = series1.sample(content_rows, random_state=0).tolist()
+            else:
+                vals1 = series1.tolist()
+            if len(series2) >= content_rows:
+                vals2 = series2.sample(content_rows, random_state=0).tolist()
+            else:
+                vals2 = series2.tolist()
+
+            vals1 = [v for v in vals1 if re.search(r"[A-Za-zА-Яа-я]", v)]
+            vals2 = [v for v in vals2 if re.search(r"[A-Za-zА-Яа-я]", v)]
+
+            ents1 = set()
+            ents2 = set()
+            for v in vals1:
+                for tok in _doc(v):
+                    if tok.pos_ == "PROPN":
+                        ents1.add(tok.text)
+            for v in vals2:
+                for tok in _doc(v):
+                    if tok.pos_ == "PROPN":
+                        ents2.add(tok.text)
+
+
+            if ents1 and ents2:
+                inter = ents1 & ents2
+                union = ents1 | ents2
+                C = len(inter) / len(union)
+            else:
+                C = H
+        alpha = cfg.get("header_weight", 0.6)
+        score = int((alpha * H + (1 - alpha) * C) * 100)
+
+        thr = cfg.get("threshold", 80)
+        hdr_ok  = (H * 100) >= thr   
+        cnt_ok  = (C * 100) >= thr   
+        comb_ok = score       >= thr
+        return H, C, score, hdr_ok or cnt_ok or comb_ok
+
     i = 0
     while i < len(cols):
         base = cols[i]
@@ -221,102 +479,73 @@ def apply_column_rules(df: pd.DataFrame, cfg: dict, log: list, col_source: dict)
                 j += 1
                 continue
 
-            H = _nlp(base.lower()).similarity(_nlp(other.lower()))
-            C = H
-            if use_content:
-                series1 = tbl[base].dropna().astype(str)
-                series2 = tbl[other].dropna().astype(str)
-
-                if len(series1) >= content_rows:
-                    vals1 = series1.sample(content_rows, random_state=0).tolist()
-                else:
-                    vals1 = series1.tolist()
-                if len(series2) >= content_rows:
-                    vals2 = series2.sample(content_rows, random_state=0).tolist()
-                else:
-                    vals2 = series2.tolist()
-
-                vals1 = [v for v in vals1 if re.search(r"[A-Za-zА-Яа-я]", v)]
-                vals2 = [v for v in vals2 if re.search(r"[A-Za-zА-Яа-я]", v)]
-
-                ents1 = set()
-                ents2 = set()
-                for v in vals1:
-                    for tok in _nlp(v):
-                        if tok.pos_ == "PROPN":
-                            ents1.add(tok.text)
-                for v in vals2:
-                    for tok in _nlp(v):
-                        if tok.pos_ == "PROPN":
-                            ents2.add(tok.text)
-
-
-                if ents1 and ents2:
-                    inter = ents1 & ents2
-                    union = ents1 | ents2
-                    C = len(inter) / len(union)
-                else:
-                    C = H
-            alpha = cfg.get("header_weight", 0.6)
-            score = int((alpha * H + (1 - alpha) * C) * 100)
-
-            thr = cfg.get("threshold", 80)
-            hdr_ok  = (H * 100) >= thr   
-            cnt_ok  = (C * 100) >= thr   
-            comb_ok = score       >= thr   
-
-            if hdr_ok or cnt_ok or comb_ok:
-                if cfg.get("auto_merge", False):
-                    do_merge = True
-                    name = base
-                else:
-                    dlg = QtWidgets.QDialog()
-                    dlg.setWindowTitle("Объединить столбцы?")
-                    form = QtWidgets.QFormLayout(dlg)
-
-                    chk = QtWidgets.QCheckBox(f"Объединить '{base}' + '{other}' ({score}%)")
-                    chk.setChecked(True)
-                    form.addRow(chk)
-
-                    name_edit = QtWidgets.QLineEdit(base)
-                    form.addRow("Имя результирующего столбца:", name_edit)
-
-                    bb = QtWidgets.QDialogButtonBox(
-                        QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
-                    )
-                    bb.accepted.connect(dlg.accept)
-                    bb.rejected.connect(dlg.reject)
-                    form.addRow(bb)
-
-                    if dlg.exec() == QtWidgets.QDialog.Accepted and chk.isChecked():
+            known = None
+            if not cfg.get("auto_merge", False):
+                known = decisions.lookup("column_merge", base, other)
+            if known is not None:
+                do_merge = known["accepted"]
+                name = known.get("value") or base
+                if do_merge:
+                    log.event("stored_decision", f"'{base}' + '{other}' → '{name}'")
+                    log.plan_step("column_merge", columns=[base, other], target=name, score=None, how="stored")
+            else:
+                H, C, score, similar = pair_score(base, other)
+                do_merge = False
+                if similar:
+                    if cfg.get("auto_merge", False):
                         do_merge = True
-                        name = name_edit.text().strip() or base
+                        name = base
                     else:
-                        do_merge = False
+                        name = prompts.ask_name(
+                            "Объединить столбцы?",
+                            f"Объединить '{base}' + '{other}' ({score}%)",
+                            "Имя результирующего столбца:", base, log
+                        )
+                        do_merge = name is not None
+                        decisions.record("column_merge", base, other, do_merge, name)
+                    if do_merge:
+                        log.append(f"NER объединены '{base}' + '{other}' → '{name}' ({score}%)")
+                        log.plan_step(
+                            "column_merge", columns=[base, other], target=name, score=score,
+                            how="auto" if cfg.get("auto_merge", False) else "user"
+                        )
 
-                if do_merge:
-                    log.append(f"NER объединены '{base}' + '{other}' → '{name}' ({score}%)")
-                    tbl[name] = tbl[[base, other]].bfill(axis=1).iloc[:, 0]
-                    for c in (base, other):
-                        if c != name:
-                            tbl.drop(columns=[c], inplace=True)
-                    cols[i] = name
-                    cols.pop(j)
-                    continue
+            if do_merge:
+                tbl[name] = _coalesce(tbl, [base, other])
+                sp.invalidate(name, base, other)
+                if content is not None:
+                    content.merge(base, other, name)
+                for c in (base, other):
+                    if c != name:
+                        tbl.drop(columns=[c], inplace=True)
+                cols[i] = name
+                cols.pop(j)
+                continue
 
             j += 1
         i += 1
 
+    if scorer.pairs:
+        log.append(scorer.summary())
     return tbl
 
-def apply_unit_conversions(df: pd.DataFrame, cfg: dict, log: list) -> pd.DataFrame:
-    pat = re.compile(r"^\s*([\d\.]+)\s*([^\d\.\s]+)\s*$", re.IGNORECASE)
+def apply_unit_conversions(
+    df: pd.DataFrame,
+    cfg: dict,
+    log: list,
+    sheet_profile: SheetProfile = None,
+    inplace: bool = False
+) -> pd.DataFrame:
+    pat = CONVERT_VALUE_RE
 
     factors = {
         unit.strip().lower(): (coef, rule["to"])
         for rule in cfg.get("rules", [])
         for unit, coef in rule.get("factors", {}).items()
     }
+    if not factors:
+        return df
+    df = _owned(df, inplace)
 
     def to_num(v):
         s = str(v).strip()
@@ -339,10 +568,12 @@ def apply_unit_conversions(df: pd.DataFrame, cfg: dict, log: list) -> pd.DataFra
             v = int(v)
         return f"{v} {unit}"
 
-    df2 = df.copy()
-
-    for col in df.columns:
-        raw = df[col].dropna().astype(str)
+    sp = sheet_profile or SheetProfile()
+    for col in sp.text_columns(df):
+        prof = sp.get(df, col)
+        if not (prof.convert_units | set(prof.units)) & factors.keys():
+            continue
+        raw = sp.text_values(df, col)
         found = {
             pat.match(x.strip()).group(2).lower().rstrip('.:')
             for x in raw if pat.match(x.strip())
@@ -351,14 +582,14 @@ def apply_unit_conversions(df: pd.DataFrame, cfg: dict, log: list) -> pd.DataFra
         if not valid:
             continue
 
-        df2[col] = df[col].map(to_num)
-
         target_units = {factors[u][1] for u in valid}
         if len(target_units) == 1:
             tgt = next(iter(target_units))
-            df2[col] = df2[col].map(lambda v: fmt(v, tgt) if pd.notna(v) else v)
+            df[col] = [fmt(v, tgt) if pd.notna(v) else v for v in map(to_num, df[col].tolist())]
             log.append(
                 f"Единицы в ячейках столбца '{col}': форматирование значений с единицей '{tgt}'"
             )
+        else:
+            df[col] = df[col].map(to_num)
 
-    return df2
\ No newline at end of file
+    return df
\ No newline at end of file
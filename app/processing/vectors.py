@@ -0,0 +1,84 @@
+import os
+import re
+import hashlib
+from typing import Dict, Optional
+
+import numpy as np
+
+# Таблица векторов для сходства заголовков без загрузки spaCy.
+# vectors.npy — матрица float32, keys.npy — отсортированные 64-битные хеши
+# строк; строка i матрицы соответствует keys[i]. Оба файла открываются
+# через mmap, поэтому все процессы делят одну копию в кеше страниц.
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]+")
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+def export_vectors(nlp, path: str) -> int:
+    vectors = nlp.vocab.vectors
+    if getattr(vectors, "mode", "default") != "default":
+        raise ValueError(f"Векторы модели в режиме {vectors.mode} не поддерживаются")
+    data = vectors.data
+    if not isinstance(data, np.ndarray):
+        data = data.get()
+
+    # Заголовки сравниваются в нижнем регистре, остальные ключи не нужны
+    pairs = {}
+    for key, row in vectors.key2row.items():
+        text = nlp.vocab.strings[key]
+        if text == text.lower():
+            pairs[_hash(text)] = row
+    keys = np.fromiter(sorted(pairs), dtype=np.uint64, count=len(pairs))
+    rows = np.fromiter((pairs[int(k)] for k in keys), dtype=np.int64, count=len(keys))
+
+    os.makedirs(path, exist_ok=True)
+    out = np.lib.format.open_memmap(
+        os.path.join(path, "vectors.npy"), mode="w+", dtype=np.float32, shape=(len(rows), data.shape[1])
+    )
+    for start in range(0, len(rows), 65536):
+        out[start:start + 65536] = data[rows[start:start + 65536]]
+    out.flush()
+    del out
+    np.save(os.path.join(path, "keys.npy"), keys)
+    return len(keys)
+
+class VectorTable:
+    def __init__(self, path: str, cache_size: int = 4096):
+        self.path = path
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.keys = np.load(os.path.join(path, "keys.npy"), mmap_mode="r")
+        self.cache_size = cache_size
+        self._cache: Dict[str, Optional[np.ndarray]] = {}
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return all(os.path.exists(os.path.join(path, f)) for f in ("vectors.npy", "keys.npy"))
+
+    def row(self, token: str) -> Optional[int]:
+        h = np.uint64(_hash(token))
+        i = int(np.searchsorted(self.keys, h))
+        if i < len(self.keys) and self.keys[i] == h:
+            return i
+        return None
+
+    def text_vector(self, text: str) -> Optional[np.ndarray]:
+        if text in self._cache:
+            return self._cache[text]
+        rows = [r for r in (self.row(t) for t in _TOKEN_RE.findall(text)) if r is not None]
+        # Как Doc.vector в spaCy, но без деления на число токенов:
+        # на косинус это не влияет
+        vec = np.asarray(self.vectors[rows], dtype=np.float64).sum(axis=0) if rows else None
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[text] = vec
+        return vec
+
+    def similarity(self, a: str, b: str) -> float:
+        va, vb = self.text_vector(a), self.text_vector(b)
+        if va is None or vb is None:
+            return 0.0
+        na, nb = np.linalg.norm(va), np.linalg.norm(vb)
+        if na == 0 or nb == 0:
+            return 0.0
+        return float(np.dot(va, vb) / (na * nb))
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import asyncio
+import fnmatch
+import hashlib
+from typing import Dict, List, Tuple
+
+import pandas as pd
+from rapidfuzz import fuzz
+
+from app.processing import prompts
+from app.processing.reader import process_files
+from app.processing.runlog import RunLog
+from app.processing.spill import SpilledPart, save_part, load_part
+from app.processing.transformer import apply_column_mapping
+from app.processing.similarity import HeaderScorer
+from app.processing.xlsx_parts import sheet_titles, update_xlsx
+
+STATE_VERSION = 1
+
+class WatchService:
+    # Служебный режим: следит за папкой и дописывает в итоговую книгу только
+    # новые и изменённые файлы. Вклад каждого файла в каждый лист хранится
+    # в Arrow-файлах рядом с результатом, поэтому уже объединённые данные
+    # повторно не читаются и не обрабатываются.
+    def __init__(self, in_dir: str, out_path: str, rules: dict, echo=print):
+        self.in_dir = os.path.abspath(in_dir)
+        self.out_path = os.path.abspath(out_path)
+        self.rules = rules
+        self.cfg = rules["watch"]
+        self.echo = echo
+
+        base, _ = os.path.splitext(self.out_path)
+        self.cache_dir = base + ".watch"
+        self.state_path = os.path.join(self.cache_dir, "state.json")
+        self.log_path = base + ".log"
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.state = self._load_state()
+        self._failed: Dict[str, tuple] = {}
+
+    def _load_state(self) -> dict:
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get("version") == STATE_VERSION:
+                return state
+        return {
+            "version": STATE_VERSION,
+            "files": {},
+            "sheet_aliases": {},
+            "columns": {},
+            "column_aliases": {},
+        }
+
+    def _save_state(self):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def _is_input(self, name: str) -> bool:
+        if name.startswith("~$"):
+            return False
+        return any(fnmatch.fnmatch(name.lower(), pat) for pat in self.cfg.get("patterns", ["*.xlsx", "*.xls", "*.csv", "*.tsv"]))
+
+    def scan(self) -> Tuple[List[str], List[str]]:
+        settle = self.cfg.get("settle_s", 5)
+        now = time.time()
+        seen = set()
+        ready = []
+        for entry in sorted(os.scandir(self.in_dir), key=lambda e: e.name):
+            if not entry.is_file() or not self._is_input(entry.name):
+                continue
+            if os.path.abspath(entry.path) == self.out_path:
+                continue
+            seen.add(entry.name)
+            st = entry.stat()
+            known = self.state["files"].get(entry.name)
+            if known and known["mtime"] == st.st_mtime and known["size"] == st.st_size:
+                continue
+            if self._failed.get(entry.name) == (st.st_mtime, st.st_size):
+                continue
+            # Файл может ещё копироваться — ждём, пока он перестанет меняться
+            if now - st.st_mtime < settle:
+                continue
+            ready.append(entry.name)
+        removed = [name for name in self.state["files"] if name not in seen]
+        return ready, removed
+
+    def _is_tail(self, name: str) -> bool:
+        # Листы с перенесёнными строками («<лист>_<слово>») при обычном
+        # объединении не кластеризуются и не сводятся по столбцам
+        return any(
+            name.endswith(f"_{r['word'].strip()}")
+            for r in self.rules["column_word_filter"].get("rules", [])
+        )
+
+    def _resolve_sheet(self, name: str, log: RunLog) -> str:
+        aliases = self.state["sheet_aliases"]
+        if name in aliases:
+            return aliases[name]
+        target = name
+        cfg = self.rules["sheet_rules"]
+        if cfg.get("enabled", True) and not self._is_tail(name):
+            best_score, best = 0, None
+            for out in sorted(set(aliases.values())):
+                if self._is_tail(out):
+                    continue
+                sc = fuzz.token_set_ratio(name.lower(), out.lower())
+                if sc > best_score:
+                    best_score, best = sc, out
+            if best and best_score >= cfg.get("threshold", 90):
+                log.append(f"Лист «{name}» добавлен к «{best}» ({round(best_score)}%)")
+                target = best
+        aliases[name] = target
+        return target
+
+    def _align_columns(self, sheet: str, df: pd.DataFrame, log: RunLog) -> pd.DataFrame:
+        known = self.state["columns"].setdefault(sheet, [])
+        aliases = self.state["column_aliases"].setdefault(sheet, {})
+        cfg = self.rules["column_rules"]
+        threshold = cfg.get("threshold", 80)
+        fuzzy = cfg.get("enabled", True) and not self._is_tail(sheet)
+        columns = [str(c) for c in df.columns]
+        df.columns = columns
+        scorer = HeaderScorer.from_config(cfg)
+        scorer.prepare(c.lower() for c in known + columns)
+
+        mapping = {}
+        for col in columns:
+            if col in known:
+                continue
+            target = aliases.get(col)
+            if target is None:
+                target = col
+                if fuzzy:
+                    best_score, best = 0, None
+                    for k in known:
+                        if k in columns:
+                            continue
+                        sc = scorer.score(col.lower(), k.lower()) * 100
+                        if sc > best_score:
+                            best_score, best = sc, k
+                    if best and best_score >= threshold:
+                        log.append(f"Столбец '{col}' → '{best}' листа «{sheet}» ({round(best_score)}%)")
+                        target = best
+                aliases[col] = target
+                if target == col:
+                    known.append(col)
+            if target != col:
+                mapping[col] = target
+        return apply_column_mapping(df, mapping)
+
+    def _part_base(self, fname: str, sheet: str) -> str:
+        key = hashlib.sha1(f"{fname}\0{sheet}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, key)
+
+    def _drop_file(self, fname: str) -> set:
+        entry = self.state["files"].pop(fname, None)
+        if not entry:
+            return set()
+        for part in entry["sheets"].values():
+            try:
+                os.remove(os.path.join(self.cache_dir, part["file"]))
+            except OSError:
+                pass
+        return set(entry["sheets"])
+
+    def _sheet_parts(self, sheet: str) -> Tuple[list, List[SpilledPart]]:
+        # Части листа по файлам и столбцы в порядке первого появления;
+        # сами части читаются только при записи листа
+        parts = [
+            SpilledPart.from_dict(entry["sheets"][sheet], self.cache_dir)
+            for _, entry in sorted(self.state["files"].items())
+            if sheet in entry["sheets"]
+        ]
+        columns = list(dict.fromkeys(c for p in parts for c in p.columns))
+        order = [c for c in self.state["columns"].get(sheet, []) if c in columns]
+        return order + [c for c in columns if c not in order], parts
+
+    def process(self, ready: List[str], removed: List[str]) -> set:
+        affected = set()
+        log = RunLog.from_rules(self.rules)
+        for fname in removed:
+            log.append(f"Файл {fname} удалён из папки, его строки исключены")
+            affected |= self._drop_file(fname)
+
+        for fname in ready:
+            path = os.path.join(self.in_dir, fname)
+            st = os.stat(path)
+            try:
+                result, file_log = process_files([path], self.rules)
+            except Exception as e:
+                log.append(f"Ошибка обработки {fname}: {e}")
+                self.echo(f"Ошибка обработки {fname}: {e}")
+                self._failed[fname] = (st.st_mtime, st.st_size)
+                continue
+            self._failed.pop(fname, None)
+            with file_log:
+                # Вместе со строками переносятся счётчики для итогов
+                log.merge(file_log.export())
+
+            affected |= self._drop_file(fname)
+            entry = {"mtime": st.st_mtime, "size": st.st_size, "sheets": {}}
+            for name, df in result.items():
+                if df.shape[1] == 0:
+                    continue
+                sheet = self._resolve_sheet(name, log)
+                df = self._align_columns(sheet, df, log)
+                if sheet in entry["sheets"]:
+                    prev = SpilledPart.from_dict(entry["sheets"][sheet], self.cache_dir)
+                    df = pd.concat([load_part(prev), df], ignore_index=True, sort=False)
+                part = save_part(df, self._part_base(fname, sheet))
+                entry["sheets"][sheet] = part.to_dict(self.cache_dir)
+                affected.add(sheet)
+            self.state["files"][fname] = entry
+            log.append(f"Файл {fname}: листов {len(entry['sheets'])}")
+
+        if affected:
+            self._write(affected, log)
+        self._save_state()
+
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            for line in log:
+                f.write(line + "\n")
+            for line in log.summary_lines():
+                f.write(line + "\n")
+        log.close()
+        return affected
+
+    def _write(self, affected: set, log: RunLog):
+        order = []
+        for _, entry in sorted(self.state["files"].items()):
+            order.extend(sheet for sheet in entry["sheets"] if sheet not in order)
+        removed = sorted(affected - set(order))
+
+        # Лист, название которого в книге сменилось (например, суффикс
+        # повтора после удаления соседнего листа), тоже формируется заново
+        titles = dict(zip(order, sheet_titles(order)))
+        previous = self.state.get("titles", {})
+        changed = affected | {s for s in order if previous.get(s) != titles[s]}
+        sheets = {sheet: self._sheet_parts(sheet) for sheet in order}
+        rendered = update_xlsx(
+            self.out_path, sheets, changed, self.rules["writer"].get("compression", 6), log
+        )
+        self.state["titles"] = titles
+        message = f"Обновлены листы: {', '.join(rendered) or '-'}; удалены: {', '.join(removed) or '-'}"
+        log.append(message)
+        self.echo(message)
+
+    async def run(self, once: bool = False):
+        prompts.set_policy(self.cfg.get("prompt_policy", "reject"))
+        loop = asyncio.get_running_loop()
+        interval = self.cfg.get("interval_s", 5)
+        self.echo(f"Наблюдение за папкой {self.in_dir}")
+        while True:
+            ready, removed = self.scan()
+            if ready or removed:
+                self.echo(f"Новые или изменённые файлы: {', '.join(ready) or '-'}")
+                await loop.run_in_executor(None, self.process, ready, removed)
+            if once:
+                return
+            await asyncio.sleep(interval)
@@ -1,48 +1,212 @@
 import os
+import re
 import pandas as pd
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
 from PySide6 import QtWidgets
 from datetime import datetime, date, time
+from typing import Dict, List, Tuple
+from app.processing.runlog import RunLog
+from app.processing.xlsx_parts import write_xlsx, sheet_titles
+from app.processing.spill import HAS_PYARROW
+from app.processing.sqlite_sink import is_sqlite, write_sqlite
 
-def save_result(result: dict, log: list):
+# Пределы листа Excel (строка заголовка входит в число строк)
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_COLUMNS = 16384
+_FILE_CHARS_RE = re.compile(r'[\\/:*?"<>|]')
+
+def ask_save_path(file_filter: str = "Excel (*.xlsx)"):
     path, _ = QtWidgets.QFileDialog.getSaveFileName(
-        None, "Сохранить файл", "", "Excel (*.xlsx)"
+        None, "Сохранить файл", "", file_filter
     )
     if not path:
-        return
+        return None
 
     if os.path.exists(path):
         r = QtWidgets.QMessageBox.question(
             None, "Перезапись", "Файл существует. Перезаписать?"
         )
         if r != QtWidgets.QMessageBox.Yes:
-            return
+            return None
+    return path
+
+def save_result(result: dict, log: list, profile=None, options=None):
+    path = ask_save_path("Excel (*.xlsx);;SQLite (*.sqlite *.db)")
+    if not path:
+        return
+
+    log_path = write_result(path, result, log, profile, options)
+
+    QtWidgets.QMessageBox.information(
+        None, "Готово", f"Сохранено: {path}\nЛог: {log_path}"
+    )
+
+def _format_sheet(ws):
+    for col in ws.columns:
+        max_len = max(len(str(c.value)) if c.value else 0 for c in col[:4])
+        letter  = get_column_letter(col[0].column)
+        ws.column_dimensions[letter].width = max_len + 2
+
+        for cell in col[1:]: 
+            if isinstance(cell.value, (datetime, date)):
+                cell.number_format = 'DD.MM.YYYY'
+            elif isinstance(cell.value, time):
+                cell.number_format = 'HH:MM:SS'
+
+def _piece_title(name, n: int) -> str:
+    suffix = f" ({n})"
+    return str(name)[:31 - len(suffix)] + suffix
 
+def _to_parquet(df: pd.DataFrame, path: str):
+    out = df.copy(deep=False)
+    out.columns = [str(c) for c in out.columns]
+    try:
+        out.to_parquet(path, index=False)
+    except (TypeError, ValueError):
+        # Смешанные типы в столбце Arrow не записывает — такие столбцы как текст
+        for c in out.columns:
+            if out[c].dtype == object:
+                out[c] = out[c].where(out[c].isna(), out[c].astype(str))
+        out.to_parquet(path, index=False)
+
+def split_result(
+    path: str,
+    result: dict,
+    options: dict
+) -> Tuple[Dict[str, dict], Dict[str, pd.DataFrame], List[str]]:
+    # Раскладка результата до записи: листы, не помещающиеся в Excel,
+    # делятся на части по строкам и столбцам. Части — срезы без копий.
+    # Возвращает {файл: {лист: кадр}}, {файл parquet: лист целиком}, строки лога.
+    max_rows = min(options.get("max_rows", EXCEL_MAX_ROWS), EXCEL_MAX_ROWS) - 1
+    max_cols = min(options.get("max_columns", EXCEL_MAX_COLUMNS), EXCEL_MAX_COLUMNS)
+    mode = options.get("split", "sheets")
+    lines = []
+    if mode == "parquet" and not HAS_PYARROW:
+        lines.append("Запись в parquet недоступна без pyarrow, листы делятся на листы книги")
+        mode = "sheets"
+
+    base, ext = os.path.splitext(path)
+    # Сначала раскладка по файлам, затем названия листов каждой книги
+    # проходят через sheet_titles: часть «Data (2)» не должна заменить
+    # существующий лист с тем же названием
+    placed = []   # [файл, название, кадр, лист, (строка, столбец) части или None]
+    split = {}    # лист → (строк, столбцов, частей)
+    targets = {}  # лист → файл parquet
+    used = set()
+    for name, df in result.items():
+        rows, cols = df.shape
+        if rows <= max_rows and cols <= max_cols:
+            placed.append([path, name, df, name, None])
+            continue
+        pieces = [
+            (r0, c0, df.iloc[r0:r0 + max_rows, c0:c0 + max_cols])
+            for r0 in range(0, rows or 1, max_rows)
+            for c0 in range(0, cols, max_cols)
+        ]
+        split[name] = (rows, cols, len(pieces))
+        if mode == "parquet":
+            placed.append([path, name, pieces[0][2], name, None])
+            stem, n = _FILE_CHARS_RE.sub('_', str(name)), 1
+            while stem.lower() in used:
+                n += 1
+                stem = f"{_FILE_CHARS_RE.sub('_', str(name))}_{n}"
+            used.add(stem.lower())
+            targets[name] = f"{base}.{stem}.parquet"
+            continue
+        for n, (r0, c0, piece) in enumerate(pieces, start=1):
+            if mode == "files":
+                file = path if n == 1 else f"{base}_{n}{ext}"
+                title = name
+            else:
+                file = path
+                title = name if n == 1 else _piece_title(name, n)
+            placed.append([file, title, piece, name, (r0, c0)])
+
+    renames: List[str] = []
+    by_file: Dict[str, list] = {}
+    for entry in placed:
+        by_file.setdefault(entry[0], []).append(entry)
+    for entries in by_file.values():
+        for entry, title in zip(entries, sheet_titles([e[1] for e in entries], renames)):
+            entry[1] = title
+
+    books: Dict[str, dict] = {path: {}}
+    columnar: Dict[str, pd.DataFrame] = {}
+    for file, title, frame, name, at in placed:
+        books.setdefault(file, {})[title] = frame
+        if name in split and (at is None or at == (0, 0)):
+            rows, cols, count = split.pop(name)
+            lines.append(
+                f"Лист «{name}» ({rows} строк × {cols} столбцов) не помещается в лист Excel, "
+                f"частей: {count}"
+            )
+        if name in targets:
+            target = targets[name]
+            columnar[target] = result[name]
+            lines.append(
+                f"  «{name}»: первые {len(frame)} строк и {frame.shape[1]} столбцов; "
+                f"лист целиком — {os.path.basename(target)}"
+            )
+        elif at is not None:
+            lines.append(
+                f"  {os.path.basename(file)} / «{title}»: строки {at[0] + 1}–{at[0] + len(frame)}, "
+                f"столбцы {at[1] + 1}–{at[1] + frame.shape[1]}"
+            )
+    return books, columnar, lines + renames
+
+def _write_book(path: str, sheets: dict, options: dict, log=None) -> int:
+    if options.get("engine", "openpyxl") == "parts":
+        return write_xlsx(
+            path, sheets,
+            workers=options.get("workers", 0),
+            compression=options.get("compression", 6),
+            min_rows=options.get("min_rows", 100000),
+            log=log
+        )
     with pd.ExcelWriter(path, engine='openpyxl') as writer:
-        for sheet_name, df in result.items():
+        for sheet_name, df in sheets.items():
             if df.shape[1] == 0:
                 continue
             df.to_excel(writer, sheet_name=sheet_name, index=False)
 
     wb = load_workbook(path)
     for ws in wb.worksheets:
-        for col in ws.columns:
-            max_len = max(len(str(c.value)) if c.value else 0 for c in col[:4])
-            letter  = get_column_letter(col[0].column)
-            ws.column_dimensions[letter].width = max_len + 2
-
-            for cell in col[1:]: 
-                if isinstance(cell.value, (datetime, date)):
-                    cell.number_format = 'DD.MM.YYYY'
-                elif isinstance(cell.value, time):
-                    cell.number_format = 'HH:MM:SS'
+        _format_sheet(ws)
     wb.save(path)
+    return 1
+
+def write_result(path: str, result: dict, log: list, profile=None, options=None) -> str:
+    # options — раздел writer правил; .sqlite/.db — запись в базу SQLite
+    options = options or {}
+    if not isinstance(log, RunLog):
+        # Список вызывающего не меняется
+        log = list(log)
+    if is_sqlite(path):
+        lines = write_sqlite(path, result, log, options)
+        books, columnar = {}, {}
+    else:
+        books, columnar, lines = split_result(path, result, options)
+    log.extend(lines)
+
+    for target, df in columnar.items():
+        _to_parquet(df, target)
+    for book, sheets in books.items():
+        workers = _write_book(book, sheets, options, log)
+        if isinstance(log, RunLog) and options.get("engine", "openpyxl") == "parts":
+            log.append(
+                f"Запись листов{'' if book == path else ' ' + os.path.basename(book)}: "
+                f"процессов {workers}, уровень сжатия {options.get('compression', 6)}"
+            )
 
     log_path = os.path.splitext(path)[0] + ".log"
-    with open(log_path, 'w', encoding='utf-8') as f:
-        f.write("\n".join(log))
+    if isinstance(log, RunLog):
+        log.save(log_path)
+    else:
+        with open(log_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(log))
 
-    QtWidgets.QMessageBox.information(
-        None, "Готово", f"Сохранено: {path}\nЛог: {log_path}"
-    )
+    if profile is not None and profile.enabled:
+        profile.save(os.path.splitext(path)[0] + ".profile.json")
+
+    return log_path
@@ -0,0 +1,334 @@
+import os
+import re
+import math
+import contextlib
+import shutil
+import tempfile
+import zipfile
+import multiprocessing
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, time, timedelta
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+from app.processing.backends import _NS, _sheet_part
+from app.processing.spill import Part, SpilledPart, save_part, load_part
+
+# Запись xlsx по частям: XML каждого листа формируется независимо
+# (в дочерних процессах для больших результатов), затем пакет собирается
+# в zip. Строки пишутся как inlineStr — общая таблица строк не нужна.
+
+_ILLEGAL_XML_RE = re.compile(r"[\000-\010]|[\013-\014]|[\016-\037]")
+_EPOCH = datetime(1899, 12, 30)
+_CHUNK_ROWS = 10000
+
+# Индексы стилей из _STYLES_XML
+_STYLE_DATE = 1
+_STYLE_TIME = 2
+
+_STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="2"><numFmt numFmtId="164" formatCode="DD.MM.YYYY"/>'
+    '<numFmt numFmtId="165" formatCode="HH:MM:SS"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+def _text(ref: str, s: str) -> str:
+    # Управляющие символы недопустимы в XML (openpyxl на них падает)
+    s = _ILLEGAL_XML_RE.sub("", s)
+    space = ' xml:space="preserve"' if s != s.strip() else ""
+    return f'<c r="{ref}" t="inlineStr"><is><t{space}>{escape(s)}</t></is></c>'
+
+def _cell(ref: str, v) -> str:
+    if v is None or v is pd.NA or v is pd.NaT:
+        return ""
+    if isinstance(v, (bool, np.bool_)):
+        return f'<c r="{ref}" t="b"><v>{int(v)}</v></c>'
+    if isinstance(v, (int, np.integer)):
+        return f'<c r="{ref}"><v>{int(v)}</v></c>'
+    if isinstance(v, (float, np.floating)):
+        if math.isnan(v):
+            return ""
+        if math.isinf(v):
+            return _text(ref, "inf" if v > 0 else "-inf")
+        return f'<c r="{ref}"><v>{float(v)!r}</v></c>'
+    if isinstance(v, str):
+        return _text(ref, v)
+    if isinstance(v, datetime):
+        serial = (v.replace(tzinfo=None) - _EPOCH).total_seconds() / 86400
+        return f'<c r="{ref}" s="{_STYLE_DATE}"><v>{serial!r}</v></c>'
+    if isinstance(v, date):
+        return f'<c r="{ref}" s="{_STYLE_DATE}"><v>{(v - _EPOCH.date()).days}</v></c>'
+    if isinstance(v, time):
+        serial = (v.hour * 3600 + v.minute * 60 + v.second + v.microsecond / 1e6) / 86400
+        return f'<c r="{ref}" s="{_STYLE_TIME}"><v>{serial!r}</v></c>'
+    if isinstance(v, timedelta):
+        return f'<c r="{ref}"><v>{v.total_seconds() / 86400!r}</v></c>'
+    return _text(ref, str(v))
+
+def _width(v) -> int:
+    # Как _format_sheet: длина текста значения, пустые и «ложные» — 0
+    if v is None or v is pd.NA or v is pd.NaT or (isinstance(v, float) and math.isnan(v)):
+        return 0
+    return len(str(v)) if v else 0
+
+def render_sheet(df: pd.DataFrame, path: str):
+    render_frames([df], list(df.columns), len(df), path)
+
+def render_frames(frames: Iterable[pd.DataFrame], columns: list, rows: int, path: str):
+    # Лист из кадров, записанных подряд (части листа из разных файлов), без
+    # общего кадра в памяти; каждый кадр приводится к столбцам columns
+    def aligned(df):
+        return df if list(df.columns) == columns else df.reindex(columns=columns)
+
+    frames = map(aligned, frames)
+    first, n = [], 0
+    for df in frames:
+        first.append(df)
+        n += len(df)
+        if n >= 3:
+            break
+    head = [row for df in first for row in df.head(3).to_numpy(dtype=object)][:3]
+    letters = [get_column_letter(i) for i in range(1, len(columns) + 1)]
+    widths = [
+        max([_width(c)] + [_width(row[j]) for row in head]) + 2
+        for j, c in enumerate(columns)
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        )
+        if letters:
+            f.write(f'<dimension ref="A1:{letters[-1]}{rows + 1}"/>')
+            f.write("<cols>")
+            for j, w in enumerate(widths, start=1):
+                f.write(f'<col min="{j}" max="{j}" width="{w}" customWidth="1"/>')
+            f.write("</cols>")
+        f.write('<sheetData><row r="1">')
+        f.write("".join(_text(f"{l}1", str(c)) for l, c in zip(letters, columns)))
+        f.write("</row>")
+        i = 2
+        for df in chain(first, frames):
+            for start in range(0, len(df), _CHUNK_ROWS):
+                block = df.iloc[start:start + _CHUNK_ROWS].to_numpy(dtype=object)
+                out = []
+                for row in block:
+                    out.append(f'<row r="{i}">')
+                    out.extend(_cell(f"{l}{i}", v) for l, v in zip(letters, row))
+                    out.append("</row>")
+                    i += 1
+                f.write("".join(out))
+        f.write("</sheetData></worksheet>")
+
+def _render_part(part: SpilledPart, path: str) -> str:
+    render_sheet(load_part(part), path)
+    return path
+
+def sheet_titles(names, log=None) -> List[str]:
+    # Ограничения Excel: не длиннее 31 символа, без []:*?/\ и без повторов
+    # (без учёта регистра); каждое переименование записывается в лог
+    titles, used = [], set()
+    for name in names:
+        clean = re.sub(r"[\[\]:*?/\\]", "_", str(name))
+        base = clean[:31] or "Лист"
+        title, n = base, 1
+        while title.lower() in used:
+            n += 1
+            suffix = f"_{n}"
+            title = base[:31 - len(suffix)] + suffix
+        used.add(title.lower())
+        titles.append(title)
+        if log is not None and title != str(name):
+            reasons = []
+            if clean != str(name):
+                reasons.append("недопустимые символы")
+            if len(clean) > 31:
+                reasons.append("длиннее 31 символа")
+            if not clean:
+                reasons.append("пустое имя")
+            if title != base:
+                reasons.append("повтор имени")
+            log.append(f"Лист «{name}» записан как «{title}»: {', '.join(reasons)}")
+    return titles
+
+def _package(path: str, titles: List[str], parts: list, compression: int):
+    # parts — файлы XML листов или пары (книга, часть) для переноса из другой книги
+    method = zipfile.ZIP_STORED if compression == 0 else zipfile.ZIP_DEFLATED
+    level = None if compression == 0 else compression
+    n = len(titles)
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        + "".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, n + 1)
+        )
+        + '</Types>'
+    )
+    root_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/></Relationships>'
+    )
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<bookViews><workbookView activeTab="0"/></bookViews><sheets>'
+        + "".join(
+            f'<sheet name={quoteattr(t)} sheetId="{i}" r:id="rId{i}"/>'
+            for i, t in enumerate(titles, start=1)
+        )
+        + '</sheets></workbook>'
+    )
+    workbook_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + "".join(
+            f'<Relationship Id="rId{i}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, n + 1)
+        )
+        + f'<Relationship Id="rId{n + 1}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/></Relationships>'
+    )
+    with zipfile.ZipFile(path, 'w', compression=method, compresslevel=level) as zf:
+        zf.writestr("[Content_Types].xml", content_types)
+        zf.writestr("_rels/.rels", root_rels)
+        zf.writestr("xl/workbook.xml", workbook)
+        zf.writestr("xl/_rels/workbook.xml.rels", workbook_rels)
+        zf.writestr("xl/styles.xml", _STYLES_XML)
+        for i, part in enumerate(parts, start=1):
+            arc = f"xl/worksheets/sheet{i}.xml"
+            if isinstance(part, str):
+                zf.write(part, arc)
+                continue
+            # XML листа переносится без разбора и без повторного формирования
+            src, member = part
+            big = src.getinfo(member).file_size >= zipfile.ZIP64_LIMIT
+            with src.open(member) as s, zf.open(arc, 'w', force_zip64=big) as d:
+                shutil.copyfileobj(s, d, 1 << 20)
+
+def write_xlsx(
+    path: str,
+    sheets: Dict[str, pd.DataFrame],
+    workers: int = 0,
+    compression: int = 6,
+    min_rows: int = 100000,
+    log=None
+) -> int:
+    # Возвращает число процессов, которые формировали листы (1 — без пула)
+    sheets = {name: df for name, df in sheets.items() if df.shape[1] > 0} or {"Лист1": pd.DataFrame()}
+    titles = sheet_titles(sheets, log)
+    frames = list(sheets.values())
+    workers = max(1, min(workers or os.cpu_count() or 1, len(frames)))
+    if sum(len(df) for df in frames) < min_rows:
+        # Запуск процессов дороже записи небольшого результата
+        workers = 1
+
+    tmp = tempfile.mkdtemp(prefix="xlsx_parts_", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        parts = [os.path.join(tmp, f"sheet{i}.xml") for i in range(1, len(frames) + 1)]
+        if workers == 1:
+            for df, part in zip(frames, parts):
+                render_sheet(df, part)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as pool:
+                futures = [
+                    pool.submit(_render_part, save_part(df, os.path.join(tmp, f"data{i}")), part)
+                    for i, (df, part) in enumerate(zip(frames, parts), start=1)
+                ]
+                for fut in futures:
+                    fut.result()
+        _package(path, titles, parts, compression)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return workers
+
+def package_sheets(path: str) -> Optional[Dict[str, str]]:
+    # Листы книги, записанной write_xlsx: название → часть пакета;
+    # None — книги нет или она записана не здесь (общая таблица строк,
+    # другие стили), и её листы переносить нельзя
+    try:
+        zf = zipfile.ZipFile(path)
+    except (OSError, zipfile.BadZipFile):
+        return None
+    with zf:
+        names = set(zf.namelist())
+        if "xl/sharedStrings.xml" in names or "xl/styles.xml" not in names:
+            return None
+        if zf.read("xl/styles.xml") != _STYLES_XML.encode("utf-8"):
+            return None
+        wb = ET.fromstring(zf.read("xl/workbook.xml"))
+        titles = [sh.get("name") for sh in wb.iterfind("m:sheets/m:sheet", _NS)]
+        parts = {t: _sheet_part(zf, t) for t in titles}
+    return {t: p for t, p in parts.items() if p in names}
+
+def update_xlsx(
+    path: str,
+    sheets: Dict[str, Tuple[list, List[Part]]],
+    changed: Set[str],
+    compression: int = 6,
+    log=None
+) -> List[str]:
+    # sheets — все листы книги по порядку: столбцы и части листа (кадры или
+    # выгруженные на диск). Заново формируются только листы из changed и
+    # листы, которых нет в прежней книге; XML остальных копируется из неё.
+    # Возвращает имена сформированных листов.
+    sheets = sheets or {"Лист1": ([], [])}
+    titles = sheet_titles(sheets, log)
+    old = package_sheets(path) or {}
+    rendered = []
+    tmp = tempfile.mkdtemp(prefix="xlsx_parts_", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        target = os.path.join(tmp, "book.xlsx")
+        with contextlib.ExitStack() as stack:
+            src = stack.enter_context(zipfile.ZipFile(path)) if old else None
+            parts = []
+            for i, (title, (name, (columns, frames))) in enumerate(zip(titles, sheets.items()), start=1):
+                if name not in changed and title in old:
+                    parts.append((src, old[title]))
+                    continue
+                part = os.path.join(tmp, f"sheet{i}.xml")
+                rows = sum(p.rows if isinstance(p, SpilledPart) else len(p) for p in frames)
+                render_frames((load_part(p) for p in frames), columns, rows, part)
+                parts.append(part)
+                rendered.append(name)
+            _package(target, titles, parts, compression)
+        os.replace(target, path)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return rendered
@@ -1,6 +1,9 @@
 from PySide6 import QtWidgets, QtCore
 from PySide6.QtWidgets import QMessageBox
 from app.config import save_rules
+from app.processing.similarity import METHODS as SIMILARITY_METHODS
+from app.processing.decisions import DecisionStore, DEFAULT_PATH as DECISIONS_PATH, KINDS as DECISION_KINDS
+from app.processing.preview import HOW_TITLES
 
 _original_question = QMessageBox.question
 def _localized_question(parent, title, text,
@@ -77,6 +80,22 @@ class ColumnsDialog(QtWidgets.QDialog):
         self.spin_thr.setValue(self.cfg.get("threshold", 80))
         fl.addRow("Порог схожести заголовков (0–100):", self.spin_thr)
 
+        self.cmb_similarity = QtWidgets.QComboBox()
+        for key, title in SIMILARITY_METHODS.items():
+            self.cmb_similarity.addItem(title, key)
+        idx = self.cmb_similarity.findData(self.cfg.get("similarity", "spacy"))
+        self.cmb_similarity.setCurrentIndex(max(idx, 0))
+        fl.addRow("Метод сходства заголовков:", self.cmb_similarity)
+
+        self.chk_cascade = QtWidgets.QCheckBox("Каскад: явно непохожие пары отсеивать без модели")
+        self.chk_cascade.setChecked(self.cfg.get("cascade", False))
+        fl.addRow(self.chk_cascade)
+
+        self.spin_margin = QtWidgets.QSpinBox()
+        self.spin_margin.setRange(0, 100)
+        self.spin_margin.setValue(self.cfg.get("cascade_margin", 30))
+        fl.addRow("Отсеивать, если ниже порога более чем на:", self.spin_margin)
+
         self.chk_auto = QtWidgets.QCheckBox("Объединять автоматически")
         self.chk_auto.setChecked(self.cfg.get("auto_merge", True))
         fl.addRow(self.chk_auto)
@@ -85,6 +104,17 @@ class ColumnsDialog(QtWidgets.QDialog):
         self.chk_content.setChecked(self.cfg.get("use_content", False))
         fl.addRow(self.chk_content)
 
+        self.cmb_content = QtWidgets.QComboBox()
+        self.cmb_content.addItem("Выборка строк (имена собственные, spaCy)", "sample")
+        self.cmb_content.addItem("MinHash по всем значениям столбца", "minhash")
+        idx = self.cmb_content.findData(self.cfg.get("content_method", "sample"))
+        self.cmb_content.setCurrentIndex(max(idx, 0))
+        fl.addRow("Метод сравнения содержимого:", self.cmb_content)
+
+        self.chk_lsh = QtWidgets.QCheckBox("LSH: сравнивать только пары-кандидаты (для широких листов)")
+        self.chk_lsh.setChecked(self.cfg.get("lsh", False))
+        fl.addRow(self.chk_lsh)
+
         self.spin_content_rows = QtWidgets.QSpinBox()
         self.spin_content_rows.setRange(1, 1000)
         self.spin_content_rows.setValue(self.cfg.get("content_rows", 10))
@@ -100,7 +130,11 @@ class ColumnsDialog(QtWidgets.QDialog):
         v.addWidget(self.grp_settings)
 
         self.chk_content.stateChanged.connect(self._update_content_state)
+        self.cmb_content.currentIndexChanged.connect(self._update_content_state)
         self._update_content_state()
+        self.cmb_similarity.currentIndexChanged.connect(self._update_cascade_state)
+        self.chk_cascade.stateChanged.connect(self._update_cascade_state)
+        self._update_cascade_state()
 
         bb = QtWidgets.QDialogButtonBox(
             QtWidgets.QDialogButtonBox.Save |
@@ -133,9 +167,17 @@ class ColumnsDialog(QtWidgets.QDialog):
 
     def _update_content_state(self):
         content_ok = self.chk_content.isChecked()
-        self.spin_content_rows.setDisabled(not content_ok)
+        minhash = self.cmb_content.currentData() == "minhash"
+        self.cmb_content.setDisabled(not content_ok)
+        self.spin_content_rows.setDisabled(not content_ok or minhash)
+        self.chk_lsh.setDisabled(not content_ok or not minhash)
         self.dsb_alpha.setDisabled(not content_ok)
 
+    def _update_cascade_state(self):
+        model = self.cmb_similarity.currentData() == "spacy"
+        self.chk_cascade.setDisabled(not model)
+        self.spin_margin.setDisabled(not (model and self.chk_cascade.isChecked()))
+
     def accept(self):
         self.cfg["enabled"] = not self.chk_disable.isChecked()
 
@@ -158,7 +200,12 @@ class ColumnsDialog(QtWidgets.QDialog):
         self.cfg["auto_merge"]   = self.chk_auto.isChecked()
         self.cfg["use_content"]  = self.chk_content.isChecked()
         self.cfg["content_rows"] = self.spin_content_rows.value()
+        self.cfg["content_method"] = self.cmb_content.currentData()
+        self.cfg["lsh"]          = self.chk_lsh.isChecked()
         self.cfg["header_weight"]= self.dsb_alpha.value()
+        self.cfg["similarity"]   = self.cmb_similarity.currentData()
+        self.cfg["cascade"]      = self.chk_cascade.isChecked()
+        self.cfg["cascade_margin"] = self.spin_margin.value()
 
         super().accept()
 
@@ -618,6 +665,141 @@ class ReplaceWordsDialog(QtWidgets.QDialog):
         super().accept()
 
 
+class DecisionsDialog(QtWidgets.QDialog):
+    def __init__(self, parent, rules):
+        super().__init__(parent)
+        self.setWindowTitle("Сохранённые решения")
+        self.resize(700, 450)
+        self.cfg = rules["decisions"]
+        self.store = DecisionStore(self.cfg.get("path") or DECISIONS_PATH)
+        self.entries = self.store.entries()
+        self._init_ui()
+
+    def _init_ui(self):
+        v = QtWidgets.QVBoxLayout(self)
+
+        self.table = QtWidgets.QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Вопрос", "Значение", "Вариант", "Ответ", "Дата"])
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self._fill_table()
+        v.addWidget(self.table)
+
+        btns = QtWidgets.QHBoxLayout()
+        self.btn_del = QtWidgets.QPushButton("Удалить выбранные")
+        self.btn_del.clicked.connect(self.del_selected)
+        self.btn_clear = QtWidgets.QPushButton("Очистить все")
+        self.btn_clear.clicked.connect(self.clear_all)
+        btns.addWidget(self.btn_del)
+        btns.addWidget(self.btn_clear)
+        v.addLayout(btns)
+
+        self.chk_enabled = QtWidgets.QCheckBox("Запоминать ответы на вопросы о слиянии и замене")
+        self.chk_enabled.setChecked(self.cfg.get("enabled", True))
+        v.addWidget(self.chk_enabled)
+
+        bb = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Save |
+            QtWidgets.QDialogButtonBox.Cancel
+        )
+        localize_buttonbox(bb)
+        bb.accepted.connect(self.accept)
+        bb.rejected.connect(self.reject)
+        v.addWidget(bb)
+
+    def _fill_table(self):
+        self.table.setRowCount(0)
+        for e in self.entries:
+            r = self.table.rowCount()
+            self.table.insertRow(r)
+            if e["accepted"]:
+                answer = f"да → {e['value']}" if e.get("value") else "да"
+            else:
+                answer = "нет"
+            row = [
+                DECISION_KINDS.get(e["kind"], e["kind"]),
+                e["pair"][0], e["pair"][1], answer, e.get("updated", "")
+            ]
+            for c, text in enumerate(row):
+                self.table.setItem(r, c, QtWidgets.QTableWidgetItem(str(text)))
+        self.table.resizeColumnsToContents()
+
+    def del_selected(self):
+        rows = {idx.row() for idx in self.table.selectionModel().selectedRows()}
+        self.entries = [e for i, e in enumerate(self.entries) if i not in rows]
+        self._fill_table()
+
+    def clear_all(self):
+        if QMessageBox.question(self, "Сохранённые решения", "Удалить все сохранённые решения?") == QMessageBox.Yes:
+            self.entries = []
+            self._fill_table()
+
+    def accept(self):
+        self.cfg["enabled"] = self.chk_enabled.isChecked()
+        kept = {id(e) for e in self.entries}
+        removed = [e for e in self.store.entries() if id(e) not in kept]
+        if removed:
+            self.store.remove(removed)
+            self.store.save()
+        super().accept()
+
+class PreviewDialog(QtWidgets.QDialog):
+    def __init__(self, parent, report):
+        super().__init__(parent)
+        self.setWindowTitle("Предпросмотр объединения")
+        self.resize(800, 500)
+        self.report = report
+        self._init_ui()
+
+    def _init_ui(self):
+        v = QtWidgets.QVBoxLayout(self)
+        r = self.report
+        v.addWidget(QtWidgets.QLabel(
+            f"Обработаны первые {r.rows} строк каждого листа за {r.duration_s:.1f} с. "
+            "Ответы на вопросы сохранены и будут использованы при объединении."
+        ))
+
+        tabs = QtWidgets.QTabWidget()
+        tabs.addTab(self._table(
+            ["Файл", "Лист", "Итоговый лист"],
+            [(s["file"], s["source"], s["target"]) for s in r.sheets]
+            + [("", m["source"], m["target"]) for m in r.sheet_merges]
+        ), "Листы")
+        tabs.addTab(self._table(
+            ["Лист", "Столбцы", "Итоговый столбец", "Способ", "Сходство, %"],
+            [
+                (m["sheet"], " + ".join(map(str, m["columns"])), m["target"],
+                 HOW_TITLES.get(m["how"], m["how"]),
+                 "" if m.get("score") is None else round(m["score"]))
+                for m in r.column_merges
+            ]
+        ), "Столбцы")
+        tabs.addTab(self._table(["Правило", "Значение", "Срабатываний"], r.hits), "Замены и фильтры")
+        tabs.addTab(self._table(
+            ["Лист", "Строк в выборке", "Столбцов"],
+            [(name, rows, cols) for name, (rows, cols) in r.shapes.items()]
+        ), "Результат")
+        v.addWidget(tabs)
+
+        bb = QtWidgets.QDialogButtonBox()
+        bb.addButton("Объединить", QtWidgets.QDialogButtonBox.AcceptRole)
+        bb.addButton("Закрыть", QtWidgets.QDialogButtonBox.RejectRole)
+        bb.accepted.connect(self.accept)
+        bb.rejected.connect(self.reject)
+        v.addWidget(bb)
+
+    def _table(self, headers, rows):
+        table = QtWidgets.QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        for row in rows:
+            i = table.rowCount()
+            table.insertRow(i)
+            for c, value in enumerate(row):
+                table.setItem(i, c, QtWidgets.QTableWidgetItem(str(value)))
+        table.resizeColumnsToContents()
+        return table
+
 class RulesManagerDialog(QtWidgets.QDialog):
     def __init__(self, parent, rules):
         super().__init__(parent)
@@ -633,7 +815,8 @@ class RulesManagerDialog(QtWidgets.QDialog):
             ("Листы",                 self.open_sheets),
             ("Фильтр слов",           self.open_filter),
             ("Замена слов",           self.open_replace),
-            ("Фильтр слов по столбцам", self.open_column_filter)
+            ("Фильтр слов по столбцам", self.open_column_filter),
+            ("Сохранённые решения",   self.open_decisions)
         ]
         for txt, fn in btns:
             b = QtWidgets.QPushButton(txt)
@@ -684,6 +867,10 @@ class RulesManagerDialog(QtWidgets.QDialog):
         dlg = ColumnWordFilterDialog(self, self.rules["column_word_filter"])
         dlg.exec()
 
+    def open_decisions(self):
+        dlg = DecisionsDialog(self, self.rules)
+        dlg.exec()
+
     def save_and_close(self):
         save_rules(self.rules)
         self.accept()
@@ -2,9 +2,16 @@ import os
 import logging
 from PySide6 import QtWidgets
 from app.config import load_rules
-from app.ui.dialogs import RulesManagerDialog
+from app.ui.dialogs import RulesManagerDialog, PreviewDialog
+from app.ui.result_view import ResultWindow
 from app.processing.reader import process_files
-from app.processing.writer import save_result
+from app.processing.preview import preview_files
+from app.processing.decisions import DecisionStore
+from app.processing.writer import save_result, ask_save_path
+from app.processing.streaming import stream_files
+from app.processing.profiler import RunProfile
+from app.processing.runlog import RunLog
+from app.processing.transformer import model_calls
 
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self):
@@ -13,6 +20,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.rules = load_rules()
         self.files = []
         self.log = []
+        self.result = {}
+        # Ответы, данные при предпросмотре, если сохранение решений отключено
+        self.session_decisions = DecisionStore()
         self._init_ui()
 
     def _init_ui(self):
@@ -36,16 +46,27 @@ class MainWindow(QtWidgets.QMainWindow):
         b_rules.clicked.connect(self.manage_rules)
         v.addWidget(b_rules)
 
+        b_preview = QtWidgets.QPushButton("Предпросмотр")
+        b_preview.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        b_preview.clicked.connect(self.preview)
+        v.addWidget(b_preview)
+
         b_merge = QtWidgets.QPushButton("Объединить")
         b_merge.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
         b_merge.clicked.connect(self.merge_all)
         v.addWidget(b_merge)
 
+        self.b_result = QtWidgets.QPushButton("Просмотр результата")
+        self.b_result.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        self.b_result.clicked.connect(self.show_result)
+        self.b_result.setEnabled(False)
+        v.addWidget(self.b_result)
+
         self.setCentralWidget(cw)
 
     def add_files(self):
         paths, _ = QtWidgets.QFileDialog.getOpenFileNames(
-            self, "Выберите файлы", "", "Excel (*.xls *.xlsx)"
+            self, "Выберите файлы", "", "Таблицы (*.xls *.xlsx *.csv *.tsv);;Excel (*.xls *.xlsx);;CSV (*.csv *.tsv)"
         )
         for p in paths:
             if p not in self.files:
@@ -63,13 +84,36 @@ class MainWindow(QtWidgets.QMainWindow):
         dlg.exec()
         self.rules = load_rules()
 
+    def preview(self):
+        if not self.files:
+            QtWidgets.QMessageBox.warning(self, "Ошибка", "Добавьте файлы для объединения")
+            return
+        try:
+            report = preview_files(self.files, self.rules, session=self.session_decisions)
+        except Exception as e:
+            logging.exception("Ошибка при предпросмотре")
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Ошибка",
+                f"{e}\n\nПодробности см. в файле app.log"
+            )
+            return
+        if PreviewDialog(self, report).exec() == QtWidgets.QDialog.Accepted:
+            self.merge_all()
+
     def merge_all(self):
         if not self.files:
             QtWidgets.QMessageBox.warning(self, "Ошибка", "Добавьте файлы для объединения")
             return
+        if self.rules["streaming"].get("enabled", False):
+            self.merge_streaming()
+            return
+        self._close_log()
         try:
-            result, self.log = process_files(self.files, self.rules)
-            save_result(result, self.log)
+            profile = RunProfile.from_rules(self.rules, model_calls=model_calls)
+            self.result, self.log = process_files(self.files, self.rules, profile, session=self.session_decisions)
+            self.b_result.setEnabled(True)
+            save_result(self.result, self.log, profile, self.rules["writer"])
         except Exception as e:
             logging.exception("Ошибка при объединении файлов")
             QtWidgets.QMessageBox.critical(
@@ -77,3 +121,34 @@ class MainWindow(QtWidgets.QMainWindow):
                 "Ошибка",
                 f"{e}\n\nПодробности см. в файле app.log"
             )
+
+    def _close_log(self):
+        if isinstance(self.log, RunLog):
+            self.log.close()
+        self.log = []
+
+    def show_result(self):
+        ResultWindow(self, self.result, self.log).show()
+
+    def merge_streaming(self):
+        path = ask_save_path()
+        if not path:
+            return
+        # Потоковый режим не держит результат в памяти
+        self.result = {}
+        self.b_result.setEnabled(False)
+        self._close_log()
+        try:
+            profile = RunProfile.from_rules(self.rules, model_calls=model_calls)
+            self.log = stream_files(self.files, self.rules, path, profile, session=self.session_decisions)
+            QtWidgets.QMessageBox.information(
+                self, "Готово",
+                f"Сохранено: {path}\nЛог: {os.path.splitext(path)[0]}.log"
+            )
+        except Exception as e:
+            logging.exception("Ошибка при потоковом объединении файлов")
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Ошибка",
+                f"{e}\n\nПодробности см. в файле app.log"
+            )
\ No newline at end of file
@@ -0,0 +1,200 @@
+import re
+from collections import OrderedDict
+from datetime import datetime, date, time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from PySide6 import QtWidgets, QtCore
+
+from app.processing.runlog import RunLog, KIND_TITLES
+
+def _display(v) -> str:
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return ""
+    if isinstance(v, datetime):
+        return v.strftime("%d.%m.%Y %H:%M:%S" if v.time() != time() else "%d.%m.%Y")
+    if isinstance(v, date):
+        return v.strftime("%d.%m.%Y")
+    if isinstance(v, float):
+        return f"{v:g}"
+    return str(v)
+
+class DataFrameModel(QtCore.QAbstractTableModel):
+    # Таблица не копирует DataFrame: представление запрашивает только
+    # видимые ячейки, а значения читаются блоками строк по запросу.
+    BLOCK_ROWS = 256
+    MAX_BLOCKS = 16
+
+    def __init__(self, df: pd.DataFrame, parent=None):
+        super().__init__(parent)
+        self._df = df
+        self._columns = [str(c) for c in df.columns]
+        self._blocks: "OrderedDict[int, list]" = OrderedDict()
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._df)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def _block(self, row: int) -> list:
+        start = row - row % self.BLOCK_ROWS
+        block = self._blocks.get(start)
+        if block is None:
+            block = self._df.iloc[start:start + self.BLOCK_ROWS].to_numpy(dtype=object).tolist()
+            self._blocks[start] = block
+            if len(self._blocks) > self.MAX_BLOCKS:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(start)
+        return block
+
+    def value(self, row: int, column: int):
+        return self._block(row)[row % self.BLOCK_ROWS][column]
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return _display(self.value(index.row(), index.column()))
+        if role == QtCore.Qt.TextAlignmentRole:
+            v = self.value(index.row(), index.column())
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return self._columns[section]
+        return str(section + 1)
+
+def column_stats(s: pd.Series) -> List[tuple]:
+    rows = [
+        ("Тип", str(s.dtype)),
+        ("Заполнено", f"{int(s.notna().sum())} из {len(s)}"),
+        ("Различных значений", str(s.nunique())),
+    ]
+    values = s.dropna()
+    if values.empty:
+        return rows
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        rows += [("Минимум", _display(values.min())), ("Максимум", _display(values.max())),
+                 ("Среднее", _display(float(values.mean())))]
+    else:
+        for v, n in values.astype(str).value_counts().head(5).items():
+            rows.append((f"«{v}»", str(n)))
+    return rows
+
+class LogIndex:
+    # Записи лога по листу и столбцу. Строится один раз на результат:
+    # окно открыто и после закрытия лога, а щелчок по столбцу не
+    # просматривает весь лог. Записи без листа (None) относятся ко всем листам.
+    _QUOTED_RE = re.compile(r"'([^']*)'")
+    _SHEET_RE = re.compile(r"(?:\(лист|^Лист) «(.*?)»")
+
+    def __init__(self, log: RunLog):
+        self._counters: Dict[Tuple[Optional[str], str], Dict[str, int]] = {}
+        self._lines: Dict[Tuple[Optional[str], str], Dict[str, None]] = {}
+        for (sheet, column, kind), n in log.column_counters.items():
+            if column is not None:
+                kinds = self._counters.setdefault((sheet, column), {})
+                kinds[kind] = kinds.get(kind, 0) + n
+        for events in log.examples.values():
+            for ev in events:
+                if ev.column is not None:
+                    self._lines.setdefault((ev.sheet, ev.column), {})[ev.describe()] = None
+        # Строки лога без структуры (слияния столбцов и т. п.) — по именам
+        # в кавычках и пометке листа
+        for line in log:
+            m = self._SHEET_RE.search(line)
+            sheet = m.group(1) if m else None
+            for column in set(self._QUOTED_RE.findall(line)):
+                self._lines.setdefault((sheet, column), {})[line] = None
+
+    def entries(self, sheet: str, column: str) -> List[str]:
+        kinds: Dict[str, int] = {}
+        lines: Dict[str, None] = {}
+        for key in ((None, column), (sheet, column)):
+            for kind, n in self._counters.get(key, {}).items():
+                kinds[kind] = kinds.get(kind, 0) + n
+            lines.update(self._lines.get(key, {}))
+        counts = [f"{KIND_TITLES.get(kind, kind)}: {n}" for kind, n in sorted(kinds.items())]
+        return counts + list(lines)
+
+class SheetView(QtWidgets.QWidget):
+    def __init__(self, name: str, df: pd.DataFrame, log_index: Optional[LogIndex], parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.df = df
+        self.log_index = log_index
+        self._stats: Dict[int, List[tuple]] = {}
+        self._init_ui()
+
+    def _init_ui(self):
+        h = QtWidgets.QHBoxLayout(self)
+        split = QtWidgets.QSplitter()
+        h.addWidget(split)
+
+        self.model = DataFrameModel(self.df, self)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.model)
+        # Фиксированная высота строк — иначе заголовок измеряет все строки
+        vh = self.table.verticalHeader()
+        vh.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        vh.setDefaultSectionSize(self.table.fontMetrics().height() + 6)
+        self.table.horizontalHeader().setDefaultSectionSize(140)
+        self.table.horizontalHeader().sectionClicked.connect(self.show_column)
+        self.table.selectionModel().currentColumnChanged.connect(lambda cur, _: self.show_column(cur.column()))
+        split.addWidget(self.table)
+
+        side = QtWidgets.QWidget()
+        v = QtWidgets.QVBoxLayout(side)
+        self.lbl_column = QtWidgets.QLabel(f"{len(self.df)} строк × {self.df.shape[1]} столбцов")
+        self.lbl_column.setWordWrap(True)
+        v.addWidget(self.lbl_column)
+        self.stats = QtWidgets.QTableWidget(0, 2)
+        self.stats.setHorizontalHeaderLabels(["Показатель", "Значение"])
+        self.stats.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.stats.verticalHeader().hide()
+        v.addWidget(self.stats)
+        v.addWidget(QtWidgets.QLabel("Записи лога по столбцу:"))
+        self.log_list = QtWidgets.QListWidget()
+        v.addWidget(self.log_list)
+        split.addWidget(side)
+        split.setStretchFactor(0, 3)
+        split.setStretchFactor(1, 1)
+
+    def show_column(self, column: int):
+        if column < 0:
+            return
+        name = self.model.headerData(column, QtCore.Qt.Horizontal)
+        self.lbl_column.setText(f"Столбец «{name}»")
+        if column not in self._stats:
+            self._stats[column] = column_stats(self.df.iloc[:, column])
+        self.stats.setRowCount(0)
+        for key, value in self._stats[column]:
+            r = self.stats.rowCount()
+            self.stats.insertRow(r)
+            self.stats.setItem(r, 0, QtWidgets.QTableWidgetItem(key))
+            self.stats.setItem(r, 1, QtWidgets.QTableWidgetItem(value))
+        self.stats.resizeColumnsToContents()
+
+        self.log_list.clear()
+        if self.log_index is not None:
+            for line in self.log_index.entries(self.name, name):
+                self.log_list.addItem(line)
+
+class ResultWindow(QtWidgets.QDialog):
+    def __init__(self, parent, result: Dict[str, pd.DataFrame], log: Optional[RunLog] = None):
+        super().__init__(parent)
+        self.setWindowTitle("Результат объединения")
+        self.setWindowFlag(QtCore.Qt.WindowMaximizeButtonHint)
+        self.resize(1100, 650)
+        v = QtWidgets.QVBoxLayout(self)
+        tabs = QtWidgets.QTabWidget()
+        log_index = LogIndex(log) if isinstance(log, RunLog) else None
+        for name, df in result.items():
+            tabs.addTab(SheetView(name, df, log_index), f"{name} ({len(df)})")
+        v.addWidget(tabs)
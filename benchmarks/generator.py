@@ -0,0 +1,220 @@
+import os
+import random
+from datetime import date, timedelta
+from typing import List, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+
+from app.config import apply_defaults
+
+GROUPS = ["Общие сведения", "Измерения", "Состояние"]
+
+BASE_COLUMNS = [
+    ("№",            "id"),
+    ("Кличка",       "names"),
+    ("Возраст",      "int"),
+    ("Пол",          "sex"),
+    ("Вес",          "float"),
+    ("Вакцинация",   "vaccine"),
+    ("Дата осмотра", "date"),
+    ("Длина",        "length"),
+    ("Температура",  "float"),
+    ("Объём",        "volume"),
+    ("Пульс",        "int"),
+    ("Порода",       "breed"),
+    ("Рост",         "int"),
+    ("Расстояние",   "distance"),
+    ("Счёт",         "int"),
+    ("Толщина",      "thickness"),
+    ("Сумма",        "float"),
+    ("Хозяин",       "names"),
+    ("Кол-во",       "int"),
+    ("Статус",       "status"),
+]
+
+HEADER_SYNONYMS = {
+    "Вакцинация": ["Вакц-я", "вакц", "Вакцинация"],
+    "Кличка":     ["Кличка", "Имя животного"],
+    "Длина":      ["Длина", "Длина тела"],
+}
+
+SHEET_NAMES = ["Животные", "Животные 1", "животные_2", "Живот.", "Учёт", "Учет", "Учёт (копия)"]
+
+TAIL_KEYWORDS = ["Примечание", "Калькулятор"]
+
+_VALUES = {
+    "names":     ["Барсик", "Мурка", "Шарик", "Бобик", "Рекс", "Жучка", "Васька", "Лиса"],
+    "sex":       ["самец", "самка", "мужской", "женский", "Самец", "Самка"],
+    "vaccine":   ["Да", "Нет", "есть", "да", "ожидание"],
+    "breed":     ["дворняга", "сиамская", "овчарка", "спаниель", "персидская"],
+    "status":    ["здоров", "на лечении", "ожидание осмотра", "выбыл"],
+}
+
+_UNITS = {
+    "length":    ("см", "м"),
+    "volume":    ("мл", "л"),
+    "distance":  ("м", "км"),
+    "thickness": ("мм", "см"),
+}
+
+def _value(kind: str, rnd: random.Random, row: int = 0):
+    if kind == "id":
+        return row + 1
+    if kind == "int":
+        return rnd.randint(0, 200)
+    if kind == "float":
+        return round(rnd.uniform(0, 100), 2)
+    if kind == "date":
+        return date(2024, 1, 1) + timedelta(days=rnd.randint(0, 365))
+    if kind in _UNITS:
+        unit = rnd.choice(_UNITS[kind])
+        num = rnd.randint(1, 500)
+        if rnd.random() < 0.1:
+            return f"{unit} {num}"
+        return f"{num} {unit}" if rnd.random() < 0.5 else f"{num}{unit}"
+    return rnd.choice(_VALUES[kind])
+
+def _columns(cols: int, rnd: random.Random, synonyms: bool = True) -> List[tuple]:
+    result = []
+    for i in range(cols):
+        name, kind = BASE_COLUMNS[i % len(BASE_COLUMNS)]
+        if synonyms and name in HEADER_SYNONYMS:
+            name = rnd.choice(HEADER_SYNONYMS[name])
+        if i >= len(BASE_COLUMNS):
+            name = f"{name} {i // len(BASE_COLUMNS) + 1}"
+        result.append((name, kind))
+    return result
+
+def make_frame(rows: int, cols: int, seed: int = 0, synonyms: bool = True) -> pd.DataFrame:
+    rnd = random.Random(seed)
+    columns = _columns(cols, rnd, synonyms)
+    data = {}
+    for name, kind in columns:
+        data[name] = [
+            None if rnd.random() < 0.05 else _value(kind, rnd, r)
+            for r in range(rows)
+        ]
+    return pd.DataFrame(data)
+
+def make_workbook(
+    path: str,
+    rows: int,
+    cols: int,
+    sheets: int = 3,
+    seed: int = 0,
+    repeat_header_every: int = 500,
+    tail_rows: int = 5
+) -> str:
+    rnd = random.Random(seed)
+    wb = Workbook()
+    wb.remove(wb.active)
+
+    names = SHEET_NAMES[:]
+    rnd.shuffle(names)
+    for s in range(sheets):
+        sheet_name = names[s % len(names)]
+        if s >= len(names):
+            sheet_name = f"{sheet_name} {s // len(names)}"
+        ws = wb.create_sheet(sheet_name[:31])
+        columns = _columns(cols, rnd)
+
+        group_size = max(1, cols // len(GROUPS))
+        for g in range(0, cols, group_size):
+            ws.cell(row=1, column=g + 1, value=GROUPS[(g // group_size) % len(GROUPS)])
+            last = min(cols, g + group_size)
+            if last - g > 1:
+                ws.merge_cells(start_row=1, start_column=g + 1, end_row=1, end_column=last)
+        header = [name for name, _ in columns]
+        ws.append(header)
+
+        for r in range(rows):
+            if repeat_header_every and r and r % repeat_header_every == 0:
+                ws.append(header)
+            ws.append([
+                None if rnd.random() < 0.05 else _value(kind, rnd, r)
+                for _, kind in columns
+            ])
+
+        if tail_rows:
+            ws.append([rnd.choice(TAIL_KEYWORDS)] + [None] * (cols - 1))
+            for r in range(tail_rows):
+                ws.append([_value(kind, rnd, r) for _, kind in columns])
+
+    wb.save(path)
+    return path
+
+def make_files(
+    out_dir: str,
+    files: int,
+    rows: int,
+    cols: int,
+    sheets: int = 3,
+    seed: int = 0
+) -> List[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i in range(files):
+        path = os.path.join(out_dir, f"region_{i + 1}.xlsx")
+        paths.append(make_workbook(path, rows, cols, sheets=sheets, seed=seed + i))
+    return paths
+
+def benchmark_rules(base: Optional[dict] = None) -> dict:
+    rules = {
+        "column_rules": {
+            "rules": [
+                {"target": "Вакцинация", "synonyms": ["Вакц-я", "вакц"], "no_merge": False},
+            ],
+            "enabled": True,
+            "threshold": 80,
+            "auto_merge": True,
+            "use_content": True,
+            "content_rows": 5,
+            "header_weight": 0.6,
+        },
+        "unit_rules": {
+            "rules": [
+                {"column": "Длина", "to": "см", "factors": {"м": 100.0, "см": 1.0}},
+                {"column": "Объём", "to": "мл", "factors": {"л": 1000.0, "мл": 1.0}},
+                {"column": "Расстояние", "to": "м", "factors": {"км": 1000.0, "м": 1.0}},
+                {"column": "Толщина", "to": "мм", "factors": {"мм": 1.0, "см": 10.0}},
+            ],
+            "enabled": True,
+            "no_unit_to_header": False,
+        },
+        "sheet_rules": {
+            "rules": [
+                {"target": "Животные", "synonyms": ["Живот."], "no_merge": False},
+            ],
+            "enabled": True,
+            "threshold": 80,
+            "auto_merge": True,
+        },
+        # Нечёткое совпадение фильтра всегда спрашивает пользователя,
+        # поэтому в бенчмарке работает только точное совпадение.
+        "word_filter": {
+            "rules": [{"word": "ожидание", "delete_row": False}],
+            "enabled": True,
+            "threshold": 101,
+            "auto_merge": True,
+        },
+        "word_replace": {
+            "rules": [
+                {"target": "есть", "synonyms": ["Да"]},
+                {"target": "женский", "synonyms": ["самка"]},
+                {"target": "мужской", "synonyms": ["самец"]},
+            ],
+            "enabled": True,
+            "threshold": 80,
+            "auto_replace": True,
+        },
+        "column_word_filter": {
+            "rules": [{"word": kw, "delete_row": False} for kw in TAIL_KEYWORDS],
+            "enabled": True,
+        },
+        "skip_rows_keywords": ["Сокращения"],
+        "profiling": {"enabled": False, "trace_memory": False},
+    }
+    if base:
+        rules.update(base)
+    return apply_defaults(rules)
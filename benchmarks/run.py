@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+STAGES = [
+    "process_files",
+    "apply_word_replace",
+    "apply_word_filter",
+    "extract_units_to_headers",
+    "apply_column_rules",
+    "apply_unit_conversions",
+    "save_result",
+]
+
+def _timeit(fn: Callable, setup: Callable, repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        args = setup()
+        t0 = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - t0)
+    return times
+
+def _stage_input(rows: int, cols: int, seed: int):
+    import pandas as pd
+    from app.processing.dtypes import compact_dtypes, align_categories
+    from app.processing.runlog import RunLog
+    from benchmarks.generator import make_frame, benchmark_rules
+
+    half = max(1, rows // 2)
+    cfg = benchmark_rules()["dtypes"]
+    parts = align_categories([
+        compact_dtypes(make_frame(half, cols, seed=seed), cfg, RunLog()),
+        compact_dtypes(make_frame(rows - half, cols, seed=seed + 1), cfg, RunLog()),
+    ])
+    col_source = {}
+    for idx, df in enumerate(parts):
+        for col in df.columns:
+            col_source.setdefault(col, idx)
+    return pd.concat(parts, ignore_index=True, sort=False), col_source
+
+def _reset_peak_rss() -> bool:
+    # Linux позволяет сбросить VmHWM, чтобы пик не включал импорт модулей
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _proc_status_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    raise OSError(field)
+
+def _rss_mb() -> float:
+    try:
+        return _proc_status_mb("VmRSS")
+    except OSError:
+        return _peak_rss_mb()
+
+def _peak_rss_mb() -> float:
+    try:
+        return _proc_status_mb("VmHWM")
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+def _memory_child(paths: List[str], stub_spacy: bool, queue):
+    if stub_spacy:
+        from benchmarks.spacy_stub import install
+        install()
+    from app.processing.reader import process_files
+    from benchmarks.generator import benchmark_rules
+
+    rules = benchmark_rules()
+    _reset_peak_rss()
+    baseline = _rss_mb()
+    result, _ = process_files(paths, rules)
+    queue.put({
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "result_mb": round(sum(df.memory_usage(deep=True).sum() for df in result.values()) / 2**20, 1),
+    })
+
+def run_memory(rows: int, args, workdir: str) -> dict:
+    import multiprocessing as mp
+    from benchmarks.generator import make_files
+
+    src_dir = os.path.join(workdir, f"mem_{rows}")
+    per_file = max(1, rows // (args.files * args.sheets))
+    paths = make_files(src_dir, args.files, per_file, args.cols, sheets=args.sheets, seed=args.seed)
+
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_memory_child, args=(paths, args.stub_spacy, queue))
+    proc.start()
+    res = queue.get()
+    proc.join()
+    res.update({"rows": rows, "cols": args.cols})
+    print(
+        f"{rows:>10} {'peak RSS (process_files)':<28} "
+        f"{res['peak_rss_mb']:>8.1f}MB {res['peak_rss_mb'] - res['baseline_rss_mb']:>+8.1f}MB",
+        flush=True
+    )
+    return res
+
+def run_scale(rows: int, args, stages: List[str], workdir: str) -> Dict[str, dict]:
+    from app.processing.reader import process_files
+    from app.processing.writer import write_result
+    from app.processing.transformer import (
+        apply_word_replace,
+        apply_word_filter,
+        extract_units_to_headers,
+        apply_column_rules,
+        apply_unit_conversions,
+    )
+    from app.processing.runlog import RunLog
+    from benchmarks.generator import make_files, benchmark_rules
+
+    rules = benchmark_rules()
+    results: Dict[str, dict] = {}
+    frame, col_source = _stage_input(rows, args.cols, args.seed)
+
+    def fresh():
+        return frame.copy()
+
+    cases = {
+        "apply_word_replace": (
+            lambda df: apply_word_replace(df, rules["word_replace"], RunLog()),
+            lambda: (fresh(),)
+        ),
+        "apply_word_filter": (
+            lambda df: apply_word_filter(df, rules["word_filter"], RunLog()),
+            lambda: (fresh(),)
+        ),
+        "extract_units_to_headers": (
+            lambda df: extract_units_to_headers(df, rules, RunLog()),
+            lambda: (fresh(),)
+        ),
+        "apply_column_rules": (
+            lambda df: apply_column_rules(df, rules["column_rules"], RunLog(), col_source),
+            lambda: (fresh(),)
+        ),
+        "apply_unit_conversions": (
+            lambda df: apply_unit_conversions(df, rules["unit_rules"], RunLog()),
+            lambda: (fresh(),)
+        ),
+    }
+
+    paths = []
+    if "process_files" in stages or "save_result" in stages:
+        src_dir = os.path.join(workdir, f"src_{rows}")
+        per_file = max(1, rows // (args.files * args.sheets))
+        paths = make_files(src_dir, args.files, per_file, args.cols, sheets=args.sheets, seed=args.seed)
+        cases["process_files"] = (
+            lambda: process_files(paths, rules),
+            lambda: ()
+        )
+
+    if "save_result" in stages:
+        result, log = process_files(paths, rules)
+        out_path = os.path.join(workdir, f"result_{rows}.xlsx")
+        cases["save_result"] = (
+            lambda: write_result(out_path, result, log, options=rules["writer"]),
+            lambda: ()
+        )
+
+    for stage in stages:
+        fn, setup = cases[stage]
+        times = _timeit(fn, setup, args.repeat)
+        results[stage] = {
+            "rows": rows,
+            "cols": args.cols,
+            "best_s": round(min(times), 6),
+            "mean_s": round(sum(times) / len(times), 6),
+            "repeat": args.repeat,
+        }
+        print(f"{rows:>10} {stage:<28} {min(times):>10.4f} {sum(times) / len(times):>10.4f}", flush=True)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк этапов объединения Excel")
+    parser.add_argument("--scales", default="1000,10000,50000",
+                        help="число строк через запятую")
+    parser.add_argument("--cols", type=int, default=12)
+    parser.add_argument("--files", type=int, default=3)
+    parser.add_argument("--sheets", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--stub-spacy", action="store_true",
+                        help="заменить модель spaCy заглушкой (без сети и загрузки модели)")
+    parser.add_argument("--memory", action="store_true",
+                        help="замерить пиковый RSS process_files в отдельном процессе")
+    parser.add_argument("--json", help="сохранить результаты в JSON")
+    args = parser.parse_args(argv)
+
+    if args.stub_spacy:
+        from benchmarks.spacy_stub import install
+        install()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"неизвестные этапы: {', '.join(sorted(unknown))}")
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+
+    print(f"{'rows':>10} {'stage':<28} {'best, s':>10} {'mean, s':>10}")
+    report = {"args": vars(args), "results": [], "memory": []}
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in scales:
+            for stage, res in run_scale(rows, args, stages, workdir).items():
+                report["results"].append({"stage": stage, **res})
+            if args.memory:
+                report["memory"].append(run_memory(rows, args, workdir))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import re
+import sys
+import types
+
+from rapidfuzz import fuzz
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]+")
+
+class _Token:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos_ = "PROPN" if text[:1].isupper() else "NOUN"
+
+class _Doc:
+    def __init__(self, text: str):
+        self.text = text
+        self._tokens = [_Token(t) for t in _TOKEN_RE.findall(text)]
+
+    def __iter__(self):
+        return iter(self._tokens)
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def similarity(self, other: "_Doc") -> float:
+        return fuzz.token_set_ratio(self.text, other.text) / 100
+
+class _Language:
+    def __call__(self, text: str) -> _Doc:
+        return _Doc(text)
+
+def install():
+    try:
+        import spacy
+    except ImportError:
+        spacy = types.ModuleType("spacy")
+        sys.modules["spacy"] = spacy
+    spacy.load = lambda name, *args, **kwargs: _Language()
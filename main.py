@@ -11,6 +11,10 @@ logging.basicConfig(
 )
 
 def main():
+    if len(sys.argv) > 1:
+        from app.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
     app = QApplication(sys.argv)
     w = MainWindow()
     w.resize(800, 600)
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Модель spaCy в тестах не загружается — сходство считает заглушка
+from benchmarks import spacy_stub  # noqa: E402
+spacy_stub.install()
+
+from app.config import apply_defaults  # noqa: E402
+from app.processing import prompts  # noqa: E402
+
+@pytest.fixture
+def rules(tmp_path):
+    # Правила без словарей, решения — в папке теста
+    r = apply_defaults({
+        "column_rules":       {"rules": [], "threshold": 80, "auto_merge": True},
+        "unit_rules":         {"rules": [], "threshold": 80, "auto_merge": True},
+        "sheet_rules":        {"rules": [], "threshold": 90, "auto_merge": True},
+        "word_filter":        {"rules": [], "threshold": 60, "auto_merge": True},
+        "word_replace":       {"rules": [], "threshold": 80, "auto_replace": True},
+        "column_word_filter": {"rules": []},
+    })
+    r["decisions"]["path"] = str(tmp_path / "decisions.json")
+    r["profiling"]["enabled"] = False
+    return r
+
+@pytest.fixture(autouse=True)
+def _policy():
+    prev = prompts.get_policy()
+    prompts.set_policy("reject")
+    yield
+    prompts.set_policy(prev)
+
+def write_xlsx(path, sheets: dict):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return str(path)
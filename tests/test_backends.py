@@ -0,0 +1,118 @@
+import io
+import zipfile
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from app.processing import backends
+from app.processing.backends import CsvBackend, TrimStats, read_merged_ranges, trim_rows
+from app.processing.reader import process_files
+
+def test_trim_rows_drops_only_trailing_empty_rows():
+    rows = [
+        ("a", None, None),
+        (None, None, None),
+        (None, "b", None, None),
+        (),
+        (None, None),
+        (None, None, None, None, None),
+    ]
+    stats = TrimStats()
+    # Пустая строка в середине сохраняется, пустой хвост не выдаётся
+    assert list(trim_rows(iter(rows), stats)) == [("a",), (), (None, "b")]
+    assert (stats.rows, stats.cols, stats.kept_rows, stats.kept_cols) == (6, 5, 3, 2)
+    assert stats.describe() == "отброшены пустые строки: 3, пустые столбцы: 3 (данные: 3×2)"
+
+    stats = TrimStats()
+    assert list(trim_rows(iter([(None,), ()]), stats)) == [] and stats.kept_rows == 0
+    stats = TrimStats()
+    assert list(trim_rows(iter([("a", "b")]), stats)) == [("a", "b")] and stats.describe() is None
+
+def _workbook(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Учёт"
+    ws.append(["Животное", None, "Вес"])
+    ws.append(["Кличка", "Вид", "кг"])
+    for i in range(200):
+        ws.append([f"кот {i}", "кошка", i])
+    for ref in ("A1:B1", "C1:C2", "A150:C150"):
+        ws.merge_cells(ref)
+    wb.save(path)
+    return str(path)
+
+def test_merged_ranges_match_openpyxl(tmp_path):
+    path = _workbook(tmp_path / "учёт.xlsx")
+    expected = sorted(str(r) for r in load_workbook(path).active.merged_cells.ranges)
+    assert sorted(str(r) for r in read_merged_ranges(path, "Учёт")) == expected
+    assert sorted(str(r) for r in read_merged_ranges(path, "Учёт", max_row=10)) == ["A1:B1", "C1:C2"]
+    assert read_merged_ranges(path, "Нет такого") == []
+
+def test_merge_block_found_across_chunks(tmp_path):
+    path = _workbook(tmp_path / "учёт.xlsx")
+    with zipfile.ZipFile(path) as zf:
+        xml = zf.read("xl/worksheets/sheet1.xml")
+    block = backends._merge_cells_xml(io.BytesIO(xml), chunk=7)
+    assert block.startswith(b"<mergeCells") and block.endswith(b"</mergeCells>")
+    assert backends._merge_cells_xml(io.BytesIO(b"<worksheet><sheetData/></worksheet>")) == b""
+
+CSV = "Кличка;Вес;Прим\r\nБобик;3,5;\r\n;;\r\nМурка;4;\"да; с запятой\"\r\n;;\r\n"
+
+def _csv(tmp_path, text=CSV, encoding="cp1251"):
+    path = tmp_path / "учёт.csv"
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+def test_csv_detects_encoding_and_delimiter(tmp_path):
+    backend = CsvBackend(_csv(tmp_path))
+    assert backend.encoding == "cp1251" and backend.delimiter == ";"
+    assert backend.sheet_names() == ["учёт"]
+
+def test_csv_read_sheet_matches_rows(tmp_path):
+    backend = CsvBackend(_csv(tmp_path), {"csv_chunk_rows": 2})
+    df = backend.read_sheet("учёт")
+    rows = list(backend.data_rows("учёт"))
+    # data_rows обрезает строку по последней непустой ячейке
+    assert df.values.tolist() == [list(r) + [None] * (3 - len(r)) for r in rows]
+    assert df.values.tolist() == [
+        ["Кличка", "Вес", "Прим"],
+        ["Бобик", "3,5", None],
+        [None, None, None],
+        ["Мурка", "4", "да; с запятой"],
+    ]
+    stats = backend.trim["учёт"]
+    assert (stats.rows, stats.kept_rows) == (5, 4)
+    assert backend.read_sheet("учёт", nrows=2).shape == (2, 3)
+
+WIDE = "a;b\n1;2\n" * 5 + "1;2;3;4\n5;6\n1;2;3;4;5;6;7\n"
+
+def test_csv_wide_row_gets_own_columns(tmp_path):
+    df = CsvBackend(_csv(tmp_path, WIDE, "utf-8")).read_sheet("учёт")
+    assert df.shape == (13, 7)
+    assert df.iloc[10].tolist() == ["1", "2", "3", "4", None, None, None]
+    assert df.iloc[12].tolist() == list("1234567")
+
+@pytest.mark.parametrize("chunk_rows", [1, 3, 10, 1000])
+def test_csv_wide_row_streamed(tmp_path, chunk_rows):
+    # Широкая строка в начале фрагмента не обрезается парсером
+    backend = CsvBackend(_csv(tmp_path, WIDE, "utf-8"), {"csv_chunk_rows": chunk_rows})
+    rows = list(backend.data_rows("учёт"))
+    assert len(rows) == 13 and rows[10] == tuple("1234") and rows[11] == tuple("56")
+    assert rows[12] == tuple("1234567")
+
+def test_csv_bad_bytes_after_sample(tmp_path, monkeypatch):
+    monkeypatch.setattr(backends, "_SNIFF_BYTES", 16)
+    text = "Кличка;Вес\nБобик;3\n".encode("utf-8") + "Мурка;4\n".encode("cp1251")
+    path = tmp_path / "учёт.csv"
+    path.write_bytes(text)
+    backend = CsvBackend(str(path))
+    assert backend.encoding == "utf-8"
+    df = backend.read_sheet("учёт")
+    assert df.iloc[1, 0] == "Бобик" and df.iloc[2, 1] == "4" and "\ufffd" in df.iloc[2, 0]
+
+def test_csv_merged_like_excel(tmp_path, rules):
+    result, log = process_files([_csv(tmp_path)], rules)
+    log.close()
+    df = result["учёт"]
+    assert list(df.columns) == ["Кличка", "Вес", "Прим"]
+    assert df["Кличка"].tolist() == ["Бобик", "Мурка"]
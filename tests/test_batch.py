@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from app.processing.batch import load_manifest
+
+def _manifest(tmp_path, jobs):
+    path = tmp_path / "задания.json"
+    path.write_text(json.dumps(jobs, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+def test_manifest_resolves_paths(tmp_path):
+    jobs = load_manifest(_manifest(tmp_path, [
+        {"inputs": ["a.xlsx"], "output": "out/a.xlsx"},
+        {"name": "б", "inputs": ["b.xlsx"], "output": "out/b.xlsx"},
+    ]))
+    assert [j["name"] for j in jobs] == ["job_1", "б"]
+    assert jobs[0]["output"] == str(tmp_path / "out" / "a.xlsx")
+
+def test_duplicate_names_rejected(tmp_path):
+    with pytest.raises(ValueError, match="имя"):
+        load_manifest(_manifest(tmp_path, [
+            {"name": "job_2", "inputs": ["a.xlsx"], "output": "a.xlsx"},
+            {"inputs": ["b.xlsx"], "output": "b.xlsx"},
+        ]))
+
+@pytest.mark.parametrize("second", ["a.xlsx", "./a.xlsx", "a.sqlite"])
+def test_duplicate_outputs_rejected(tmp_path, second):
+    with pytest.raises(ValueError, match="результат"):
+        load_manifest(_manifest(tmp_path, [
+            {"inputs": ["a.xlsx"], "output": "a.xlsx"},
+            {"inputs": ["b.xlsx"], "output": second},
+        ]))
+
+def test_missing_rules_file_rejected(tmp_path):
+    (tmp_path / "rules.json").write_text("{}", encoding="utf-8")
+    jobs = load_manifest(_manifest(tmp_path, [{"inputs": ["a.xlsx"], "output": "a.xlsx", "rules": "rules.json"}]))
+    assert jobs[0]["rules"] == str(tmp_path / "rules.json")
+    with pytest.raises(ValueError, match="«отчёт».*нет файла правил"):
+        load_manifest(_manifest(tmp_path, [
+            {"name": "отчёт", "inputs": ["a.xlsx"], "output": "a.xlsx", "rules": "rulse.json"},
+        ]))
@@ -0,0 +1,23 @@
+import json
+import os
+
+import pandas as pd
+from PySide6.QtWidgets import QApplication
+
+from app import cli
+from app.processing import prompts
+from conftest import write_xlsx
+
+def test_merge_runs_without_display(tmp_path, rules, monkeypatch):
+    monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+    monkeypatch.delenv("DISPLAY", raising=False)
+    prompts.set_policy("ask")
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(json.dumps(rules, ensure_ascii=False), encoding="utf-8")
+    src = write_xlsx(tmp_path / "учёт.xlsx", {"Учёт": pd.DataFrame({"Имя": ["Бобик"], "Вес": [3]})})
+    out = str(tmp_path / "итог.xlsx")
+
+    assert cli.main(["merge", src, "-o", out, "--rules", str(rules_path)]) == 0
+    assert os.path.exists(out)
+    assert prompts.get_policy() == "reject"
+    assert QApplication.instance() is None
@@ -0,0 +1,57 @@
+import json
+
+import pandas as pd
+
+from app.processing import decisions, prompts
+from app.processing.decisions import DecisionStore
+from app.processing.reader import process_files
+from conftest import write_xlsx
+
+def test_first_answer_written_to_disk(tmp_path, rules):
+    path = tmp_path / "decisions.json"
+    store = decisions.configure(rules)
+    assert store is not None and len(store) == 0
+
+    prompts.set_policy("ask")
+    decisions.record("column_merge", "Вес", "Масса", True)
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)["decisions"]
+    assert [e["pair"] for e in saved] == [["Вес", "Масса"]]
+    assert DecisionStore(str(path)).get("column_merge", "Масса", "Вес")["accepted"] is True
+
+def test_session_used_only_when_saving_disabled(rules):
+    session = DecisionStore(None)
+    assert decisions.configure(rules, session) is not session
+    rules["decisions"]["enabled"] = False
+    assert decisions.configure(rules, session) is session
+
+def test_empty_store_reported_in_log(tmp_path, rules):
+    src = write_xlsx(tmp_path / "учёт.xlsx", {"Учёт": pd.DataFrame({"Имя": ["Бобик"]})})
+    result, log = process_files([src], rules)
+    with log:
+        assert any(line.startswith("Сохранённых решений: 0") for line in log)
+
+def test_find_index_follows_changes(tmp_path):
+    path = str(tmp_path / "decisions.json")
+    store = DecisionStore(path)
+    store.put("word_replace", "Кот", "кошка", True, "кошка")
+    store.put("word_replace", "кот ", "котик", False)
+    store.put("word_filter", "кот", "кошка", True, rule="contains")
+    store.put("column_merge", "Масса", "Вес", True)
+    assert [e["pair"][1] for e in store.find("word_replace", "КОТ")] == ["кошка", "котик"]
+    assert [e["pair"][1] for e in store.find("word_filter", "кот", "Contains")] == ["кошка"]
+    assert store.find("word_filter", "кот") == []
+    # Пара слияния индексируется по упорядоченному первому элементу
+    assert len(store.find("column_merge", "вес")) == 1
+
+    store.put("word_replace", "кот", "кошка", False)
+    assert [e["accepted"] for e in store.find("word_replace", "кот")] == [False, False]
+    store.save()
+    assert len(DecisionStore(path).find("word_replace", "кот")) == 2
+
+    store.remove(store.find("word_replace", "кот")[:1])
+    assert [e["pair"][1] for e in store.find("word_replace", "кот")] == ["котик"]
+    store.clear("word_replace")
+    assert store.find("word_replace", "кот") == [] and len(store) == 2
+    store.clear()
+    assert store.find("word_filter", "кот", "contains") == [] and len(store) == 0
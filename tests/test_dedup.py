@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from app.processing.dedup import Deduplicator, part_hash
+from app.processing.reader import process_files
+from conftest import write_xlsx
+
+def test_part_hash_ignores_column_order():
+    df = pd.DataFrame({"Кличка": ["Бобик", "Мурка"], "Вес": [3.5, 4.0]})
+    assert part_hash(df) == part_hash(df[["Вес", "Кличка"]])
+    assert part_hash(df) != part_hash(df.iloc[:1])
+
+def test_parts_differing_by_case_kept():
+    a = pd.DataFrame({"Кличка": ["Бобик", "Мурка"]})
+    b = pd.DataFrame({"Кличка": ["бобик", "Мурка "]})
+    parts, dropped = Deduplicator().unique_parts([a, b, a.copy()])
+    assert dropped == 1
+    assert [p is x for p, x in zip(parts, (a, b))] == [True, True]
+
+def test_rows_matched_after_normalization():
+    df = pd.DataFrame({"Кличка": ["Бобик", " бобик ", None, None, "Мурка"], "Вес": [3, 3.0, None, None, 4]})
+    dedup = Deduplicator()
+    assert dedup.duplicated(df).tolist() == [False, True, False, False, False]
+    seen = set()
+    dedup.duplicated(df.iloc[:2], seen)
+    assert dedup.duplicated(df.iloc[2:], seen).tolist() == [False, False, False]
+    assert Deduplicator(key_columns=["Кличка"]).duplicated(df.assign(Вес=np.arange(5))).tolist() \
+        == [False, True, False, False, False]
+
+def test_duplicate_files_merged_once(tmp_path, rules):
+    rules["dedup"]["enabled"] = True
+    sheet = pd.DataFrame({"Кличка": ["Бобик", "Мурка"], "Вес": [3.5, 4]})
+    write_xlsx(tmp_path / "1.xlsx", {"Учёт": sheet})
+    write_xlsx(tmp_path / "2.xlsx", {"Учёт": sheet})
+    write_xlsx(tmp_path / "3.xlsx", {"Учёт": sheet.assign(Кличка=["БОБИК", "Мурка"])})
+    result, log = process_files([str(tmp_path / f"{i}.xlsx") for i in (1, 2, 3)], rules)
+    with log:
+        lines = list(log)
+    assert "Лист «Учёт»: пропущено одинаковых частей: 1" in lines
+    assert any(line.startswith("Лист «Учёт»: удалено повторяющихся строк: 2") for line in lines)
+    # Третья часть отличается регистром и сохраняется, её строки совпадают
+    # с первой частью после нормализации и отбрасываются построчно
+    assert result["Учёт"]["Кличка"].tolist() == ["Бобик", "Мурка"]
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.config import SETTINGS_DEFAULTS
+from app.processing import transformer
+from app.processing.dtypes import compact_column, compact_dtypes
+from app.processing.runlog import RunLog
+
+IDS = ["12345678901234567890", "98765432109876543210", "12345678901234567890"]
+
+@pytest.fixture
+def cfg():
+    return dict(SETTINGS_DEFAULTS["dtypes"])
+
+def test_numeric_text_kept_by_default(cfg):
+    s = pd.Series(["10", "20", "30", "10"], dtype=object)
+    out = compact_column(s, cfg)
+    assert out.astype(str).tolist() == ["10", "20", "30", "10"]
+    assert not pd.api.types.is_numeric_dtype(out)
+
+@pytest.mark.parametrize("values", [
+    IDS,                                      # не помещается в int64
+    ["1234567890123456", "1234567890123457"],  # больше 15 значащих цифр
+    ["007", "010", "123"],                    # ведущие нули
+    ["12E3", "5", "7"],                       # экспонента
+])
+def test_codes_stay_text_when_inference_enabled(cfg, values):
+    cfg["infer_numeric_text"] = True
+    out = compact_column(pd.Series(values, dtype=object), cfg)
+    assert not pd.api.types.is_numeric_dtype(out)
+    assert out.astype(str).tolist() == values
+
+def test_plain_numbers_converted_when_enabled(cfg):
+    cfg["infer_numeric_text"] = True
+    out = compact_column(pd.Series(["1", "2.5", "-3"], dtype=object), cfg)
+    assert out.tolist() == [1.0, 2.5, -3.0]
+
+def test_huge_integers_not_cast(cfg):
+    s = pd.Series([1, 10**20, None], dtype=object)
+    out = compact_column(s, cfg)
+    assert out.tolist()[:2] == [1, 10**20]
+
+def test_round_trip_through_compaction(cfg):
+    df = pd.DataFrame({"Номер": IDS, "Код": ["007", "010", "007"], "Вес": [1.0, 2.0, 3.0]})
+    before = df.astype(str)
+    compact_dtypes(df, dict(cfg, infer_numeric_text=True), RunLog())
+    pd.testing.assert_frame_equal(df.astype(str), before)
+
+def test_map_column_skips_unused_categories():
+    df = pd.DataFrame({"Статус": pd.Categorical(["да", "да"], categories=["да", "нет"])})
+    seen = []
+
+    def fn(idx, v, count):
+        seen.append((v, count))
+        return v.upper()
+
+    assert transformer._map_column(df, "Статус", fn)
+    assert seen == [("да", 2)]
+    assert df["Статус"].tolist() == ["ДА", "ДА"]
+
+def test_dates_converted(cfg):
+    s = pd.Series([datetime(2024, 1, 5), None, datetime(2023, 12, 31)], dtype=object)
+    out = compact_column(s, cfg)
+    assert pd.api.types.is_datetime64_any_dtype(out)
+    assert out.isna().tolist() == [False, True, False]
+
+def test_unparseable_dates_kept(cfg, monkeypatch):
+    s = pd.Series([datetime(2024, 1, 5), datetime(9999, 12, 31)], dtype=object)
+    # В pandas 2.x 9999-12-31 вне диапазона ns; имитируем это и в pandas 3
+    real = pd.to_datetime
+    monkeypatch.setattr(pd, "to_datetime", lambda v, **kw: real(v, **kw).where(v.map(lambda d: d.year < 9000)))
+    out = compact_column(s, cfg)
+    assert out is s
+    assert out.tolist()[1] == datetime(9999, 12, 31)
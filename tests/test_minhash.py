@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from app.processing import minhash
+from app.processing.minhash import ColumnContent, jaccard, lsh_candidates, signature
+
+def _frame():
+    base = [f"кличка {i}" for i in range(200)]
+    return pd.DataFrame({
+        "Кличка": base,
+        # Почти копия: 190 общих значений из 210, регистр и пробелы не важны
+        "Имя": [f" КЛИЧКА {i}" for i in range(190)] + [f"имя {i}" for i in range(10)],
+        "Вес": [f"{i} кг" for i in range(200)],
+        "Пусто": [None] * 200,
+    })
+
+def test_signature_is_deterministic():
+    s = pd.Series(["а", "б", "в", None])
+    assert np.array_equal(signature(s), signature(s.copy()))
+    assert not np.array_equal(signature(s, seed=1), signature(s, seed=2))
+    assert np.array_equal(signature(pd.Series([5, 7])), signature(pd.Series([5.0, 7.0])))
+    assert minhash.is_empty(signature(pd.Series([None, None], dtype=object)))
+
+def test_jaccard_estimate():
+    df = _frame()
+    sigs = {c: signature(df[c], 256) for c in df.columns}
+    assert abs(jaccard(sigs["Кличка"], sigs["Имя"]) - 190 / 210) < 0.1
+    assert jaccard(sigs["Кличка"], sigs["Вес"]) < 0.1
+    assert jaccard(sigs["Кличка"], sigs["Пусто"]) is None
+
+def test_near_duplicates_share_bucket():
+    df = _frame()
+    sigs = {c: signature(df[c]) for c in df.columns}
+    pairs = lsh_candidates(sigs, bands=32)
+    assert frozenset(("Кличка", "Имя")) in pairs
+    assert not any("Вес" in p or "Пусто" in p for p in pairs)
+    assert lsh_candidates(sigs, bands=32) == pairs
+
+def test_column_content_with_lsh():
+    df = _frame()
+    content = ColumnContent(df, df.columns, {"lsh": True, "lsh_bands": 32})
+    assert content.similarity("Кличка", "Имя") > 0.8
+    assert content.similarity("Кличка", "Вес") == 0.0
+    assert content.similarity("Вес", "Пусто") is None
+    content.merge("Кличка", "Имя", "Кличка")
+    assert set(content.signatures) == {"Кличка", "Вес", "Пусто"}
+    assert content.candidates == set()
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from benchmarks.generator import benchmark_rules, make_files
+from app.processing import parallel, transformer
+from app.processing.reader import process_files
+from conftest import ROOT
+
+@pytest.fixture
+def stub_in_workers(tmp_path_factory, monkeypatch):
+    # Процессы пула запускаются заново (spawn) — заглушка spaCy ставится
+    # в них через sitecustomize
+    site = tmp_path_factory.mktemp("site")
+    (site / "sitecustomize.py").write_text(
+        f"import sys\nsys.path.insert(0, {ROOT!r})\n"
+        "from benchmarks import spacy_stub\nspacy_stub.install()\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setenv("PYTHONPATH", str(site))
+
+def _run(paths, tmp_path, parallel):
+    rules = benchmark_rules()
+    rules["decisions"]["path"] = str(tmp_path / "decisions.json")
+    # Малый лимит примеров: merge должен применять его ко всем процессам
+    rules["logging"]["max_examples"] = 2
+    rules["parallel"].update(enabled=parallel, workers=2)
+    result, log = process_files(paths, rules)
+    with log:
+        lines = [line for line in log if not line.startswith("Параллельная обработка")]
+        assert (len(lines) < len(list(log))) == parallel
+        return result, lines + log.summary_lines(), dict(log.counters)
+
+def test_parallel_matches_sequential(tmp_path, stub_in_workers):
+    paths = make_files(str(tmp_path / "in"), 2, 60, 10, sheets=3)
+    seq, seq_log, seq_counters = _run(paths, tmp_path, False)
+    par, par_log, par_counters = _run(paths, tmp_path, True)
+
+    assert list(par) == list(seq)
+    for name in seq:
+        pd.testing.assert_frame_equal(par[name], seq[name])
+    assert par_log == seq_log
+    assert par_counters == seq_counters
+
+@pytest.mark.parametrize("method, content, loads", [
+    ("tfidf", False, False),
+    ("fuzz", False, False),
+    ("spacy", False, True),
+    ("tfidf", True, True),
+])
+def test_worker_loads_model_only_when_needed(rules, monkeypatch, method, content, loads):
+    calls = []
+    monkeypatch.setattr(transformer, "load_model", lambda: calls.append(1))
+    rules["column_rules"].update(similarity=method, use_content=content, content_method="sample")
+    parallel._init_worker(rules, "reject", False, None)
+    assert bool(calls) == loads
@@ -0,0 +1,35 @@
+import tracemalloc
+
+import pandas as pd
+
+from app.config import SETTINGS_DEFAULTS, apply_defaults
+from app.processing.profiler import RunProfile
+
+def test_memory_tracing_is_opt_in():
+    assert SETTINGS_DEFAULTS["profiling"] == {"enabled": True, "trace_memory": False}
+    profile = RunProfile.from_rules(apply_defaults({}))
+    assert profile.enabled and not profile.trace_memory
+    assert not RunProfile.from_rules({}).trace_memory
+
+def test_timing_without_tracemalloc():
+    profile = RunProfile.from_rules(apply_defaults({}))
+    profile.start()
+    assert not tracemalloc.is_tracing()
+    df = pd.DataFrame({"a": range(10)})
+    out = profile.run("фильтр", lambda d: d[d["a"] > 4], df, file="1.xlsx", sheet="Учёт")
+    profile.stop()
+    [rec] = profile.records
+    assert (rec["rows_in"], rec["rows_out"]) == (10, len(out)) == (10, 5)
+    assert rec["wall_s"] >= 0 and rec["peak_mem_bytes"] is None
+
+def test_memory_traced_when_enabled():
+    profile = RunProfile.from_rules({"profiling": {"trace_memory": True}})
+    profile.start()
+    try:
+        assert tracemalloc.is_tracing()
+        with profile.stage("выделение"):
+            data = [0] * 100000
+    finally:
+        profile.stop()
+    assert not tracemalloc.is_tracing()
+    assert profile.records[0]["peak_mem_bytes"] >= len(data) * 8
@@ -0,0 +1,38 @@
+from app.processing.runlog import RunLog
+from app.ui.result_view import LogIndex
+
+def _log():
+    log = RunLog()
+    log.sheet = "Учёт"
+    log.event("word_replace", "'Да' → 'есть'", column="Прививка", row=0)
+    log.event("word_replace", "'Да' → 'есть'", column="Прививка", row=2)
+    log.append("Словарно объединены ['Вес', 'Масса'] → 'Вес'")
+    log.sheet = "Склад"
+    log.event("word_replace", "'Да' → 'есть'", column="Прививка", row=1)
+    log.append("Лист «Склад»: объединены столбцы 'Вес' и 'Масса'")
+    log.sheet = None
+    return log
+
+def test_entries_filtered_by_sheet():
+    with _log() as log:
+        index = LogIndex(log)
+    # Индекс строится один раз и не читает закрытый лог
+    entries = index.entries("Учёт", "Прививка")
+    assert entries[0] == "Замена слов: 2"
+    assert len(entries) == 3 and all("лист «Учёт»" in line for line in entries[1:])
+    assert index.entries("Склад", "Прививка")[0] == "Замена слов: 1"
+
+    # Строки без пометки листа видны на всех листах, с пометкой — только на своём
+    assert index.entries("Учёт", "Вес") == ["Словарно объединены ['Вес', 'Масса'] → 'Вес'"]
+    assert index.entries("Склад", "Масса") == [
+        "Словарно объединены ['Вес', 'Масса'] → 'Вес'",
+        "Лист «Склад»: объединены столбцы 'Вес' и 'Масса'",
+    ]
+    assert index.entries("Учёт", "Нет такого") == []
+
+def test_duplicate_lines_shown_once():
+    with RunLog() as log:
+        log.sheet = "Учёт"
+        log.append("Столбец 'Вес' переименован")
+        log.append("Столбец 'Вес' переименован")
+        assert LogIndex(log).entries("Учёт", "Вес") == ["Столбец 'Вес' переименован"]
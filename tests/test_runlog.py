@@ -0,0 +1,50 @@
+import pytest
+
+from app.processing.runlog import RunLog
+from app.processing.reader import process_files
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+def test_lines_reach_file_before_save(tmp_path):
+    path = str(tmp_path / "run.log")
+    with RunLog(path) as log:
+        log.append("первая строка")
+        assert _read(path) == ["первая строка"]
+
+def test_save_is_idempotent(tmp_path):
+    path = str(tmp_path / "run.log")
+    with RunLog(path) as log:
+        log.append("строка")
+        log.event("word_replace", "а → б")
+        log.save(path)
+        log.save(path)
+        lines = _read(path)
+        assert lines.count("Итоги по правилам:") == 1
+        assert list(log) == ["строка", "Замена слов: а → б"]
+
+        # Строка после save оказывается перед итогами, а не после них
+        log.append("ещё строка")
+        log.save(path)
+        lines = _read(path)
+        assert lines.count("Итоги по правилам:") == 1
+        assert lines.index("ещё строка") < lines.index("Итоги по правилам:")
+
+def test_save_to_other_path(tmp_path):
+    log = RunLog()
+    log.append("строка")
+    log.event("word_replace", "а → б")
+    target = str(tmp_path / "copy.log")
+    log.save(target)
+    log.save(target)
+    assert _read(target).count("Итоги по правилам:") == 1
+    log.close()
+    log.close()
+
+def test_log_kept_when_processing_fails(tmp_path, rules):
+    path = str(tmp_path / "run.log")
+    with pytest.raises(Exception):
+        process_files([str(tmp_path / "нет такого.xlsx")], rules, sample_rows=5, log_path=path)
+    # Файл лога закрыт и содержит строки, записанные до ошибки
+    assert any("Предпросмотр" in line for line in _read(path))
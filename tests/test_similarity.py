@@ -0,0 +1,58 @@
+import math
+
+import pandas as pd
+import pytest
+
+from app.processing import transformer
+from app.processing.runlog import RunLog
+from app.processing.similarity import HeaderScorer, TfidfScorer
+from app.processing.transformer import apply_column_rules
+
+def test_from_config_defaults():
+    scorer = HeaderScorer.from_config({})
+    assert (scorer.method, scorer.cascade, scorer.cascade_margin, scorer.threshold) == ("spacy", False, 30, 80)
+    # Каскад имеет смысл только перед моделью
+    assert not HeaderScorer.from_config({"similarity": "fuzz", "cascade": True}).cascade
+    assert HeaderScorer.from_config({"cascade": True, "threshold": 70}).threshold == 70
+    with pytest.raises(ValueError, match="Неизвестный метод"):
+        HeaderScorer.from_config({"similarity": "bert"})
+
+def test_fuzz_score():
+    scorer = HeaderScorer("fuzz")
+    assert scorer.score("Кошка", "кошка") == 1.0
+    # 4 общих символа из 10 — ровно 80%
+    assert scorer.score("кошка", "кошки") == 0.8
+    assert scorer.score("кошка", "мышка") == 0.6
+    assert scorer.pairs == 3 and "через модель" not in scorer.summary()
+
+def test_tfidf_score():
+    tfidf = TfidfScorer()
+    tfidf.prepare(["вес", "вес брутто", "цвет"])
+    assert math.isclose(tfidf.score("вес брутто", "вес брутто"), 1.0)
+    assert tfidf.score("вес", "цвет") == tfidf.score("цвет", "вес")
+    assert 0 < tfidf.score("вес", "вес брутто") < 1
+    assert tfidf.score("вес", "") == 0.0
+
+def test_cascade_skips_model_below_margin(monkeypatch):
+    monkeypatch.setattr(transformer, "header_similarity", lambda a, b: 0.9)
+    scorer = HeaderScorer("spacy", cascade=True, cascade_margin=30, threshold=80)
+    scorer.prepare(["вес", "цвет", "масса кошки", "масса кошек"])
+    assert scorer.score("вес", "цвет") < 0.5
+    assert scorer.score("масса кошки", "масса кошек") == 0.9
+    assert (scorer.pairs, scorer.model_pairs) == (2, 1)
+
+@pytest.mark.parametrize("method", ["fuzz", "tfidf"])
+def test_threshold_boundary(rules, method):
+    a, b = "масса кошки", "масса кошек"
+    scorer = HeaderScorer(method)
+    scorer.prepare([a, b])
+    threshold = math.floor(scorer.score(a, b) * 100)
+    assert 0 < threshold < 100
+    df = pd.DataFrame({a: ["1", None], b: [None, "2"]})
+    cfg = dict(rules["column_rules"], similarity=method)
+    source = {a: 0, b: 1}
+    # Оценка, равная порогу, проходит; на единицу выше порога — нет
+    merged = apply_column_rules(df, dict(cfg, threshold=threshold), RunLog(), source)
+    assert merged.columns.tolist() == [a] and merged[a].tolist() == ["1", "2"]
+    kept = apply_column_rules(df, dict(cfg, threshold=threshold + 1), RunLog(), source)
+    assert kept.columns.tolist() == [a, b]
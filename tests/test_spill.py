@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+
+from app.processing import spill
+from app.processing.runlog import RunLog
+from app.processing.spill import SpillStore, SpilledPart, load_part
+
+def _store(tmp_path, log):
+    return SpillStore(threshold_mb=0, directory=str(tmp_path), log=log)
+
+def test_loaded_part_outlives_store(tmp_path):
+    log = RunLog()
+    store = _store(tmp_path, log)
+    df = pd.DataFrame({"Вес": [1.5, 2.5, 3.5], "Имя": ["а", "б", "в"]})
+    part = store.put(df)
+    assert isinstance(part, SpilledPart)
+    loaded = load_part(part)
+    folder = os.path.dirname(part.path)
+
+    store.close()
+    assert not os.path.exists(folder)
+    pd.testing.assert_frame_equal(loaded, df)
+    assert not any("Не удалось удалить" in line for line in log)
+
+def test_cleanup_failure_logged(tmp_path, monkeypatch):
+    log = RunLog()
+    store = _store(tmp_path, log)
+    store.put(pd.DataFrame({"a": [1]}))
+
+    def fail(path):
+        raise PermissionError("занят")
+
+    monkeypatch.setattr(spill.shutil, "rmtree", fail)
+    store.close()
+    assert any("Не удалось удалить временную папку" in line for line in log)
+    assert not store.active
@@ -0,0 +1,65 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from app.processing.runlog import RunLog
+from app.processing.sqlite_sink import unique_columns, write_sqlite
+from app.processing.writer import write_result
+
+def _rows(path, sql):
+    con = sqlite3.connect(path)
+    try:
+        return con.execute(sql).fetchall()
+    finally:
+        con.close()
+
+def test_unique_columns_ignore_ascii_case():
+    assert unique_columns(["Name", "name", "NAME", "Вес", "вес", "_RUN"]) == [
+        "Name", "name_2", "NAME_3", "Вес", "вес", "_RUN_2",
+    ]
+
+def test_case_collisions_written(tmp_path):
+    path = str(tmp_path / "итог.sqlite")
+    df = pd.DataFrame([["a", "b"]], columns=["Code", "code"])
+    lines = write_sqlite(path, {"Учёт": df}, [])
+    assert _rows(path, 'SELECT "Code", "code_2" FROM "Учёт"') == [("a", "b")]
+    assert any("«code» записан как «code_2»" in line for line in lines)
+
+    # Дозапись с другим регистром попадает в те же столбцы
+    write_sqlite(path, {"Учёт": pd.DataFrame({"CODE": ["c"]})}, [])
+    assert _rows(path, 'SELECT "Code" FROM "Учёт" ORDER BY _run') == [("a",), ("c",)]
+
+def test_big_integers_stored_as_text(tmp_path):
+    path = str(tmp_path / "итог.db")
+    big = 12345678901234567890
+    df = pd.DataFrame({
+        "Номер": pd.Series([big, 1], dtype=object),
+        "Счёт": np.array([2**63 + 1, 5], dtype=np.uint64),
+        "Смесь": pd.Series([-2**70, "x"], dtype=object),
+        "Вес": [1, 2],
+    })
+    write_sqlite(path, {"Учёт": df}, [])
+    types = {r[1]: r[2] for r in _rows(path, 'PRAGMA table_info("Учёт")')}
+    assert types["Номер"] == types["Счёт"] == "TEXT" and types["Вес"] == "INTEGER"
+    assert _rows(path, 'SELECT "Номер", "Счёт", "Смесь", "Вес" FROM "Учёт"') == [
+        (str(big), str(2**63 + 1), str(-2**70), 1),
+        ("1", "5", "x", 2),
+    ]
+
+def test_caller_log_not_modified(tmp_path):
+    log = ["строка"]
+    write_result(str(tmp_path / "итог.sqlite"), {"Учёт": pd.DataFrame({"a": [1]})}, log)
+    assert log == ["строка"]
+    with open(tmp_path / "итог.log", encoding="utf-8") as f:
+        assert any(line.startswith("SQLite: запуск") for line in f)
+
+def test_run_log_stored(tmp_path):
+    path = str(tmp_path / "итог.sqlite")
+    with RunLog() as log:
+        log.append("строка")
+        write_result(path, {"Учёт": pd.DataFrame({"a": [1]})}, log)
+        assert any(line.startswith("SQLite: лист") for line in log)
+    messages = [m for (m,) in _rows(path, "SELECT message FROM _run_log ORDER BY line")]
+    assert messages[0] == "строка"
+    assert any(m.startswith("SQLite: запуск 1") for m in messages)
@@ -0,0 +1,21 @@
+from openpyxl import Workbook
+
+from app.processing.streaming import stream_files
+
+def test_cells_beyond_header_are_logged(tmp_path, rules):
+    path = str(tmp_path / "учёт.xlsx")
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Учёт"
+    ws.append(["Имя", "Вес"])
+    for i in range(20):
+        ws.append([f"кот {i}", i])
+    ws.append(["лишний", 1, "примечание", "ещё"])
+    wb.save(path)
+
+    rules["streaming"].update(enabled=True, head_rows=5, chunk_rows=7)
+    out = str(tmp_path / "итог.xlsx")
+    with stream_files([path], rules, out) as log:
+        lines = [line for line in log if "правее заголовка" in line]
+    assert len(lines) == 1
+    assert lines[0].endswith(": 2")
@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+from app.processing import transformer
+from app.processing.colprofile import SheetProfile
+from app.processing.reader import process_files
+from app.processing.runlog import RunLog
+from app.processing.transformer import (
+    apply_word_replace,
+    apply_word_filter,
+    extract_units_to_headers,
+    apply_unit_conversions,
+    apply_column_rules,
+    dictionary_column_map,
+)
+from conftest import write_xlsx
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "Имя":   ["Бобик", "Мурка", "Рыжик"],
+        "Прививка": ["Да", "нет", "Да"],
+        "Длина": ["1 м", "50 см", None],
+        "Статус": ["готов", "ожидание", "готов"],
+    })
+
+def _snapshot(df):
+    return df.copy(deep=True)
+
+@pytest.mark.skipif(not pd.__version__.startswith("2."), reason="настройка есть только в pandas 2.x")
+def test_import_does_not_enable_copy_on_write():
+    assert pd.get_option("mode.copy_on_write") is False
+
+def test_public_helpers_do_not_modify_argument(frame, rules):
+    rules["word_replace"]["rules"] = [{"target": "есть", "synonyms": ["Да"]}]
+    rules["word_filter"]["rules"] = [{"word": "ожидание", "delete_row": True}]
+    rules["unit_rules"]["rules"] = [{"column": "Длина", "to": "см", "factors": {"м": 100.0, "см": 1.0}}]
+    before = _snapshot(frame)
+
+    out = apply_word_replace(frame, rules["word_replace"], RunLog())
+    assert out["Прививка"].tolist() == ["есть", "нет", "есть"]
+    out = apply_word_filter(frame, rules["word_filter"], RunLog())
+    assert len(out) == 2
+    extract_units_to_headers(frame, rules, RunLog())
+    out = apply_unit_conversions(frame, rules["unit_rules"], RunLog())
+    assert out["Длина"].tolist()[:2] != frame["Длина"].tolist()[:2]
+    apply_column_rules(frame, rules["column_rules"], RunLog(), {})
+
+    pd.testing.assert_frame_equal(frame, before)
+
+def test_inplace_reuses_frame(frame, rules):
+    rules["word_replace"]["rules"] = [{"target": "есть", "synonyms": ["Да"]}]
+    out = apply_word_replace(frame, rules["word_replace"], RunLog(), inplace=True)
+    assert out is frame
+    assert frame["Прививка"].tolist() == ["есть", "нет", "есть"]
+
+def test_copy_on_write_context_is_scoped():
+    with transformer.copy_on_write():
+        pass
+    if pd.__version__.startswith("2."):
+        assert pd.get_option("mode.copy_on_write") is False
+
+def test_dictionary_map_needs_two_synonyms():
+    cfg = {"rules": [{"target": "Прививка", "synonyms": ["Вакц-я", "Вакцинация"]}]}
+    assert dictionary_column_map(["Кличка", "Вакц-я"], cfg) == {}
+    assert dictionary_column_map(["Кличка", "Вакц-я", "прививка"], cfg) == {
+        "Вакц-я": "Прививка", "прививка": "Прививка",
+    }
+
+def test_single_synonym_column_keeps_name(tmp_path, rules):
+    rules["column_rules"]["rules"] = [{"target": "Прививка", "synonyms": ["Вакц-я"]}]
+    one = write_xlsx(tmp_path / "1.xlsx", {"Учёт": pd.DataFrame({"Кличка": ["Бобик"], "Вакц-я": ["да"]})})
+    two = write_xlsx(tmp_path / "2.xlsx", {"Учёт": pd.DataFrame({"Кличка": ["Мурка"], "Вакц-я": ["нет"]})})
+    result, log = process_files([one, two], rules)
+    log.close()
+    assert list(result["Учёт"].columns) == ["Кличка", "Вакц-я"]
+
+def test_synonyms_from_different_parts_merged(tmp_path, rules):
+    rules["column_rules"]["rules"] = [{"target": "Прививка", "synonyms": ["Вакц-я"]}]
+    one = write_xlsx(tmp_path / "1.xlsx", {"Учёт": pd.DataFrame({"Кличка": ["Бобик"], "Вакц-я": ["да"]})})
+    two = write_xlsx(tmp_path / "2.xlsx", {"Учёт": pd.DataFrame({"Кличка": ["Мурка"], "Прививка": ["нет"]})})
+    result, log = process_files([one, two], rules)
+    log.close()
+    assert list(result["Учёт"].columns) == ["Кличка", "Прививка"]
+    assert result["Учёт"]["Прививка"].tolist() == ["да", "нет"]
+
+def test_profile_built_on_first_request(frame, rules):
+    sp = SheetProfile()
+    log = RunLog()
+    apply_word_replace(frame, rules["word_replace"], log, sheet_profile=sp)
+    apply_unit_conversions(frame, rules["unit_rules"], log, sheet_profile=sp)
+    # Этапы без правил не просматривают значения
+    assert sp.computed == 0
+
+    rules["word_replace"]["rules"] = [{"target": "есть", "synonyms": ["Да"]}]
+    out = apply_word_replace(frame, rules["word_replace"], log, sheet_profile=sp, inplace=True)
+    assert sp.computed == len(frame.columns)
+    rules["word_filter"]["rules"] = [{"word": "ожидание"}]
+    apply_word_filter(out, rules["word_filter"], log, sheet_profile=sp, inplace=True)
+    # Пересчитан только столбец, изменённый заменой слов
+    assert sp.computed == len(frame.columns) + 1
+
+def test_word_replace_uses_profile_lowercase(rules):
+    rules["word_replace"]["rules"] = [{"target": "есть", "synonyms": ["Да", "Ага"]}]
+    df = pd.DataFrame({"Ответ": ["ДА, АГА", "ЕСТЬ", "İstanbul да"]})
+    out = apply_word_replace(df, rules["word_replace"], RunLog())
+    assert out["Ответ"].tolist() == ["есть, есть", "ЕСТЬ", "İstanbul есть"]
+
+def test_disabled_stages_skip_profiling(tmp_path, rules):
+    for section in ("word_replace", "word_filter", "column_rules", "unit_rules"):
+        rules[section]["enabled"] = False
+    src = write_xlsx(tmp_path / "учёт.xlsx", {"Учёт": pd.DataFrame({"Имя": ["Бобик"], "Вес": ["3 кг"]})})
+    result, log = process_files([src], rules)
+    with log:
+        assert "Лист «Учёт»: Профиль столбцов не понадобился" in list(log)
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.processing import transformer
+from app.processing.vectors import VectorTable, export_vectors
+
+WORDS = ["вес", "масса", "кошка", "Кошка", "цвет"]
+
+def _nlp(mode="default"):
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((len(WORDS), 8)).astype(np.float32)
+    strings = {100 + i: w for i, w in enumerate(WORDS)}
+    vectors = SimpleNamespace(mode=mode, data=data, key2row={k: i for i, k in enumerate(strings)})
+    return SimpleNamespace(vocab=SimpleNamespace(vectors=vectors, strings=strings)), data
+
+def _cos(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+def test_export_and_reopen(tmp_path):
+    nlp, data = _nlp()
+    path = str(tmp_path / "vectors")
+    assert not VectorTable.exists(path)
+    # Ключи не в нижнем регистре не выгружаются
+    assert export_vectors(nlp, path) == 4
+    assert VectorTable.exists(path)
+
+    table = VectorTable(path)
+    assert table.vectors.shape == (4, 8) and np.all(table.keys[1:] > table.keys[:-1])
+    for i, word in enumerate(WORDS):
+        if word.islower():
+            np.testing.assert_array_equal(table.vectors[table.row(word)], data[i])
+    assert table.row("Кошка") is None and table.row("собака") is None
+
+    assert table.similarity("вес", "вес") == pytest.approx(1.0)
+    assert table.similarity("вес", "масса") == pytest.approx(_cos(data[0], data[1]), rel=1e-6)
+    # Вектор текста — сумма векторов известных токенов
+    assert table.similarity("кошка, цвет", "цвет кошка") == pytest.approx(1.0)
+    assert table.text_vector("собака") is None
+    assert table.similarity("собака", "вес") == 0.0
+
+def test_cache_bounded(tmp_path):
+    nlp, _ = _nlp()
+    path = str(tmp_path / "vectors")
+    export_vectors(nlp, path)
+    table = VectorTable(path, cache_size=2)
+    for text in ("вес", "масса", "цвет"):
+        table.text_vector(text)
+    assert len(table._cache) <= 2
+
+def test_unsupported_mode_rejected(tmp_path):
+    nlp, _ = _nlp(mode="floret")
+    with pytest.raises(ValueError, match="floret"):
+        export_vectors(nlp, str(tmp_path / "vectors"))
+
+def test_configure_uses_table(tmp_path):
+    nlp, _ = _nlp()
+    path = str(tmp_path / "vectors")
+    export_vectors(nlp, path)
+    try:
+        assert transformer.configure({"vectors": {"path": path}})
+        assert transformer.header_similarity("вес", "вес") == pytest.approx(1.0)
+    finally:
+        assert not transformer.configure({"vectors": {"path": str(tmp_path / "нет")}})
@@ -0,0 +1,86 @@
+import os
+import re
+import zipfile
+
+import pandas as pd
+
+from app.processing.reader import process_files
+from app.processing.watch import WatchService
+from app.processing.writer import write_result
+from app.processing.xlsx_parts import package_sheets
+from conftest import write_xlsx
+
+def _sheet_xml(path):
+    parts = package_sheets(path)
+    with zipfile.ZipFile(path) as zf:
+        return {title: zf.read(part) for title, part in parts.items()}
+
+def _run(service):
+    ready, removed = service.scan()
+    return service.process(ready, removed)
+
+def test_incremental_update(tmp_path, rules):
+    src = tmp_path / "in"
+    src.mkdir()
+    out = str(tmp_path / "итог.xlsx")
+    rules["watch"]["settle_s"] = 0
+    service = WatchService(str(src), out, rules, echo=lambda message: None)
+
+    write_xlsx(src / "1.xlsx", {"Учёт": pd.DataFrame({"Имя": ["Бобик", "Мурка"], "Вес": [3.5, 4]})})
+    assert _run(service) == {"Учёт"}
+    before = _sheet_xml(out)
+
+    write_xlsx(src / "2.xlsx", {"Склад": pd.DataFrame({"Товар": ["миска"], "Остаток": [2]})})
+    assert _run(service) == {"Склад"}
+    after = _sheet_xml(out)
+    # Незатронутый лист перенесён из прежней книги без изменений
+    assert after["Учёт"] == before["Учёт"]
+    assert list(after) == ["Учёт", "Склад"]
+
+    write_xlsx(src / "3.xlsx", {"Учёт": pd.DataFrame({"Имя": ["Рыжик"], "Вес": [5.0]})})
+    assert _run(service) == {"Учёт"}
+    assert _sheet_xml(out)["Склад"] == after["Склад"]
+
+    # Итог совпадает с обычным объединением тех же файлов
+    files = [str(src / f) for f in sorted(os.listdir(src))]
+    result, log = process_files(files, rules)
+    expected = str(tmp_path / "полный.xlsx")
+    with log:
+        write_result(expected, result, log)
+    got = pd.read_excel(out, sheet_name=None)
+    want = pd.read_excel(expected, sheet_name=None)
+    assert sorted(got) == sorted(want)
+    for name in want:
+        pd.testing.assert_frame_equal(got[name], want[name])
+
+def test_removed_file_drops_sheet(tmp_path, rules):
+    src = tmp_path / "in"
+    src.mkdir()
+    out = str(tmp_path / "итог.xlsx")
+    rules["watch"]["settle_s"] = 0
+    service = WatchService(str(src), out, rules, echo=lambda message: None)
+    write_xlsx(src / "1.xlsx", {"Учёт": pd.DataFrame({"Имя": ["Бобик"]})})
+    write_xlsx(src / "2.xlsx", {"Склад": pd.DataFrame({"Товар": ["корм"]})})
+    _run(service)
+    os.remove(src / "2.xlsx")
+    assert _run(service) == {"Склад"}
+    assert list(pd.read_excel(out, sheet_name=None)) == ["Учёт"]
+
+def test_log_cycles_start_on_new_line(tmp_path, rules):
+    src = tmp_path / "in"
+    src.mkdir()
+    out = str(tmp_path / "итог.xlsx")
+    rules["watch"]["settle_s"] = 0
+    rules["word_replace"]["rules"] = [{"target": "есть", "synonyms": ["Да"]}]
+    service = WatchService(str(src), out, rules, echo=lambda message: None)
+    write_xlsx(src / "1.xlsx", {"Учёт": pd.DataFrame({"Прививка": ["Да"]})})
+    _run(service)
+    write_xlsx(src / "2.xlsx", {"Учёт": pd.DataFrame({"Прививка": ["Да"]})})
+    _run(service)
+    with open(service.log_path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines.count("Итоги по правилам:") == 2
+    assert any(line.startswith("Файл 2.xlsx") for line in lines)
+    # Строка итогов не склеена с первой строкой следующего цикла
+    totals = [line for line in lines if line.startswith("  Замена слов")]
+    assert len(totals) == 2 and all(re.search(r"— \d+$", line) for line in totals)
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.config import SETTINGS_DEFAULTS
+from app.processing.runlog import RunLog
+from app.processing.spill import HAS_PYARROW
+from app.processing.writer import split_result, write_result
+from app.processing.xlsx_parts import sheet_titles
+
+@pytest.fixture
+def result():
+    return {
+        "Учёт": pd.DataFrame({
+            "Имя": ["Бобик", "Мурка", None],
+            "Вес": [3.5, np.nan, 12.25],
+            "Возраст": [1, 7, 3],
+            "Привит": [True, False, True],
+            "Дата": [datetime(2024, 1, 5), pd.NaT, datetime(2023, 12, 31, 8, 30)],
+            "Вид": pd.Categorical(["собака", "кошка", "собака"]),
+        }),
+        "Примечания": pd.DataFrame({"Текст": ["<&> «кавычки»", " пробелы ", "многострочный\nтекст"]}),
+    }
+
+def _write(path, result, engine):
+    options = dict(SETTINGS_DEFAULTS["writer"], engine=engine)
+    with RunLog() as log:
+        write_result(str(path), result, log, options=options)
+        return list(log)
+
+def test_default_engine_is_openpyxl():
+    assert SETTINGS_DEFAULTS["writer"]["engine"] == "openpyxl"
+
+def test_parts_output_matches_openpyxl(tmp_path, result):
+    _write(tmp_path / "a.xlsx", result, "openpyxl")
+    _write(tmp_path / "b.xlsx", result, "parts")
+    a = pd.read_excel(tmp_path / "a.xlsx", sheet_name=None)
+    b = pd.read_excel(tmp_path / "b.xlsx", sheet_name=None)
+    assert list(a) == list(b) == list(result)
+    for name in a:
+        pd.testing.assert_frame_equal(a[name], b[name])
+
+def test_sheet_renames_logged(tmp_path):
+    long_name = "Очень длинное имя листа для проверки"
+    names = ["Учёт: 2024", long_name, "учёт_ 2024", "Учёт_ 2024"]
+    log = []
+    titles = sheet_titles(names, log)
+    assert titles == ["Учёт_ 2024", long_name[:31], "учёт_ 2024_2", "Учёт_ 2024_3"]
+    assert len(log) == 4
+    assert "недопустимые символы" in log[0]
+    assert "длиннее 31 символа" in log[1]
+    assert "повтор имени" in log[2]
+
+    lines = _write(tmp_path / "c.xlsx", {"a/b": pd.DataFrame({"x": [1]})}, "parts")
+    assert "Лист «a/b» записан как «a_b»: недопустимые символы" in lines
+
+def _split(result, **options):
+    return split_result("/out/итог.xlsx", result, dict(SETTINGS_DEFAULTS["writer"], **options))
+
+def _frame(rows, cols=2):
+    return pd.DataFrame({f"c{j}": range(rows) for j in range(cols)})
+
+def test_split_by_rows_and_columns():
+    books, columnar, lines = _split({"Учёт": _frame(5, 3)}, max_rows=3, max_columns=2)
+    sheets = books["/out/итог.xlsx"]
+    assert list(sheets) == ["Учёт", "Учёт (2)", "Учёт (3)", "Учёт (4)", "Учёт (5)", "Учёт (6)"]
+    assert [df.shape for df in sheets.values()] == [(2, 2), (2, 1), (2, 2), (2, 1), (1, 2), (1, 1)]
+    assert sheets["Учёт (2)"].columns.tolist() == ["c2"]
+    assert lines[0].startswith("Лист «Учёт» (5 строк × 3 столбцов)") and not columnar
+
+def test_split_files_mode():
+    books, _, _ = _split({"Учёт": _frame(5), "Склад": _frame(1)}, max_rows=3, split="files")
+    assert list(books) == ["/out/итог.xlsx", "/out/итог_2.xlsx", "/out/итог_3.xlsx"]
+    assert list(books["/out/итог.xlsx"]) == ["Учёт", "Склад"]
+    assert [len(b["Учёт"]) for b in books.values()] == [2, 2, 1]
+
+def test_split_titles_do_not_overwrite_sheets():
+    long_a = "Очень длинное название листа номер 1"
+    long_b = "Очень длинное название листа номер 2"
+    result = {"Data": _frame(3), "Data (2)": _frame(1, 1), long_a: _frame(1), long_b: _frame(1)}
+    books, _, lines = _split(result, max_rows=3)
+    sheets = books["/out/итог.xlsx"]
+    assert len(sheets) == 5
+    assert sheets["Data (2)"].shape == (1, 2)
+    assert sheets["Data (2)_2"].shape == (1, 1)
+    assert len({t.lower() for t in sheets}) == 5 and all(len(t) <= 31 for t in sheets)
+    assert any("«Data (2)_2»" in line for line in lines)
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="нужен pyarrow")
+def test_split_parquet_targets_unique():
+    books, columnar, _ = _split({"a/b": _frame(5), "a:b": _frame(5)}, max_rows=3, split="parquet")
+    assert list(columnar) == ["/out/итог.a_b.parquet", "/out/итог.a_b_2.parquet"]
+    assert [len(df) for df in columnar.values()] == [5, 5]
+    assert list(books["/out/итог.xlsx"]) == ["a_b", "a_b_2"]